@@ -0,0 +1,282 @@
+"""
+Numeric kernels for the dashboard's analytics stages.
+
+app.py runs as Streamlit's __main__, which process-pool workers can't
+import, so the CPU-bound parts of the analytics live here: plain functions
+over NumPy arrays, with no Streamlit or pandas imports so a worker starts
+quickly. app.py builds the input columns and turns kernel output into its
+dicts and frames; the same kernels run in-process when no compute pool is
+configured.
+
+Inputs cross the process boundary as SharedColumns: one shared-memory block
+of float64 columns that the worker maps rather than unpickles.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+def weighted_mean(codes: np.ndarray, values: np.ndarray, weights: np.ndarray, n: int) -> np.ndarray:
+    """Per-group weighted mean via bincount; NaN where a group has no weight."""
+    valid = np.isfinite(values) & np.isfinite(weights) & (weights > 0)
+    total = np.bincount(codes[valid], weights=weights[valid], minlength=n)
+    weighted = np.bincount(codes[valid], weights=(values * weights)[valid], minlength=n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total > 0, weighted / total, np.nan)
+
+
+def sector_aggregates(codes: np.ndarray, change: np.ndarray, volume: np.ndarray, market_cap: np.ndarray,
+                      n: int, top_n: int = 3) -> Dict:
+    """Per-sector counts, sums, weighted returns and top rows by volume.
+
+    Counts, sums and weighted sums are single np.bincount passes, and the
+    top rows per sector come from an argpartition over each sector's
+    segment of one stable sort. ``top_rows`` holds, for each sector in
+    ``present``, row indices ordered by descending volume. Like a pandas
+    groupby, missing (non-finite) values are skipped: ``count`` and
+    ``change_sum`` cover the rows with a change, ``volume_sum`` those with
+    a volume, and rows without a volume rank last.
+    """
+    codes = codes.astype(np.intp)
+    rows = np.bincount(codes, minlength=n)
+    present = np.flatnonzero(rows)
+    has_change = np.isfinite(change)
+    has_volume = np.isfinite(volume)
+    rank_volume = np.where(has_volume, volume, -np.inf)
+
+    order = np.argsort(codes, kind='stable')
+    bounds = np.concatenate(([0], np.cumsum(rows)))
+    top_rows = []
+    for code in present:
+        segment = order[bounds[code]:bounds[code + 1]]
+        if len(segment) > top_n:
+            segment = segment[np.argpartition(-rank_volume[segment], top_n - 1)[:top_n]]
+        top_rows.append(segment[np.argsort(-rank_volume[segment], kind='stable')])
+
+    return {
+        'present': present,
+        'count': np.bincount(codes[has_change], minlength=n),
+        'change_sum': np.bincount(codes[has_change], weights=change[has_change], minlength=n),
+        'volume_sum': np.bincount(codes[has_volume], weights=volume[has_volume], minlength=n),
+        'cap_weighted': weighted_mean(codes, change, market_cap, n),
+        'volume_weighted': weighted_mean(codes, change, volume, n),
+        'top_rows': top_rows,
+    }
+
+
+def breadth(change: np.ndarray, price: np.ndarray, high: np.ndarray, low: np.ndarray,
+            volume: np.ndarray, avg_volume: np.ndarray) -> Dict:
+    """Market breadth indicators; missing inputs are passed as NaN columns."""
+    total = len(change)
+    gainers = int((change > 0).sum())
+    losers = int((change < 0).sum())
+
+    # Advance/Decline ratio. With zero declines the ratio is undefined
+    # (effectively infinite); represent that explicitly rather than
+    # returning a raw gainer count that would render as e.g. "45.00x".
+    ad_ratio = gainers / losers if losers > 0 else float('inf')
+
+    # New highs/lows: stocks trading within 5% of their 52-week high/low.
+    # Guard on valid (>0) bounds and price so missing fields don't produce
+    # false hits.
+    priced = price > 0
+    near_highs = int((priced & (high > 0) & (price >= 0.95 * high)).sum())
+    near_lows = int((priced & (low > 0) & (price <= 1.05 * low)).sum())
+
+    # True relative volume: today's volume vs the average volume (app.py
+    # passes the 3-month average scaled to the share of a day's volume
+    # expected by now), per stock. Use the median across stocks with a valid
+    # average so a single outlier doesn't skew the headline figure.
+    # None => no data.
+    valid = avg_volume > 0
+    ratio = volume[valid] / avg_volume[valid]
+    ratio = ratio[~np.isnan(ratio)]
+    rel_volume = float(np.median(ratio)) if ratio.size else None
+
+    return {
+        'total': total,
+        'gainers': gainers,
+        'losers': losers,
+        'unchanged': total - gainers - losers,
+        'gainers_pct': (gainers / total * 100) if total > 0 else 0,
+        'ad_ratio': ad_ratio,
+        'strong_gainers': int((change > 5).sum()),
+        'strong_losers': int((change < -5).sum()),
+        'near_highs': near_highs,
+        'near_lows': near_lows,
+        'rel_volume': rel_volume,
+    }
+
+
+def sector_leaves(codes: np.ndarray, weight: np.ndarray, change: np.ndarray, n: int, max_nodes: int) -> Dict:
+    """Two-level sector -> symbol hierarchy within a node budget.
+
+    Each present sector keeps its heaviest rows as leaves and rolls the rest
+    into one "others" node, with the leaves per sector chosen so sectors +
+    leaves + others stay within ``max_nodes``. Rows without a positive
+    weight are left out. Sector and others changes are weight-averaged;
+    ``leaf_rows`` lists the kept rows grouped by sector code, heaviest first.
+    """
+    codes = codes.astype(np.intp)
+    valid = np.isfinite(weight) & (weight > 0) & np.isfinite(change)
+    rows = np.flatnonzero(valid)
+    codes, weight, change = codes[rows], weight[rows], change[rows]
+    count = np.bincount(codes, minlength=n)
+    present = np.flatnonzero(count)
+    leaves = max(1, max_nodes // max(1, len(present)) - 2)
+
+    # Group by sector, heaviest first, and rank each row within its sector.
+    order = np.lexsort((-weight, codes))
+    starts = np.concatenate(([0], np.cumsum(count)))[:-1]
+    rank = np.arange(len(order)) - starts[codes[order]]
+    kept, rest = order[rank < leaves], order[rank >= leaves]
+
+    weight_sum = np.bincount(codes, weights=weight, minlength=n)
+    others_weight = np.bincount(codes[rest], weights=weight[rest], minlength=n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sector_change = np.bincount(codes, weights=weight * change, minlength=n) / weight_sum
+        others_change = np.bincount(codes[rest], weights=(weight * change)[rest], minlength=n) / others_weight
+    return {
+        'present': present,
+        'count': count,
+        'weight': weight_sum,
+        'change': sector_change,
+        'leaf_rows': rows[kept],
+        'others_count': np.bincount(codes[rest], minlength=n),
+        'others_weight': others_weight,
+        'others_change': others_change,
+    }
+
+
+def comoment_update(count: np.ndarray, mean: np.ndarray, m2: np.ndarray, cross: np.ndarray,
+                    x: np.ndarray, valid: np.ndarray):
+    """Add one bar of returns to pairwise running moments (Welford), in place.
+
+    Moments are pairwise-complete: for each pair (i, j), ``count`` bars had
+    both returns, ``mean[i, j]`` and ``m2[i, j]`` are the running mean and
+    sum of squared deviations of x_i over those bars (x_j's are the
+    transposes), and ``cross`` the sum of co-deviations. O(N^2) per bar,
+    however many bars came before.
+    """
+    pair = valid[:, None] & valid[None, :]
+    x = np.where(valid, x, 0.0)
+    count += pair
+    delta = np.where(pair, x[:, None] - mean, 0.0)
+    mean += delta / np.where(pair, count, 1)
+    m2 += delta * np.where(pair, x[:, None] - mean, 0.0)
+    cross += delta * np.where(pair, x[None, :] - mean.T, 0.0)
+
+
+def correlation(count: np.ndarray, m2: np.ndarray, cross: np.ndarray, min_count: int) -> np.ndarray:
+    """Pearson correlation from comoment_update's moments; NaN below min_count bars or zero variance."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cross / np.sqrt(m2 * m2.T)
+    corr = np.where((count >= min_count) & np.isfinite(corr), (corr + corr.T) / 2, np.nan)
+    return np.clip(corr, -1.0, 1.0)
+
+
+def top_pairs(corr: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Rows, columns and values of the k highest off-diagonal correlations, highest first."""
+    i, j = np.triu_indices(len(corr), 1)
+    values = corr[i, j]
+    valid = np.flatnonzero(np.isfinite(values))
+    if len(valid) > k:
+        valid = valid[np.argpartition(-values[valid], k - 1)[:k]]
+    valid = valid[np.argsort(-values[valid], kind='stable')]
+    return i[valid], j[valid], values[valid]
+
+
+def cluster_order(corr: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Average-linkage clustering on 1 - correlation: (leaf order, flat cluster labels).
+
+    Merges the closest pair of clusters until one remains, concatenating
+    their members so correlated names end up adjacent. Flat clusters are
+    the groups formed by merges at correlation >= threshold (average
+    linkage never merges closer after a farther merge, so that is a cut of
+    the tree). Unknown correlations count as zero. Meant for the few dozen
+    names of a heatmap: O(n^3).
+    """
+    n = len(corr)
+    dist = 1.0 - np.nan_to_num(corr, nan=0.0)
+    np.fill_diagonal(dist, np.inf)
+    members = [[i] for i in range(n)]
+    labels = np.arange(n)
+    active = list(range(n))
+    while len(active) > 1:
+        sub = dist[np.ix_(active, active)]
+        a, b = divmod(int(np.argmin(sub)), len(active))
+        a, b = active[a], active[b]
+        if dist[a, b] <= 1.0 - threshold:
+            labels[members[b]] = labels[a]
+        size_a, size_b = len(members[a]), len(members[b])
+        dist[a] = dist[:, a] = (size_a * dist[a] + size_b * dist[b]) / (size_a + size_b)
+        dist[a, a] = np.inf
+        members[a] += members[b]
+        active.remove(b)
+    order = np.array(members[active[0]] if n else [], dtype=np.intp)
+    # Renumber clusters by first appearance in the leaf order.
+    _, first = np.unique(labels[order], return_index=True)
+    renumber = np.empty(n, dtype=np.intp)
+    renumber[labels[order][np.sort(first)]] = np.arange(len(first))
+    return order, renumber[labels]
+
+
+KERNELS = {
+    'breadth': breadth,
+    'sector_aggregates': sector_aggregates,
+    'sector_leaves': sector_leaves,
+}
+
+
+class SharedColumns:
+    """Equal-length float64 columns packed into one shared-memory block.
+
+    Created by the parent; ``spec`` is all a worker needs to map the block.
+    The parent calls release() once the worker is done with it.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        from multiprocessing import shared_memory
+
+        self.names: List[str] = list(columns)
+        self.length = len(columns[self.names[0]]) if self.names else 0
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, 8 * len(self.names) * self.length))
+        block = np.ndarray((len(self.names), self.length), dtype=np.float64, buffer=self.shm.buf)
+        for i, name in enumerate(self.names):
+            block[i] = columns[name]
+        del block
+
+    @property
+    def spec(self) -> Tuple[str, List[str], int]:
+        return self.shm.name, self.names, self.length
+
+    def release(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def run_kernel(kernel: str, spec: Tuple[str, List[str], int], kwargs: Dict):
+    """Worker entry point: map the shared columns, run a kernel, unmap.
+
+    Kernel results are new arrays, never views of the shared block, so
+    they outlive the mapping.
+    """
+    from multiprocessing import shared_memory
+
+    name, names, length = spec
+    shm = shared_memory.SharedMemory(name=name)
+    block = np.ndarray((len(names), length), dtype=np.float64, buffer=shm.buf)
+    try:
+        return KERNELS[kernel](**{col: block[i] for i, col in enumerate(names)}, **kwargs)
+    finally:
+        del block
+        try:
+            shm.close()
+        except BufferError:
+            pass    # a traceback still references the columns; unmapped when collected
+
+
+def ping() -> bool:
+    """No-op task used to start pool workers."""
+    return True
@@ -7,14 +7,38 @@ Features: Animated metric cards, sector analysis, intraday metrics, auto-refresh
 import streamlit as st
 import pandas as pd
 import numpy as np
-import requests
-import yfinance as yf
-from datetime import datetime, time as dt_time
+from datetime import date, datetime, timedelta, time as dt_time
+from zoneinfo import ZoneInfo
+import asyncio
+import bisect
+import functools
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import hashlib
+import html
+import hmac
+import json
+import logging
+import os
+import queue
+import sys
+import threading
 import time
-import pytz
-from typing import Dict, List, Tuple, Optional
-import plotly.graph_objects as go
-import plotly.express as px
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
+
+import analytics
+import snapshot_store
+from quote_columns import QUOTE_FIELDS, QuoteColumns
+
+# Heavy libraries that aren't needed to paint the first frame are imported
+# lazily inside the functions that use them (requests and yfinance in the
+# fetchers, plotly in the chart builders), so a cold server process or a
+# fresh script run only pays for them on first use. tools/import_budget.py
+# checks that they stay off the startup path.
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+    import pyarrow as pa
 
 # ============================================================================
 # PAGE CONFIG - Must be first Streamlit command
@@ -38,13 +62,167 @@ DEFAULT_CONFIG = {
     'top_gainers_count': 10,
     'top_losers_count': 5,
     'volume_leaders_count': 10,
+    'extra_rankings_count': 10,             # unusual volume / near 52W high tables
+    'heatmap_weight': 'Market Cap',         # sector heatmap tile size (TREEMAP_WEIGHTS)
+    'show_correlation': True,               # co-movement heatmap and pairs (see CORRELATION)
     'growth_revenue_threshold': 100,
     'growth_eps_threshold': 25,
     'growth_min_price': 10.00,
     'growth_min_volume': 100000,
     'exclude_biotech': True,
+    'growth_refresh_interval': 30,          # minutes; fundamentals change slowly
+    # Streaming mode: apply websocket ticks to an in-memory quote table and
+    # redraw at a fixed UI cadence instead of polling the screener.
+    'streaming_enabled': bool(os.environ.get('DASHBOARD_STREAM_URL')),
+    'stream_url': os.environ.get('DASHBOARD_STREAM_URL', 'ws://localhost:8765'),
+    'stream_ui_interval': 1,                # seconds
+    # Symbol universe: 'Most Active' (Yahoo's screener) or the name of a
+    # watchlist from DASHBOARD_WATCHLISTS.
+    'universe': 'Most Active',
+    'show_alerts': True,                    # banner of recent alerts (see ALERTS)
+    # Low-power display (see LOW_POWER_CSS) for weak kiosk hardware; a
+    # ?lowpower=1 or ?lowpower=0 query parameter overrides it per display.
+    'low_power': os.environ.get('DASHBOARD_LOW_POWER') == '1',
+}
+
+# Market tape (see MARKET TAPE below). These are process-wide, so they come
+# from the environment rather than the per-session sidebar config.
+TAPE_RECORD_PATH = os.environ.get('DASHBOARD_TAPE_RECORD')
+TAPE_RECORD_FUNDAMENTALS = os.environ.get('DASHBOARD_TAPE_FUNDAMENTALS') == '1'
+TAPE_REPLAY_PATH = os.environ.get('DASHBOARD_TAPE_REPLAY')
+TAPE_REPLAY_SPEED = float(os.environ.get('DASHBOARD_TAPE_SPEED', '1'))   # 0 = as fast as possible
+
+# Session history (see HISTORY STORE below): where to persist each refresh,
+# and the minimum spacing between persisted snapshots in seconds.
+HISTORY_DIR = os.environ.get('DASHBOARD_HISTORY_DIR')
+HISTORY_MIN_INTERVAL = float(os.environ.get('DASHBOARD_HISTORY_INTERVAL', '60'))
+
+# Watchlists (see load_watchlists): a JSON file mapping watchlist names to
+# symbol lists, or a text file with one list of symbols. Watchlist quotes
+# come from the multi-symbol quote endpoint in batches of QUOTE_BATCH_SIZE,
+# QUOTE_BATCH_WORKERS at a time.
+WATCHLIST_PATH = os.environ.get('DASHBOARD_WATCHLISTS')
+MOST_ACTIVE = 'Most Active'
+QUOTE_BATCH_SIZE = 200
+QUOTE_BATCH_WORKERS = 4
+
+# Outbound Yahoo requests (see REQUEST SCHEDULER below) from every session
+# and thread share one token bucket of DASHBOARD_UPSTREAM_RATE requests per
+# second (bursts of DASHBOARD_UPSTREAM_BURST), granted in priority order:
+# the quote snapshot first, data a panel is waiting for next, and refreshes
+# of data already on screen last. UPSTREAM_RESERVE tokens are kept for the
+# snapshot, so background work can't use up a burst the headline refresh
+# needs. Each endpoint also has a cap on requests in flight.
+UPSTREAM_RATE = float(os.environ.get('DASHBOARD_UPSTREAM_RATE', 5))
+UPSTREAM_BURST = int(os.environ.get('DASHBOARD_UPSTREAM_BURST', 10))
+UPSTREAM_RESERVE = 2
+UPSTREAM_CONCURRENCY = {'screener': 2, 'quote': QUOTE_BATCH_WORKERS, 'fundamentals': 4}
+PRIORITY_SNAPSHOT, PRIORITY_VISIBLE, PRIORITY_BACKGROUND = 0, 1, 2
+PRIORITY_NAMES = ('snapshot', 'visible', 'background')
+
+# Circuit breakers (see CIRCUIT BREAKERS below), one per upstream endpoint
+# and shared by every session: CIRCUIT_FAILURES consecutive failures, or any
+# 429, open a circuit. It stays open for the response's Retry-After, else
+# CIRCUIT_COOLDOWN seconds doubling with each consecutive trip up to
+# CIRCUIT_MAX_COOLDOWN, then lets a single probe request through.
+CIRCUIT_FAILURES = 3
+CIRCUIT_COOLDOWN = 5
+CIRCUIT_MAX_COOLDOWN = 300
+CIRCUIT_MAX_RETRY_AFTER = 3600      # ignore Retry-After values beyond an hour
+
+# Profiling (see PROFILING below): DASHBOARD_PROFILE=1 profiles every
+# session's fragment runs; ?profile=1 profiles a single session. Profiles are
+# written to DASHBOARD_PROFILE_DIR, keeping the newest PROFILE_KEEP files.
+PROFILE_ENABLED = os.environ.get('DASHBOARD_PROFILE') == '1'
+PROFILE_DIR = os.environ.get('DASHBOARD_PROFILE_DIR', 'profiles')
+PROFILE_KEEP = int(os.environ.get('DASHBOARD_PROFILE_KEEP', '50'))
+PROFILE_TOP_N = 15
+
+# Compute offload (see COMPUTE OFFLOAD below): with DASHBOARD_COMPUTE_WORKERS
+# > 0 the analytics stages run in a process pool of that size. A fragment
+# waits up to DASHBOARD_COMPUTE_WAIT seconds for a new result before showing
+# the last completed one.
+COMPUTE_WORKERS = int(os.environ.get('DASHBOARD_COMPUTE_WORKERS', '0'))
+COMPUTE_WAIT = float(os.environ.get('DASHBOARD_COMPUTE_WAIT', '0.25'))
+
+# Alerts (see ALERTS below): rules come from DASHBOARD_ALERT_RULES (a JSON
+# list like DEFAULT_ALERT_RULES), and fired alerts are appended as JSON lines
+# to DASHBOARD_ALERT_LOG and/or POSTed to DASHBOARD_ALERT_WEBHOOK. A rule that
+# fired for a symbol/sector doesn't fire for it again within ALERT_COOLDOWN
+# seconds; the banner shows alerts from the last ALERT_BANNER_SECONDS.
+ALERT_RULES_PATH = os.environ.get('DASHBOARD_ALERT_RULES')
+ALERT_LOG_PATH = os.environ.get('DASHBOARD_ALERT_LOG')
+ALERT_WEBHOOK_URL = os.environ.get('DASHBOARD_ALERT_WEBHOOK')
+ALERT_COOLDOWN = float(os.environ.get('DASHBOARD_ALERT_COOLDOWN', '900'))
+ALERT_BANNER_SECONDS = 300
+ALERT_BANNER_ROWS = 5
+
+# A rule fires when ``field`` crosses ``threshold`` going ``op`` ('above' or
+# 'below'), and re-arms once the value has moved back past the threshold by
+# ``hysteresis``. ``scope`` picks what the field belongs to: 'symbol' (quote
+# columns, optionally limited to ``symbols``), 'sector' (sector performance
+# columns) or 'market' (breadth indicators).
+DEFAULT_ALERT_RULES = [
+    {'name': "Up 5%", 'scope': 'symbol', 'field': 'Change (%)', 'op': 'above', 'threshold': 5, 'hysteresis': 1},
+    {'name': "Down 5%", 'scope': 'symbol', 'field': 'Change (%)', 'op': 'below', 'threshold': -5, 'hysteresis': 1},
+    {'name': "Breadth below 45%", 'scope': 'market', 'field': 'gainers_pct', 'op': 'below', 'threshold': 45,
+     'hysteresis': 2},
+    {'name': "A/D above 1.5", 'scope': 'market', 'field': 'ad_ratio', 'op': 'above', 'threshold': 1.5,
+     'hysteresis': 0.1},
+    {'name': "A/D below 1.5", 'scope': 'market', 'field': 'ad_ratio', 'op': 'below', 'threshold': 1.5,
+     'hysteresis': 0.1},
+    {'name': "Sector turned positive", 'scope': 'sector', 'field': 'Avg Change', 'op': 'above', 'threshold': 0,
+     'hysteresis': 0.25},
+    {'name': "Sector turned negative", 'scope': 'sector', 'field': 'Avg Change', 'op': 'below', 'threshold': 0,
+     'hysteresis': 0.25},
+]
+
+# Relative volume (see VOLUME PROFILES below) compares today's volume with
+# the share of a normal day's volume expected by this minute of the session,
+# from per-symbol curves built by tools/volume_profile.py
+# (DASHBOARD_VOLUME_PROFILE); symbols without one use the profile's market
+# curve, or a generic intraday curve when no profile is configured.
+VOLUME_PROFILE_PATH = os.environ.get('DASHBOARD_VOLUME_PROFILE')
+SESSION_MINUTES = 390
+MIN_VOLUME_FRACTION = 0.02      # so the first minutes' tiny expectations don't blow up ratios
+
+# Fundamentals (see FUNDAMENTALS CACHE below) only change when a company
+# reports, so they're kept until the symbol's next earnings date instead of
+# on a short TTL, and refetched early once the screener's earningsTimestamp
+# shows a report since the fetch. DASHBOARD_FUNDAMENTALS_MAX_AGE (hours)
+# bounds how stale analyst estimates (forward EPS) and 50-day volume get.
+FUNDAMENTALS_MAX_AGE = float(os.environ.get('DASHBOARD_FUNDAMENTALS_MAX_AGE', 24)) * 3600
+FUNDAMENTALS_SETTLE = 24 * 3600     # Yahoo's figures can lag a report by hours, so entries
+FUNDAMENTALS_SETTLE_TTL = 3600      # fetched within a day of one are rechecked hourly
+FUNDAMENTALS_RETRY = 300            # seconds before a failed fetch is retried
+
+# Co-movement (see CORRELATION below): correlations of intraday returns,
+# taking one bar per new snapshot at most every CORRELATION_BAR_SECONDS of
+# market time, across the CORRELATION_MAX_SYMBOLS most-traded names seen
+# today. Pairs need CORRELATION_MIN_BARS shared bars before they're shown.
+CORRELATION_BAR_SECONDS = int(os.environ.get('DASHBOARD_CORRELATION_BAR', 60))
+CORRELATION_MAX_SYMBOLS = int(os.environ.get('DASHBOARD_CORRELATION_SYMBOLS', 300))
+CORRELATION_MIN_BARS = 10
+CORRELATION_TOP_PAIRS = 15
+CORRELATION_HEATMAP_MAX = 30    # heatmap rows/columns, like TREEMAP_MAX_NODES
+CORRELATION_CLUSTER_MIN = 0.5   # average correlation that groups names into a cluster
+
+# Quote requests ask only for QUOTE_FIELDS (see quote_columns.py) where the
+# endpoint honours a field list; decoding reads only those fields anyway, so
+# caches and tapes hold only what's used.
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept-Encoding': 'gzip, deflate',
 }
 
+log = logging.getLogger('dashboard')
+if not log.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s dashboard: %(message)s'))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
 # Color palette matching the HTML example
 COLORS = {
     'bg_primary': '#0a0e27',
@@ -111,14 +289,28 @@ SYMBOL_TO_SECTOR = {
     for symbol in symbols
 }
 
+# Integer sector codes for the vectorized sector aggregation: code i is
+# SECTOR_NAMES[i], and symbols missing from SECTOR_MAP get OTHER_SECTOR_CODE.
+SECTOR_NAMES = list(SECTOR_MAP) + ['Other']
+OTHER_SECTOR_CODE = len(SECTOR_MAP)
+_SECTOR_SYMBOL_INDEX = pd.Index(list(SYMBOL_TO_SECTOR))
+_SECTOR_SYMBOL_CODES = np.array([SECTOR_NAMES.index(sector) for sector in SYMBOL_TO_SECTOR.values()],
+                                dtype=np.intp)
+
+# Exchange timezone for market hours and timestamps (stdlib zoneinfo rather
+# than pytz, which is one less import at startup).
+EASTERN = ZoneInfo('America/New_York')
+
 # ============================================================================
 # CUSTOM CSS - Polished dark theme with animations
 # ============================================================================
 
-def inject_custom_css():
-    """Inject comprehensive custom CSS for polished TV display"""
-    st.markdown("""
-<style>
+# The stylesheet is BASE_CSS (layout, colors, typography) plus either
+# EFFECTS_CSS (blur, hover transitions and continuous animations) or, in
+# low-power mode, LOW_POWER_CSS: no blur, no transitions or animated
+# pseudo-elements, and a burn-in shift that is a single stepped transform on
+# one element, so the compositor handles it without repainting.
+BASE_CSS = """
     /* ========== IMPORTS ========== */
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap');
     
@@ -156,74 +348,14 @@ def inject_custom_css():
         max-width: 100% !important;
     }
     
-    /* ========== ANIMATIONS ========== */
-    @keyframes shimmer {
-        0% { background-position: 0% 50%; }
-        100% { background-position: 200% 50%; }
-    }
-    
-    @keyframes scan {
-        0% { transform: translateX(-100%); }
-        100% { transform: translateX(100%); }
-    }
-    
-    @keyframes pulse {
-        0%, 100% { opacity: 1; }
-        50% { opacity: 0.7; }
-    }
-    
-    @keyframes borderGlow {
-        0%, 100% { 
-            border-color: rgba(102, 126, 234, 0.5);
-            box-shadow: 0 0 15px rgba(102, 126, 234, 0.2);
-        }
-        50% { 
-            border-color: rgba(118, 75, 162, 0.8);
-            box-shadow: 0 0 25px rgba(118, 75, 162, 0.4);
-        }
-    }
-    
-    @keyframes subtleShift {
-        0%, 100% { transform: translate(0, 0); }
-        25% { transform: translate(1px, 1px); }
-        50% { transform: translate(0, 2px); }
-        75% { transform: translate(-1px, 1px); }
-    }
-    
     /* ========== METRIC CARDS ========== */
     div[data-testid="stMetric"] {
         background: linear-gradient(145deg, rgba(30, 30, 46, 0.9), rgba(42, 42, 62, 0.9));
-        backdrop-filter: blur(10px);
-        -webkit-backdrop-filter: blur(10px);
         border: 1px solid var(--border);
         border-radius: 12px;
         padding: 16px 20px;
         position: relative;
         overflow: hidden;
-        transition: all 0.3s ease;
-    }
-    
-    div[data-testid="stMetric"]:hover {
-        transform: translateY(-3px);
-        background: linear-gradient(145deg, rgba(35, 35, 55, 0.95), rgba(50, 50, 70, 0.95));
-        box-shadow: 0 10px 30px rgba(0, 212, 255, 0.15);
-        border-color: rgba(0, 212, 255, 0.3);
-    }
-    
-    /* Scanning animation ONLY for intraday indicators section */
-    .intraday-section div[data-testid="stMetric"] {
-        animation: subtleShift 300s ease-in-out infinite;
-    }
-    
-    .intraday-section div[data-testid="stMetric"]::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 2px;
-        background: linear-gradient(90deg, transparent, var(--accent), transparent);
-        animation: scan 3s linear infinite;
     }
     
     /* Metric labels */
@@ -265,7 +397,6 @@ def inject_custom_css():
         -webkit-background-clip: text;
         background-clip: text;
         -webkit-text-fill-color: transparent;
-        animation: shimmer 3s linear infinite;
     }
     
     .section-header {
@@ -284,7 +415,6 @@ def inject_custom_css():
         border-radius: 20px;
         font-size: 0.9rem;
         font-weight: 600;
-        animation: pulse 2s infinite;
         white-space: nowrap;
     }
     
@@ -309,7 +439,6 @@ def inject_custom_css():
     /* ========== DATA TABLES ========== */
     div[data-testid="stDataFrame"] {
         background: var(--bg-card);
-        backdrop-filter: blur(10px);
         border: 1px solid var(--border);
         border-radius: 12px;
         overflow: hidden;
@@ -334,12 +463,6 @@ def inject_custom_css():
         border-radius: 10px;
         padding: 15px;
         text-align: center;
-        transition: all 0.3s ease;
-    }
-    
-    .sector-card:hover {
-        transform: translateY(-2px);
-        border-color: rgba(0, 212, 255, 0.4);
     }
     
     .sector-name {
@@ -390,6 +513,22 @@ def inject_custom_css():
         font-size: 0.85rem;
     }
     
+    /* ========== ALERT BANNER ========== */
+    .alert-banner {
+        background: rgba(255, 165, 0, 0.08);
+        border: 1px solid rgba(255, 165, 0, 0.35);
+        border-radius: 10px;
+        padding: 8px 14px;
+        margin-bottom: 12px;
+        font-size: 0.9rem;
+        color: var(--text-primary);
+    }
+
+    .alert-row { padding: 2px 0; }
+    .alert-row.positive strong { color: var(--positive); }
+    .alert-row.negative strong { color: var(--negative); }
+    .alert-time { color: var(--text-secondary); font-size: 0.8rem; }
+
     /* ========== TIMESTAMP ========== */
     .last-updated {
         text-align: center;
@@ -403,7 +542,6 @@ def inject_custom_css():
     /* ========== PLOTLY CHART CONTAINERS ========== */
     div[data-testid="stPlotlyChart"] {
         background: var(--bg-card);
-        backdrop-filter: blur(10px);
         border: 1px solid var(--border);
         border-radius: 12px;
         padding: 10px;
@@ -417,23 +555,125 @@ def inject_custom_css():
         }
         .section-header { font-size: 1.4rem; }
     }
+"""
+
+EFFECTS_CSS = """
+    /* ========== ANIMATIONS ========== */
+    @keyframes shimmer {
+        0% { background-position: 0% 50%; }
+        100% { background-position: 200% 50%; }
+    }
+    
+    @keyframes scan {
+        0% { transform: translateX(-100%); }
+        100% { transform: translateX(100%); }
+    }
+    
+    @keyframes pulse {
+        0%, 100% { opacity: 1; }
+        50% { opacity: 0.7; }
+    }
+    
+    @keyframes borderGlow {
+        0%, 100% { 
+            border-color: rgba(102, 126, 234, 0.5);
+            box-shadow: 0 0 15px rgba(102, 126, 234, 0.2);
+        }
+        50% { 
+            border-color: rgba(118, 75, 162, 0.8);
+            box-shadow: 0 0 25px rgba(118, 75, 162, 0.4);
+        }
+    }
+    
+    @keyframes subtleShift {
+        0%, 100% { transform: translate(0, 0); }
+        25% { transform: translate(1px, 1px); }
+        50% { transform: translate(0, 2px); }
+        75% { transform: translate(-1px, 1px); }
+    }
+    
+    /* ========== METRIC CARDS ========== */
+    div[data-testid="stMetric"] {
+        backdrop-filter: blur(10px);
+        -webkit-backdrop-filter: blur(10px);
+        transition: all 0.3s ease;
+    }
+    
+    div[data-testid="stMetric"]:hover {
+        transform: translateY(-3px);
+        background: linear-gradient(145deg, rgba(35, 35, 55, 0.95), rgba(50, 50, 70, 0.95));
+        box-shadow: 0 10px 30px rgba(0, 212, 255, 0.15);
+        border-color: rgba(0, 212, 255, 0.3);
+    }
+    
+    /* Scanning animation ONLY for intraday indicators section */
+    .intraday-section div[data-testid="stMetric"] {
+        animation: subtleShift 300s ease-in-out infinite;
+    }
+    
+    .intraday-section div[data-testid="stMetric"]::before {
+        content: '';
+        position: absolute;
+        top: 0;
+        left: 0;
+        right: 0;
+        height: 2px;
+        background: linear-gradient(90deg, transparent, var(--accent), transparent);
+        animation: scan 3s linear infinite;
+    }
+    
+    /* ========== HEADERS ========== */
+    .main-title { animation: shimmer 3s linear infinite; }
+    
+    .market-badge { animation: pulse 2s infinite; }
+    
+    /* ========== GLASS PANELS ========== */
+    div[data-testid="stDataFrame"], div[data-testid="stPlotlyChart"] {
+        backdrop-filter: blur(10px);
+    }
+    
+    /* ========== SECTOR CARDS ========== */
+    .sector-card { transition: all 0.3s ease; }
+    
+    .sector-card:hover {
+        transform: translateY(-2px);
+        border-color: rgba(0, 212, 255, 0.4);
+    }
     
     /* ========== BURN-IN PREVENTION ========== */
     .dashboard-wrapper {
         animation: subtleShift 300s ease-in-out infinite;
     }
-</style>
-""", unsafe_allow_html=True)
+"""
+
+LOW_POWER_CSS = """
+    /* ========== BURN-IN PREVENTION (LOW POWER) ========== */
+    @keyframes burnInShift {
+        0%, 100% { transform: translate(0, 0); }
+        25% { transform: translate(1px, 1px); }
+        50% { transform: translate(0, 2px); }
+        75% { transform: translate(-1px, 1px); }
+    }
+
+    [data-testid="stMainBlockContainer"], .main .block-container {
+        animation: burnInShift 300s steps(1, end) infinite;
+    }
+"""
+
+
+def inject_custom_css(low_power: bool = False):
+    """Inject the custom CSS for TV display; low_power swaps the effects for LOW_POWER_CSS"""
+    st.markdown("<style>" + BASE_CSS + (LOW_POWER_CSS if low_power else EFFECTS_CSS) + "</style>",
+                unsafe_allow_html=True)
 
 
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
-def is_market_open() -> bool:
-    """Check if US stock market is currently open"""
-    et = pytz.timezone('US/Eastern')
-    now = datetime.now(et)
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """Check if US stock market is open now (or at ``now``, in Eastern time)"""
+    now = now or datetime.now(EASTERN)
     if now.weekday() >= 5:
         return False
     market_open = dt_time(9, 30)
@@ -508,46 +748,484 @@ def get_sector_for_symbol(symbol: str, info: Dict = None) -> str:
     return 'Other'
 
 
+# ============================================================================
+# REQUEST SCHEDULER
+# ============================================================================
+
+class DeadlineExceeded(Exception):
+    """A scheduled request was still queued at its deadline and was not sent."""
+
+
+class RequestScheduler:
+    """Process-wide admission control for outbound requests.
+
+    ``run(endpoint, priority, fn, deadline)`` waits for a grant and then
+    calls fn (which makes one upstream request) in the caller's thread.
+    Grants come from a token bucket refilled at ``rate`` per second up to
+    ``burst``, in (priority, arrival) order: the first waiter whose
+    endpoint is under its concurrency cap gets the next token, so a capped
+    endpoint doesn't hold up others, but lower priorities never jump ahead
+    of a higher one that could run. Non-snapshot requests also leave
+    ``reserve`` tokens in the bucket. A request still waiting at its
+    deadline (seconds from now) is dropped with DeadlineExceeded rather
+    than sent late.
+    """
+
+    def __init__(self, rate: float, burst: int, reserve: int, caps: Dict[str, int]):
+        # Non-snapshot requests need reserve + 1 tokens, which the bucket
+        # only holds if reserve < burst; otherwise they would starve silently.
+        if burst < 1 or reserve >= burst:
+            effective_burst = max(1, burst)
+            effective_reserve = min(max(0, reserve), effective_burst - 1)
+            log.warning("request scheduler: burst %s with reserve %s would starve non-snapshot requests; "
+                        "using burst %s, reserve %s", burst, reserve, effective_burst, effective_reserve)
+            burst, reserve = effective_burst, effective_reserve
+        log.info("request scheduler: %g requests/s, burst %s, snapshot reserve %s, concurrency %s",
+                 rate, burst, reserve, caps)
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve
+        self.caps = caps
+        self._cond = threading.Condition()
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._waiting: List[Tuple[int, int, str]] = []     # (priority, seq, endpoint), kept sorted
+        self._seq = 0
+        self._active: Dict[str, int] = {}
+        self.granted = [0] * len(PRIORITY_NAMES)
+        self.cancelled = [0] * len(PRIORITY_NAMES)
+        self.waited = [0.0] * len(PRIORITY_NAMES)
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _next(self) -> Optional[Tuple[int, int, str]]:
+        """The waiter that gets the next token: first in order whose endpoint is under its cap."""
+        for waiter in self._waiting:
+            if self._active.get(waiter[2], 0) < self.caps.get(waiter[2], 1):
+                return waiter
+        return None
+
+    def _acquire(self, endpoint: str, priority: int, deadline: Optional[float]):
+        started = time.monotonic()
+        with self._cond:
+            self._seq += 1
+            waiter = (priority, self._seq, endpoint)
+            bisect.insort(self._waiting, waiter)
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                floor = 1 + (self.reserve if priority > PRIORITY_SNAPSHOT else 0)
+                if self._next() == waiter and self._tokens >= floor:
+                    self._waiting.remove(waiter)
+                    self._tokens -= 1
+                    self._active[endpoint] = self._active.get(endpoint, 0) + 1
+                    self.granted[priority] += 1
+                    self.waited[priority] += now - started
+                    self._cond.notify_all()
+                    return
+                remaining = None if deadline is None else started + deadline - now
+                if remaining is not None and remaining <= 0:
+                    self._waiting.remove(waiter)
+                    self.cancelled[priority] += 1
+                    self._cond.notify_all()
+                    log.warning("%s request (%s) dropped after waiting %gs", endpoint, PRIORITY_NAMES[priority],
+                                deadline)
+                    raise DeadlineExceeded(f"{endpoint} request queued past its {deadline:g}s deadline")
+                # Only the next waiter, short of tokens, needs to wake for the refill;
+                # anyone else waits for a grant or release (both notify) or the deadline.
+                timeout = None
+                if self._next() == waiter and self.rate > 0:
+                    timeout = (floor - self._tokens) / self.rate
+                if remaining is not None:
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+                self._cond.wait(timeout if timeout is None else max(timeout, 0.001))
+
+    def _release(self, endpoint: str):
+        with self._cond:
+            self._active[endpoint] -= 1
+            self._cond.notify_all()
+
+    def run(self, endpoint: str, priority: int, fn, deadline: Optional[float] = None):
+        """Call fn() once granted; raises DeadlineExceeded if not granted within deadline seconds."""
+        self._acquire(endpoint, priority, deadline)
+        try:
+            return fn()
+        finally:
+            self._release(endpoint)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                'tokens': round(self._tokens, 2),
+                'waiting': len(self._waiting),
+                'active': dict(self._active),
+                **{name: {'granted': self.granted[p], 'cancelled': self.cancelled[p],
+                          'avg_wait': round(self.waited[p] / self.granted[p], 3) if self.granted[p] else 0.0}
+                   for p, name in enumerate(PRIORITY_NAMES)},
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_request_scheduler() -> RequestScheduler:
+    """The process-wide outbound request scheduler."""
+    return RequestScheduler(UPSTREAM_RATE, UPSTREAM_BURST, UPSTREAM_RESERVE, UPSTREAM_CONCURRENCY)
+
+
+# ============================================================================
+# CIRCUIT BREAKERS
+# ============================================================================
+
+class CircuitOpen(Exception):
+    """The endpoint's circuit is open (or probing), so the request was not sent."""
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        from email.utils import parsedate_to_datetime
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(ZoneInfo('UTC'))).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), CIRCUIT_MAX_RETRY_AFTER)
+
+
+def response_failure(response) -> Optional[Tuple[str, Optional[float], bool]]:
+    """(reason, retry after, trip now) if an HTTP response counts against the circuit, else None.
+
+    Throttling (429) trips the circuit at once; auth errors (401/403, e.g.
+    an expired crumb) and 5xx count as failures. Other statuses are the
+    request's own problem.
+    """
+    status = response.status_code
+    if status == 429 or status in (401, 403) or status >= 500:
+        return f"HTTP {status}", retry_after_seconds(response.headers.get('Retry-After')), status == 429
+    return None
+
+
+def exception_failure(error: Exception) -> Tuple[str, Optional[float], bool]:
+    """(reason, retry after, trip now) for a request that raised."""
+    response = getattr(error, 'response', None)
+    if response is not None and getattr(response, 'status_code', None) is not None:
+        failure = response_failure(response)
+        if failure is not None:
+            return failure
+    # yfinance raises YFRateLimitError on a 429 without exposing the response.
+    throttled = type(error).__name__ == 'YFRateLimitError'
+    return (f"{type(error).__name__}: {error}" if str(error) else type(error).__name__), None, throttled
+
+
+class _Flight:
+    """One in-flight request that other callers with the same key wait on."""
+
+    __slots__ = ('done', 'result', 'error', 'generation')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.generation = 0     # the breaker's trip count when this request was admitted
+
+
+class CircuitBreaker:
+    """Process-wide circuit breaker and single-flight gate for one upstream endpoint.
+
+    ``call(key, fn, failed)`` runs fn() unless the circuit is open, in
+    which case it raises CircuitOpen without sending anything. Concurrent
+    calls with the same key share one request: the first caller makes it
+    and the rest wait for its result (or exception). States:
+
+    - closed: requests flow; CIRCUIT_FAILURES consecutive failures, or one
+      that asks to trip (a 429), open the circuit
+    - open: calls fail fast until the cool-down ends: the response's
+      Retry-After if given, else CIRCUIT_COOLDOWN doubled per consecutive
+      trip, up to CIRCUIT_MAX_COOLDOWN
+    - half-open: one probe request goes through (others still fail fast);
+      success closes the circuit, failure opens it again for longer
+
+    ``failed(result)`` classifies a returned result (see response_failure);
+    exceptions are classified by exception_failure. DeadlineExceeded from
+    the scheduler isn't the upstream's fault and doesn't count, and neither
+    does an interrupted call (a BaseException such as KeyboardInterrupt). Nor does a
+    request admitted before the circuit last opened: a slow success that
+    lands after a concurrent 429 must not cut the cool-down short.
+    """
+
+    def __init__(self, endpoint: str, threshold: int = CIRCUIT_FAILURES, cooldown: float = CIRCUIT_COOLDOWN,
+                 max_cooldown: float = CIRCUIT_MAX_COOLDOWN):
+        self.endpoint = endpoint
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        self._inflight: Dict[object, _Flight] = {}
+        self._probe: Optional[_Flight] = None
+        self.state = 'closed'
+        self.failures = 0
+        self.trips = 0
+        self.generation = 0     # times opened; stamps each admitted request
+        self.open_until = 0.0
+        self.last_failure: Optional[str] = None
+        self.rejected = 0
+        self.shared = 0
+
+    def describe(self) -> Optional[str]:
+        """Circuit state for diagnostics; None while closed with no recent failures."""
+        with self._lock:
+            return self._describe(time.time())
+
+    def _describe(self, now: float) -> Optional[str]:
+        cause = f" after {self.last_failure}" if self.last_failure else ""
+        if self.state == 'open':
+            if now < self.open_until:
+                return f"{self.endpoint} circuit open{cause}, retrying in {self.open_until - now:.0f}s"
+            return f"{self.endpoint} circuit open{cause}, probing on the next request"
+        if self.state == 'half-open':
+            return f"{self.endpoint} circuit half-open{cause}, probe in flight"
+        if self.failures:
+            return f"{self.endpoint} circuit closed, {self.failures} of {self.threshold} failures"
+        return None
+
+    def _admit(self, now: float, flight: _Flight):
+        """Let a new request through or raise CircuitOpen. Caller holds the lock."""
+        if self.state == 'open' and now >= self.open_until:
+            self.state = 'half-open'
+        elif self.state == 'open' or (self.state == 'half-open' and self._probe is not None):
+            self.rejected += 1
+            raise CircuitOpen(self._describe(now))
+        if self.state == 'half-open':
+            self._probe = flight
+        flight.generation = self.generation
+
+    def _record(self, flight: _Flight, failure: Optional[Tuple[str, Optional[float], bool]]):
+        """Update the state after a request. Caller holds the lock.
+
+        Only the half-open probe or a request admitted since the circuit
+        last opened counts; anything older is stale and ignored.
+        """
+        if self._probe is not flight and flight.generation != self.generation:
+            return
+        if failure is None:
+            self.state, self.failures, self.trips, self.last_failure = 'closed', 0, 0, None
+            return
+        reason, retry_after, trip = failure
+        self.failures += 1
+        self.last_failure = reason
+        if trip or self.state == 'half-open' or self.failures >= self.threshold:
+            self.trips += 1
+            self.generation += 1
+            wait = retry_after if retry_after is not None else min(
+                self.max_cooldown, self.cooldown * 2 ** (self.trips - 1))
+            self.state, self.open_until = 'open', time.time() + wait
+            log.warning("%s circuit opened for %.0fs after %s", self.endpoint, wait, reason)
+
+    def call(self, key, fn, failed=None):
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._admit(time.time(), flight)
+                self._inflight[key] = flight
+            else:
+                self.shared += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        failure = None
+        try:
+            flight.result = fn()
+            failure = failed(flight.result) if failed is not None else None
+            return flight.result
+        except DeadlineExceeded as e:
+            flight.error = e
+            failure = False
+            raise
+        except Exception as e:
+            flight.error = e
+            failure = exception_failure(e)
+            raise
+        except BaseException as e:
+            # Interrupted (KeyboardInterrupt, a script rerun or stop): neither
+            # a success nor the upstream's fault. Waiters get an ordinary
+            # error rather than another thread's control-flow exception.
+            flight.error = RuntimeError(f"shared {self.endpoint} request was interrupted ({type(e).__name__})")
+            failure = False
+            raise
+        finally:
+            with self._lock:
+                if failure is not False:
+                    self._record(flight, failure)
+                elif self._probe is flight:
+                    self.state = 'open'     # the probe didn't complete; let the next caller probe
+                if self._probe is flight:
+                    self._probe = None
+                del self._inflight[key]
+            flight.done.set()
+
+
+@st.cache_resource(show_spinner=False)
+def get_circuit_breaker(endpoint: str) -> CircuitBreaker:
+    """The process-wide circuit breaker for one upstream endpoint."""
+    return CircuitBreaker(endpoint)
+
+
+def circuit_diagnostic(endpoint: str, error: str) -> str:
+    """error for last_error, with the endpoint's circuit state appended when it isn't already in it."""
+    state = get_circuit_breaker(endpoint).describe()
+    return f"{error}; {state}" if state and state not in error else error
+
+
 # ============================================================================
 # DATA FETCHING FUNCTIONS
 # ============================================================================
 
+def transfer_bytes(response) -> Tuple[int, int]:
+    """(bytes on the wire, decoded bytes) of a fully read response"""
+    decoded = len(response.content)
+    try:
+        wire = response.raw.tell()   # counts compressed bytes read from the socket
+    except Exception:
+        wire = decoded
+    return wire or decoded, decoded
+
+
+def log_transfer(endpoint: str, quotes: int, wire: int, decoded: int, seconds: float):
+    log.info("%s: %d quotes, %.1f KiB received (%.1f KiB decoded, %.0f%%) in %.2fs",
+             endpoint, quotes, wire / 1024, decoded / 1024, 100 * wire / decoded if decoded else 100, seconds)
+
+
 @st.cache_data(ttl=60, show_spinner=False)
-def get_most_active_stocks(count: int = 90) -> List[Dict]:
+def get_most_active_stocks(count: int = 90) -> QuoteColumns:
     """Fetch most active stocks from Yahoo Finance screener.
 
     The endpoint is undocumented and prone to transient 401/429/5xx
-    responses, so retry a few times with exponential backoff and record
-    the failure reason in last_error so the caller can show a diagnostic.
+    responses. Rather than retrying in the render, failures feed the
+    screener's shared circuit breaker, which backs every session off
+    together; concurrent fetches share one request. The failure reason and
+    circuit state go to last_error so the caller can show a diagnostic.
     """
+    import requests
+
     url = "https://query1.finance.yahoo.com/v1/finance/screener/predefined/saved"
-    params = {'scrIds': 'most_actives', 'start': 0, 'count': count}
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+    params = {'scrIds': 'most_actives', 'start': 0, 'count': count, 'fields': ','.join(QUOTE_FIELDS)}
 
-    last_error = None
-    for attempt in range(3):
-        try:
-            response = requests.get(url, params=params, headers=headers, timeout=15)
-            if response.status_code == 200:
-                quotes = response.json()['finance']['result'][0]['quotes']
-                st.session_state['last_error'] = None
-                return quotes
-            last_error = f"HTTP {response.status_code} from Yahoo screener"
-        except Exception as e:
-            last_error = f"API Error: {str(e)}"
-        if attempt < 2:
-            time.sleep(2 ** attempt)  # 1s, 2s
+    def fetch():
+        started = time.perf_counter()
+        response = get_request_scheduler().run(
+            'screener', PRIORITY_SNAPSHOT, deadline=15,
+            fn=lambda: requests.get(url, params=params, headers=REQUEST_HEADERS, timeout=15))
+        if response.status_code != 200:
+            return response, None
+        quotes = QuoteColumns.from_json(response.content, ('finance', 'result', 0, 'quotes'))
+        log_transfer('screener', len(quotes), *transfer_bytes(response), time.perf_counter() - started)
+        recorder = get_tape_recorder()
+        if recorder is not None:
+            recorder.append('screener', count, quotes.records())
+        return response, quotes
 
-    st.session_state['last_error'] = last_error
-    return []
+    try:
+        response, quotes = get_circuit_breaker('screener').call(
+            count, fetch, failed=lambda result: response_failure(result[0]))
+        if quotes is not None:
+            st.session_state['last_error'] = None
+            return quotes
+        error = f"HTTP {response.status_code} from Yahoo screener"
+    except (CircuitOpen, DeadlineExceeded) as e:
+        error = str(e)
+    except Exception as e:
+        error = f"API Error: {str(e)}"
 
+    st.session_state['last_error'] = circuit_diagnostic('screener', error)
+    return QuoteColumns.empty()
 
-@st.cache_data(ttl=300, show_spinner=False)
-def get_financial_data(symbol: str) -> Optional[Dict]:
-    """Fetch detailed financial data for a stock using yfinance"""
-    try:
+
+def _fetch_quote_batch(session, symbols: List[str]) -> Tuple[QuoteColumns, Optional[str], Tuple[int, int]]:
+    """Fetch one batch from the multi-symbol quote endpoint, through the quote circuit breaker.
+
+    Returns (quotes, error, (wire bytes, decoded bytes)).
+    """
+    url = "https://query1.finance.yahoo.com/v7/finance/quote"
+    params = {'symbols': ','.join(symbols), 'fields': ','.join(QUOTE_FIELDS)}
+
+    def fetch():
+        response = get_request_scheduler().run(
+            'quote', PRIORITY_SNAPSHOT, deadline=30, fn=lambda: session.get(url, params=params, timeout=15))
+        if response.status_code != 200:
+            return response, None, (0, 0)
+        return response, QuoteColumns.from_json(response.content, ('quoteResponse', 'result')), transfer_bytes(response)
+
+    try:
+        response, quotes, size = get_circuit_breaker('quote').call(
+            tuple(symbols), fetch, failed=lambda result: response_failure(result[0]))
+        if quotes is not None:
+            return quotes, None, size
+        error = f"HTTP {response.status_code} from Yahoo quote"
+    except (CircuitOpen, DeadlineExceeded) as e:
+        error = str(e)
+    except Exception as e:
+        error = f"API Error: {str(e)}"
+    return QuoteColumns.empty(), error, (0, 0)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_watchlist_quotes(symbols: Tuple[str, ...]) -> QuoteColumns:
+    """Fetch quotes for a watchlist in chunked, concurrent batches.
+
+    Each request asks for QUOTE_BATCH_SIZE symbols, so a 2,000-symbol list
+    is ten requests, run QUOTE_BATCH_WORKERS at a time over one pooled
+    session. Quotes use the screener's field names, so they flow through
+    the same DataFrame and calculations. A failed batch leaves a partial
+    result and a diagnostic in last_error.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    batches = [list(symbols[i:i + QUOTE_BATCH_SIZE]) for i in range(0, len(symbols), QUOTE_BATCH_SIZE)]
+    session = requests.Session()
+    session.headers.update(REQUEST_HEADERS)
+    session.mount('https://', HTTPAdapter(pool_maxsize=QUOTE_BATCH_WORKERS))
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=QUOTE_BATCH_WORKERS) as pool:
+            results = list(pool.map(lambda batch: _fetch_quote_batch(session, batch), batches))
+    finally:
+        session.close()
+
+    quotes = QuoteColumns.concat([batch_quotes for batch_quotes, _, _ in results])
+    errors = [error for _, error, _ in results if error]
+    log_transfer(f"quote ({len(batches)} batches)", len(quotes), sum(size[0] for _, _, size in results),
+                 sum(size[1] for _, _, size in results), time.perf_counter() - started)
+    st.session_state['last_error'] = circuit_diagnostic(
+        'quote', f"{len(errors)} of {len(batches)} quote batches failed: {errors[0]}") if errors else None
+    # Rank by volume like the screener, so "the first N" means the same thing.
+    return quotes[np.argsort(-quotes['Volume'], kind='stable')]
+
+
+def get_financial_data(symbol: str, priority: int = PRIORITY_VISIBLE) -> Optional[Dict]:
+    """Fetch detailed financial data for a stock using yfinance (cached by FundamentalsCache)
+
+    Scheduled at priority; a visible fetch waits up to 30s for its turn,
+    a background refresh 10s. While the fundamentals circuit is open this
+    returns None without sending a request.
+    """
+    import yfinance as yf
+
+    try:
         stock = yf.Ticker(symbol)
-        info = stock.info
+        info = get_circuit_breaker('fundamentals').call(symbol, lambda: get_request_scheduler().run(
+            'fundamentals', priority, lambda: stock.info, deadline=30 if priority <= PRIORITY_VISIBLE else 10))
+        fetched_at = time.time()
         
         # Revenue growth
         revenue_growth = None
@@ -567,7 +1245,7 @@ def get_financial_data(symbol: str) -> Optional[Dict]:
             if yoy_earnings is not None:
                 eps_growth = yoy_earnings * 100
         
-        return {
+        financial_data = {
             'revenue_growth': revenue_growth,
             'eps_growth': eps_growth,
             'avg_volume_50d': info.get('averageVolume', 0),
@@ -579,151 +1257,1770 @@ def get_financial_data(symbol: str) -> Optional[Dict]:
             'fifty_two_week_high': info.get('fiftyTwoWeekHigh', 0),
             'fifty_two_week_low': info.get('fiftyTwoWeekLow', 0),
         }
+
+        # Latest and upcoming earnings reports (epoch seconds, None if
+        # unknown); earningsTimestampStart is the start of the expected
+        # window when the date isn't confirmed yet.
+        reports = sorted({int(t) for t in (info.get('earningsTimestamp'), info.get('earningsTimestampStart'),
+                                           info.get('earningsTimestampEnd')) if t})
+        financial_data['last_earnings'] = max((t for t in reports if t <= fetched_at), default=None)
+        financial_data['next_earnings'] = min((t for t in reports if t > fetched_at), default=None)
     except Exception:
         return None
 
+    recorder = get_tape_recorder()
+    if recorder is not None and TAPE_RECORD_FUNDAMENTALS:
+        recorder.append('fundamentals', symbol, financial_data)
+    return financial_data
+
+
+def quotes_frame(quotes: List[Dict]) -> pd.DataFrame:
+    """Convert Yahoo-style quote records (e.g. from a tape) to the dashboard's quote DataFrame"""
+    return QuoteColumns.from_records(quotes).frame()
+
+
+def sector_codes(symbols: np.ndarray) -> np.ndarray:
+    """Map symbols to integer sector codes with one hash-join instead of a per-row lookup"""
+    positions = _SECTOR_SYMBOL_INDEX.get_indexer(symbols)
+    return np.where(positions >= 0, _SECTOR_SYMBOL_CODES[positions], OTHER_SECTOR_CODE)
+
+
+def sector_inputs(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Kernel columns for analytics.sector_aggregates"""
+    return {
+        'codes': sector_codes(df['Symbol'].to_numpy()),
+        'change': df['Change (%)'].to_numpy(dtype=np.float64),
+        'volume': df['Volume'].to_numpy(dtype=np.float64),
+        'market_cap': (df['Market Cap'].to_numpy(dtype=np.float64) if 'Market Cap' in df.columns
+                       else np.full(len(df), np.nan)),
+    }
+
+
+def sector_frame(df: pd.DataFrame, aggregates: Dict) -> pd.DataFrame:
+    """Sector performance frame from analytics.sector_aggregates output"""
+    present = aggregates['present']
+    count = aggregates['count'][present]
+    symbols = df['Symbol'].to_numpy()
+    sector_stats = pd.DataFrame({
+        'Sector': np.array(SECTOR_NAMES, dtype=object)[present],
+        'Avg Change': np.divide(aggregates['change_sum'][present], count,
+                                out=np.full(len(present), np.nan), where=count > 0),
+        'Count': count,
+        'Total Volume': aggregates['volume_sum'][present],
+        'Top Stocks': [symbols[rows].tolist() for rows in aggregates['top_rows']],
+        'Cap-Weighted Change': aggregates['cap_weighted'][present],
+        'Volume-Weighted Change': aggregates['volume_weighted'][present],
+    })
+    return sector_stats.sort_values('Avg Change', ascending=False, ignore_index=True)
+
+
+def calculate_sector_performance(df: pd.DataFrame, top_n: int = 3) -> pd.DataFrame:
+    """Calculate performance metrics by sector.
+
+    Works on integer sector codes (see analytics.sector_aggregates). Alongside
+    the equal-weighted mean, returns market-cap-weighted and volume-weighted
+    sector returns (NaN when the weights aren't available).
+    """
+    if df.empty:
+        return pd.DataFrame()
+    return sector_frame(df, analytics.sector_aggregates(**sector_inputs(df), n=len(SECTOR_NAMES), top_n=top_n))
+
+
+def breadth_inputs(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Kernel columns for analytics.breadth; missing columns become NaN"""
+    def column(name, available=True):
+        if available and name in df.columns:
+            return df[name].to_numpy(dtype=np.float64)
+        return np.full(len(df), np.nan)
+    # Highs/lows are only counted when the full 52-week range is present.
+    has_range = {'52W High', '52W Low', 'Price'}.issubset(df.columns)
+    return {
+        'change': column('Change (%)'),
+        'price': column('Price'),
+        'high': column('52W High', has_range),
+        'low': column('52W Low', has_range),
+        'volume': column('Volume'),
+        # Time-of-day normalized when the frame carries it (see with_expected_volume).
+        'avg_volume': column('Expected Volume' if 'Expected Volume' in df.columns else 'Avg Volume'),
+    }
+
+
+def calculate_breadth_indicators(df: pd.DataFrame) -> Dict:
+    """Calculate market breadth indicators (see analytics.breadth)"""
+    if df.empty:
+        return {}
+    return analytics.breadth(**breadth_inputs(df))
+
+
+def screen_growth_stocks(stocks_data: QuoteColumns, config: Dict) -> List[Dict]:
+    """Screen stocks for growth criteria"""
+    growth_stocks = []
+    biotech_keywords = ['biotech', 'pharmaceutical', 'drug manufacturers', 'biopharm', 'therapeutics']
+    
+    # Limit to avoid too many API calls
+    stocks = stocks_data[:35]
+    fundamentals = get_fundamentals_cache()
+    fetches, reported = fundamentals.fetches, fundamentals.reported
+    for i, symbol in enumerate(stocks['Symbol']):
+        price = float(stocks['Price'][i])
+        
+        if price < config['growth_min_price']:
+            continue
+        
+        financial_data = fetch_fundamentals(symbol, int(stocks['Earnings Time'][i]))
+        if not financial_data:
+            continue
+        
+        criteria_met = 0
+        
+        # Revenue growth
+        revenue_growth = financial_data.get('revenue_growth')
+        if revenue_growth is not None and revenue_growth >= config['growth_revenue_threshold']:
+            criteria_met += 1
+        
+        # EPS growth
+        eps_growth = financial_data.get('eps_growth')
+        if eps_growth is not None and eps_growth >= config['growth_eps_threshold']:
+            criteria_met += 1
+        
+        # Volume
+        if financial_data.get('avg_volume_50d', 0) >= config['growth_min_volume']:
+            criteria_met += 1
+        
+        # Industry check
+        industry = financial_data.get('industry', '').lower()
+        if config['exclude_biotech']:
+            if not any(kw in industry for kw in biotech_keywords):
+                criteria_met += 1
+        else:
+            criteria_met += 1
+        
+        if criteria_met == 4:
+            growth_stocks.append({
+                'Symbol': symbol,
+                'Name': stocks['Name'][i],
+                'Price': price,
+                'Change (%)': float(stocks['Change (%)'][i]),
+                'Volume': int(stocks['Volume'][i]),
+                'Revenue Growth (%)': revenue_growth,
+                'EPS Growth (%)': eps_growth,
+                'Sector': financial_data.get('sector', 'Unknown'),
+            })
+
+    log.info("growth screen: %d symbols, %d fundamentals requests (%d after earnings)", len(stocks),
+             fundamentals.fetches - fetches, fundamentals.reported - reported)
+    return growth_stocks
+
+
+# ============================================================================
+# STREAMING QUOTES
+# ============================================================================
+
+# Compact tick keys -> quote table column. A tick is a JSON object such as
+# {"s": "NVDA", "p": 181.2, "c": 2.4, "v": 51234000}; only "s" is required.
+TICK_FIELDS = {
+    'p': 'Price',
+    'c': 'Change (%)',
+    'v': 'Volume',
+}
+
+
+class QuoteTable:
+    """Symbol-indexed, array-backed quote table fed by streaming ticks.
+
+    Every numeric column lives in one preallocated float64 array and each
+    symbol owns a fixed row, so applying a tick is a dict lookup plus an
+    array store rather than a DataFrame mutation. ``version`` increments on
+    every applied batch so readers can tell whether anything changed, and
+    each row records the version that last touched it (see changed_rows).
+    """
+
+    COLUMNS = ('Price', 'Change (%)', 'Volume', 'Avg Volume', '52W High', '52W Low', 'Market Cap',
+               'Prev Close')
+
+    def __init__(self, capacity: int = 256):
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._names: List[str] = []
+        self._col = {name: i for i, name in enumerate(self.COLUMNS)}
+        self._data = np.zeros((len(self.COLUMNS), capacity), dtype=np.float64)
+        self._row_version = np.zeros(capacity, dtype=np.int64)
+        self.version = 0
+        self.ticks_applied = 0
+        self._snapshot: Optional[Tuple[int, pd.DataFrame]] = None
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def _row(self, symbol: str, name: Optional[str] = None) -> int:
+        """Return the row for symbol, allocating one if needed. Caller holds the lock."""
+        row = self._index.get(symbol)
+        if row is not None:
+            return row
+        row = len(self._symbols)
+        if row == self._data.shape[1]:
+            grown = np.zeros((len(self.COLUMNS), row * 2), dtype=np.float64)
+            grown[:, :row] = self._data
+            self._data = grown
+            self._row_version = np.concatenate([self._row_version, np.zeros(row, dtype=np.int64)])
+        self._index[symbol] = row
+        self._symbols.append(symbol)
+        self._names.append(name or symbol)
+        return row
+
+    def seed(self, quotes: QuoteColumns):
+        """Load reference fields from a screener snapshot.
+
+        Symbols not yet in the table get a full row. For symbols already
+        streaming, only the slow-moving reference fields (name, average
+        volume, 52-week range, market cap) are refreshed so live prices aren't rolled
+        back to the older screener values.
+        """
+        with self._lock:
+            first_new = len(self._symbols)
+            rows = np.fromiter((self._row(symbol, name) for symbol, name in zip(quotes['Symbol'], quotes['Name'])),
+                               dtype=np.intp, count=len(quotes))
+            for row, name in zip(rows.tolist(), quotes['Name']):
+                self._names[row] = name
+            for column in ('Avg Volume', '52W High', '52W Low', 'Market Cap'):
+                self._data[self._col[column], rows] = quotes[column]
+            new = rows >= first_new
+            if new.any():
+                price = quotes['Price'][new]
+                change = quotes['Change (%)'][new]
+                self._data[self._col['Price'], rows[new]] = price
+                self._data[self._col['Change (%)'], rows[new]] = change
+                self._data[self._col['Volume'], rows[new]] = quotes['Volume'][new]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    self._data[self._col['Prev Close'], rows[new]] = np.where(
+                        change > -100, price / (1 + change / 100), 0.0)
+            self.version += 1
+            self._row_version[rows] = self.version
+
+    def apply_ticks(self, ticks: List[Dict]) -> int:
+        """Apply a batch of ticks and return how many were applied.
+
+        Ticks carrying a price but no change % get their change derived from
+        the seeded previous close. Within a batch the last tick for a symbol
+        wins.
+        """
+        ticks = [t for t in ticks if t.get('s')]
+        if not ticks:
+            return 0
+        with self._lock:
+            rows = np.fromiter((self._row(t['s']) for t in ticks), dtype=np.intp, count=len(ticks))
+            for key, column in TICK_FIELDS.items():
+                values = np.fromiter((t.get(key, np.nan) for t in ticks), dtype=np.float64, count=len(ticks))
+                present = ~np.isnan(values)
+                if present.any():
+                    self._data[self._col[column], rows[present]] = values[present]
+            derive = np.fromiter(('p' in t and 'c' not in t for t in ticks), dtype=bool, count=len(ticks))
+            if derive.any():
+                drows = rows[derive]
+                prev = self._data[self._col['Prev Close'], drows]
+                price = self._data[self._col['Price'], drows]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    change = np.where(prev > 0, (price / prev - 1) * 100, 0.0)
+                self._data[self._col['Change (%)'], drows] = change
+            self.version += 1
+            self._row_version[rows] = self.version
+            self.ticks_applied += len(ticks)
+        return len(ticks)
+
+    def changed_rows(self, since: int) -> np.ndarray:
+        """Rows (in snapshot order) touched by any batch after version ``since``."""
+        with self._lock:
+            return np.flatnonzero(self._row_version[:len(self._symbols)] > since)
+
+    def snapshot(self) -> Tuple[int, pd.DataFrame]:
+        """Return (version, DataFrame) copied under the lock.
+
+        The frame is built once per version and shared by every caller, so
+        it must be treated as read-only.
+        """
+        with self._lock:
+            if self._snapshot is not None and self._snapshot[0] == self.version:
+                return self._snapshot
+            n = len(self._symbols)
+            data = {name: self._data[i, :n].copy() for i, name in enumerate(self.COLUMNS)
+                    if name != 'Prev Close'}
+            df = pd.DataFrame({'Symbol': list(self._symbols), 'Name': list(self._names), **data})
+            self._snapshot = (self.version, df)
+            return self._snapshot
+
+
+class QuoteStream:
+    """Background websocket subscription that feeds a QuoteTable.
+
+    Runs its own asyncio loop on a daemon thread and reconnects with
+    exponential backoff. Ticks are applied as each message arrives; the UI
+    coalesces them by reading the table once per UI interval.
+    """
+
+    def __init__(self, url: str, table: QuoteTable):
+        self.url = url
+        self.table = table
+        self.connected = False
+        self.messages = 0
+        self.last_tick_time: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.seeded_version: Optional[int] = None   # screener snapshot last seeded
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='quote-stream', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.run(self._consume())
+
+    async def _consume(self):
+        try:
+            import websockets  # optional dependency, only needed for streaming mode
+        except ImportError:
+            self.last_error = "Streaming mode requires the 'websockets' package"
+            return
+
+        backoff = 1
+        while True:
+            try:
+                async with websockets.connect(self.url, max_size=None) as ws:
+                    self.connected = True
+                    self.last_error = None
+                    backoff = 1
+                    async for message in ws:
+                        ticks = json.loads(message)
+                        if isinstance(ticks, dict):
+                            ticks = [ticks]
+                        self.table.apply_ticks(ticks)
+                        self.messages += 1
+                        self.last_tick_time = time.time()
+            except Exception as e:
+                self.last_error = f"Stream Error: {str(e)}"
+            self.connected = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def ticks_per_second(self) -> float:
+        """Average applied tick rate since the stream started."""
+        elapsed = time.monotonic() - self._started
+        return self.table.ticks_applied / elapsed if elapsed > 0 else 0.0
+
+
+@st.cache_resource(show_spinner=False)
+def get_quote_stream(url: str) -> QuoteStream:
+    """One process-wide stream per URL, shared by every session."""
+    return QuoteStream(url, QuoteTable())
+
+
+# ============================================================================
+# MARKET TAPE
+# ============================================================================
+
+class TapeWriter:
+    """Append-only, compressed, time-indexed recording of upstream responses.
+
+    Each record is a JSON object {"t", "kind", "key", "data"} written as its
+    own gzip member, so the tape is a valid .gz stream that can only ever be
+    appended to. A sidecar "<path>.idx" holds one "t offset length kind key"
+    line per record, letting a reader seek by time without decompressing
+    everything before it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, kind: str, key, data, t: Optional[float] = None):
+        t = time.time() if t is None else t
+        payload = gzip.compress(json.dumps({'t': t, 'kind': kind, 'key': key, 'data': data}).encode())
+        with self._lock:
+            with open(self.path, 'ab') as tape, open(self.path + '.idx', 'a') as index:
+                offset = tape.tell()
+                tape.write(payload)
+                index.write(f"{t:.3f} {offset} {len(payload)} {kind} {key}\n")
+
+
+class TapeReader:
+    """Random access to a tape written by TapeWriter, ordered by time."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.times: List[float] = []
+        self.offsets: List[int] = []
+        self.lengths: List[int] = []
+        self.kinds: List[str] = []
+        self.keys: List[str] = []
+        with open(path + '.idx') as index:
+            for line in index:
+                t, offset, length, kind, key = line.split(maxsplit=4)
+                self.times.append(float(t))
+                self.offsets.append(int(offset))
+                self.lengths.append(int(length))
+                self.kinds.append(kind)
+                self.keys.append(key.strip())
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def read(self, i: int) -> Dict:
+        with open(self.path, 'rb') as tape:
+            tape.seek(self.offsets[i])
+            return json.loads(gzip.decompress(tape.read(self.lengths[i])))
+
+
+class TapeReplay:
+    """Feeds a recorded tape back through the dashboard in place of Yahoo.
+
+    With speed > 0 the tape plays against the wall clock at that multiple
+    (1 = real time) and each screener request gets the latest snapshot at
+    the current tape time. With speed 0 every request advances to the next
+    snapshot, as fast as the dashboard asks. Playback loops at the end so
+    long load tests keep a steady workload. Fundamentals are answered from
+    the latest recorded response for the symbol at the current tape time.
+    """
+
+    def __init__(self, path: str, speed: float):
+        self.reader = TapeReader(path)
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._screener = [i for i, kind in enumerate(self.reader.kinds) if kind == 'screener']
+        if not self._screener:
+            raise ValueError(f"Tape {path} contains no screener records")
+        self._fundamentals: Dict[str, List[int]] = {}
+        for i, kind in enumerate(self.reader.kinds):
+            if kind == 'fundamentals':
+                self._fundamentals.setdefault(self.reader.keys[i], []).append(i)
+        # Record times for the lookups, built once (the index is ordered by time).
+        self._screener_times = [self.reader.times[i] for i in self._screener]
+        self._fundamentals_times = {symbol: [self.reader.times[i] for i in records]
+                                    for symbol, records in self._fundamentals.items()}
+        self._start_wall = time.time()
+        self._t0 = self.reader.times[self._screener[0]]
+        self._span = self.reader.times[self._screener[-1]] - self._t0
+        self._step = -1
+        self._position = 0    # index into self._screener last served
+        self._cache: Dict[int, Dict] = {}
+        self._columns: Dict[int, QuoteColumns] = {}
+
+    def _record(self, i: int) -> Dict:
+        """Decoded record i, from a small cache. Caller holds the lock."""
+        record = self._cache.get(i)
+        if record is None:
+            record = self.reader.read(i)
+            if len(self._cache) > 256:
+                self._cache.clear()
+            self._cache[i] = record
+        return record
+
+    def screener(self, count: Optional[int]) -> QuoteColumns:
+        with self._lock:
+            if self.speed > 0:
+                elapsed = (time.time() - self._start_wall) * self.speed
+                tape_time = self._t0 + (elapsed % self._span if self._span > 0 else 0)
+                self._position = max(0, bisect.bisect_right(self._screener_times, tape_time) - 1)
+            else:
+                self._step += 1
+                self._position = self._step % len(self._screener)
+            i = self._screener[self._position]
+            columns = self._columns.get(i)
+            if columns is None:
+                columns = QuoteColumns.from_records(self._record(i)['data'])
+                if len(self._columns) > 256:
+                    self._columns.clear()
+                self._columns[i] = columns
+        return columns[:count]
+
+    def fundamentals(self, symbol: str) -> Optional[Dict]:
+        records = self._fundamentals.get(symbol)
+        if not records:
+            return None
+        with self._lock:
+            now = self._screener_times[self._position]
+            i = records[max(0, bisect.bisect_right(self._fundamentals_times[symbol], now) - 1)]
+            return self._record(i)['data']
+
+    def clock(self) -> datetime:
+        """Tape time of the snapshot served last."""
+        with self._lock:
+            now = self._screener_times[self._position]
+        return datetime.fromtimestamp(now, EASTERN)
+
+    def refresh_interval(self, interval: int) -> int:
+        """Scale a live refresh interval to the playback speed."""
+        return max(1, int(interval / self.speed)) if self.speed > 0 else 1
+
+
+@st.cache_resource(show_spinner=False)
+def get_tape_recorder() -> Optional[TapeWriter]:
+    """Process-wide recorder when DASHBOARD_TAPE_RECORD is set, else None."""
+    return TapeWriter(TAPE_RECORD_PATH) if TAPE_RECORD_PATH else None
+
+
+@st.cache_resource(show_spinner=False)
+def get_tape_replay() -> Optional[TapeReplay]:
+    """Process-wide replay when DASHBOARD_TAPE_REPLAY is set, else None."""
+    return TapeReplay(TAPE_REPLAY_PATH, TAPE_REPLAY_SPEED) if TAPE_REPLAY_PATH else None
+
+
+def fetch_most_active(count: int) -> QuoteColumns:
+    """Screener quotes from the replay tape when one is loaded, else from Yahoo."""
+    replay = get_tape_replay()
+    if replay is not None:
+        return replay.screener(count)
+    return get_most_active_stocks(count)
+
+
+def fetch_watchlist(symbols: Tuple[str, ...]) -> QuoteColumns:
+    """Watchlist quotes, taken from the replay tape's snapshot when one is loaded."""
+    replay = get_tape_replay()
+    if replay is not None:
+        snapshot = replay.screener(None)
+        return snapshot[np.isin(snapshot['Symbol'], list(symbols))]
+    return get_watchlist_quotes(symbols)
+
+
+def fetch_fundamentals(symbol: str, earnings_time: int = 0) -> Optional[Dict]:
+    """Fundamentals from the replay tape when one is loaded, else from yfinance via the fundamentals cache.
+
+    earnings_time is the quote's earningsTimestamp (see FundamentalsCache.get).
+    """
+    replay = get_tape_replay()
+    if replay is not None:
+        return replay.fundamentals(symbol)
+    return get_fundamentals_cache().get(symbol, earnings_time)
+
+
+# ============================================================================
+# FUNDAMENTALS CACHE
+# ============================================================================
+
+class FundamentalsCache:
+    """Process-wide fundamentals per symbol, invalidated by earnings reports.
+
+    Revenue and EPS growth move when a company reports, so an entry stays
+    valid until the symbol's next earnings date (from the fetch), or until
+    FUNDAMENTALS_MAX_AGE for symbols without one. The screener's
+    earningsTimestamp is checked on every lookup: if it shows a report
+    after the fetch (an earlier or newly scheduled date), the symbol is
+    refetched then. Entries fetched within FUNDAMENTALS_SETTLE of a report
+    expire after FUNDAMENTALS_SETTLE_TTL, since Yahoo may not have the new
+    figures yet; failed fetches are retried after FUNDAMENTALS_RETRY. So a
+    refresh outside earnings season normally makes no requests at all.
+    Symbols with no data yet are fetched at PRIORITY_VISIBLE, refreshes at
+    PRIORITY_BACKGROUND (see RequestScheduler).
+    """
+
+    def __init__(self, fetch=None):
+        self._fetch = fetch or get_financial_data
+        self._lock = threading.Lock()
+        # symbol -> (data, fetched, expires, last attempt)
+        self._entries: Dict[str, Tuple[Optional[Dict], float, float, float]] = {}
+        self.hits = 0
+        self.fetches = 0
+        self.reported = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def expiry(data: Optional[Dict], fetched_at: float) -> float:
+        """When an entry fetched at fetched_at stops being valid (epoch seconds)."""
+        if data is None:
+            return fetched_at + FUNDAMENTALS_RETRY
+        expires = fetched_at + FUNDAMENTALS_MAX_AGE
+        if data.get('next_earnings'):
+            expires = min(expires, data['next_earnings'])
+        if data.get('last_earnings') and fetched_at - data['last_earnings'] < FUNDAMENTALS_SETTLE:
+            expires = min(expires, fetched_at + FUNDAMENTALS_SETTLE_TTL)
+        return expires
+
+    def get(self, symbol: str, earnings_time: int = 0) -> Optional[Dict]:
+        """Cached fundamentals for symbol, fetched if expired or reported since (earnings_time <= now)."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None:
+                data, _, expires, attempted = entry
+                reported = data is not None and attempted < earnings_time <= now
+                if now < expires and not reported:
+                    self.hits += 1
+                    return data
+                self.reported += reported
+        # Refreshing data the panel already has is background work; if it
+        # fails or misses its deadline, keep serving the old entry and retry
+        # after FUNDAMENTALS_RETRY.
+        stale = entry[0] if entry is not None else None
+        data = self._fetch(symbol, PRIORITY_VISIBLE if stale is None else PRIORITY_BACKGROUND)
+        fetched_at = time.time()
+        with self._lock:
+            self.fetches += 1
+            if data is None and stale is not None:
+                self._entries[symbol] = (stale, entry[1], fetched_at + FUNDAMENTALS_RETRY, fetched_at)
+                return stale
+            self._entries[symbol] = (data, fetched_at, self.expiry(data, fetched_at), fetched_at)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+@st.cache_resource(show_spinner=False)
+def get_fundamentals_cache() -> FundamentalsCache:
+    """The process-wide fundamentals cache."""
+    return FundamentalsCache()
+
+
+# ============================================================================
+# VOLUME PROFILES
+# ============================================================================
+
+def _generic_volume_curve() -> np.ndarray:
+    """Typical US-equity cumulative intraday volume: heavy open, midday lull, close ramp and auction."""
+    t = np.arange(SESSION_MINUTES) + 0.5
+    intensity = 1 + 3 * np.exp(-t / 15) + 1.5 * np.exp(-(SESSION_MINUTES - t) / 25)
+    intensity[-1] += 0.08 / 0.92 * intensity.sum()
+    curve = np.concatenate([[0.0], np.cumsum(intensity)])
+    return curve / curve[-1]
+
+
+class VolumeProfile:
+    """Cumulative intraday volume curves: the fraction of a normal day's volume
+    traded by each minute of the regular session, per symbol.
+
+    ``curves[i, m]`` is symbol i's fraction after m minutes (m = 0..390);
+    ``market`` is the curve for symbols without one. Stored as an .npz with
+    the curves quantized to uint16 (under 1 KiB per symbol); lookups are a
+    single vectorized gather.
+    """
+
+    def __init__(self, symbols: List[str], curves: np.ndarray, market: np.ndarray, days: int = 0):
+        self.index = pd.Index(symbols)
+        self.curves = np.asarray(curves, dtype=np.float32).reshape(len(symbols), SESSION_MINUTES + 1)
+        self.market = np.asarray(market, dtype=np.float32)
+        self.days = days
+
+    @classmethod
+    def generic(cls) -> 'VolumeProfile':
+        return cls([], np.empty((0, SESSION_MINUTES + 1)), _generic_volume_curve())
+
+    @classmethod
+    def load(cls, path: str) -> 'VolumeProfile':
+        with np.load(path) as data:
+            return cls(data['symbols'].tolist(), data['curves'] / 65535.0, data['market'] / 65535.0,
+                       int(data['days']))
+
+    def save(self, path: str):
+        def quantize(curve):
+            return np.round(np.clip(curve, 0, 1) * 65535).astype(np.uint16)
+        np.savez_compressed(path, symbols=np.array(self.index, dtype=str), curves=quantize(self.curves),
+                            market=quantize(self.market), days=self.days)
+
+    def fraction(self, symbols, minute: int) -> np.ndarray:
+        """Expected fraction of a day's volume traded by ``minute`` for each symbol."""
+        rows = self.index.get_indexer(symbols)
+        known = rows >= 0
+        fraction = np.full(len(rows), self.market[minute], dtype=np.float64)
+        fraction[known] = self.curves[rows[known], minute]
+        return np.maximum(fraction, MIN_VOLUME_FRACTION)
+
+
+@st.cache_resource(show_spinner=False)
+def get_volume_profile() -> VolumeProfile:
+    """The configured volume profile, or the generic curve."""
+    if VOLUME_PROFILE_PATH:
+        try:
+            return VolumeProfile.load(VOLUME_PROFILE_PATH)
+        except (OSError, KeyError, ValueError) as e:
+            log.warning("volume profile %s: %s; using the generic curve", VOLUME_PROFILE_PATH, e)
+    return VolumeProfile.generic()
+
+
+def market_clock() -> datetime:
+    """Now, or the tape time when replaying a tape."""
+    replay = get_tape_replay()
+    return replay.clock() if replay is not None else datetime.now(EASTERN)
+
+
+def session_minute(now: datetime) -> int:
+    """Minutes into the regular session; a full session outside trading hours.
+
+    Before the open the day's volume fields still describe the previous
+    session, so they are compared against a full day too.
+    """
+    if now.weekday() >= 5:
+        return SESSION_MINUTES
+    minutes = (now.hour - 9) * 60 + now.minute - 30
+    return SESSION_MINUTES if minutes < 0 else min(SESSION_MINUTES, max(1, minutes))
+
+
+def with_expected_volume(df: pd.DataFrame, minute: int) -> pd.DataFrame:
+    """Add 'Expected Volume': average volume scaled to the share expected by this minute."""
+    if df.empty:
+        return df.assign(**{'Expected Volume': np.empty(0)})
+    fraction = get_volume_profile().fraction(df['Symbol'].to_numpy(), minute)
+    return df.assign(**{'Expected Volume': df['Avg Volume'].to_numpy(dtype=np.float64) * fraction})
+
+
+# ============================================================================
+# SHARED SNAPSHOT AND RESULTS
+# ============================================================================
+
+class ScreenerSnapshot:
+    """Process-wide quote snapshot of one universe that every session slices.
+
+    Fetches the largest universe any session has asked for, so sessions
+    that differ only in stock_count share one payload (and one cache entry
+    in get_most_active_stocks) instead of fetching their own. The screener
+    ranks by volume, so the first N quotes of a larger fetch are the N-stock
+    answer. ``version`` increments whenever the payload content changes and
+    keys everything derived from it in the ResultsCache. ``fetch(count)``
+    defaults to the most-actives screener; watchlists pass their own, and a
+    ``tag`` naming their contents, which goes into the source key: an
+    edited list gets a new snapshot whose versions restart, and must not
+    hit the old list's cached results or engines.
+    """
+
+    def __init__(self, fetch=None, tag: Tuple[str, ...] = ()):
+        self._fetch = fetch or fetch_most_active
+        self.tag = tag
+        self._lock = threading.Lock()
+        self.count = 0
+        self.version = 0
+        self._quotes = QuoteColumns.empty()
+        self._fingerprint: Optional[int] = None
+
+    def get(self, count: int) -> Tuple[int, QuoteColumns]:
+        """Return (version, first count quotes); empty quotes if the fetch failed."""
+        with self._lock:
+            self.count = max(self.count, count)
+            fetch_count = self.count
+        quotes = self._fetch(fetch_count)
+        if not len(quotes):
+            return self.version, quotes
+        fingerprint = quotes.fingerprint()
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._fingerprint = fingerprint
+                self._quotes = quotes
+                self.version += 1
+            return self.version, self._quotes[:count]
+
+
+class ResultsCache:
+    """Size-bounded LRU of derived results shared by every session.
+
+    Keys are tuples of (artifact, snapshot key, config fields the artifact
+    depends on), so sessions with identical settings looking at the same
+    snapshot reuse one breadth dict, frame or figure. Concurrent misses on
+    the same key wait for the first caller's result rather than computing
+    it again. Cached values are shared and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._pending: Dict[Tuple, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple, compute):
+        """Return the cached value for key, calling compute() on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            key_lock = self._pending.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    return self._entries[key]
+            try:
+                value = compute()
+                with self._lock:
+                    self._entries[key] = value
+                    self.misses += 1
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+        return value
+
+
+@st.cache_resource(show_spinner=False)
+def get_screener_snapshot() -> ScreenerSnapshot:
+    """The process-wide screener snapshot."""
+    return ScreenerSnapshot()
+
+
+@st.cache_resource(show_spinner=False)
+def get_watchlist_snapshot(name: str, symbols: Tuple[str, ...]) -> ScreenerSnapshot:
+    """The process-wide snapshot of one watchlist (keyed by its contents too, so edits take effect)."""
+    digest = hashlib.blake2b(' '.join(symbols).encode(), digest_size=4).hexdigest()
+    return ScreenerSnapshot(lambda count: fetch_watchlist(symbols)[:count], tag=(digest,))
+
+
+def load_watchlists(path: str) -> Dict[str, List[str]]:
+    """Read watchlists from a JSON or text file.
+
+    JSON maps each watchlist name to a list of symbols or a comma/space
+    separated string; any other file is a single watchlist named after the
+    file, with symbols separated by commas, spaces or newlines. Symbols are
+    upper-cased and de-duplicated in order.
+    """
+    with open(path) as f:
+        text = f.read()
+    if path.endswith('.json'):
+        raw = json.loads(text)
+    else:
+        raw = {os.path.splitext(os.path.basename(path))[0]: text}
+    watchlists = {}
+    for name, symbols in raw.items():
+        if isinstance(symbols, str):
+            symbols = symbols.replace(',', ' ').split()
+        watchlists[str(name)] = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+    return watchlists
+
+
+@st.cache_data(show_spinner=False)
+def _cached_watchlists(path: str, mtime: float) -> Dict[str, List[str]]:
+    return load_watchlists(path)
+
+
+def get_watchlists() -> Dict[str, List[str]]:
+    """Watchlists from DASHBOARD_WATCHLISTS, re-read when the file changes."""
+    if not WATCHLIST_PATH:
+        return {}
+    try:
+        return _cached_watchlists(WATCHLIST_PATH, os.path.getmtime(WATCHLIST_PATH))
+    except (OSError, ValueError) as e:
+        st.session_state['last_error'] = f"Watchlists: {e}"
+        return {}
+
+
+def get_universe(config: Dict) -> Tuple[ScreenerSnapshot, int]:
+    """Snapshot for the session's universe, and how many of its quotes to show."""
+    symbols = get_watchlists().get(config['universe'])
+    if not symbols:
+        return get_screener_snapshot(), config['stock_count']
+    return get_watchlist_snapshot(config['universe'], tuple(symbols)), len(symbols)
+
+
+@st.cache_resource(show_spinner=False)
+def get_results_cache() -> ResultsCache:
+    """The process-wide derived results cache."""
+    return ResultsCache()
+
+
+# ============================================================================
+# COMPUTE OFFLOAD
+# ============================================================================
+
+class ComputeBackend:
+    """Runs analytics kernels in a process pool on shared-memory inputs.
+
+    CPU-bound NumPy work in a fragment holds the GIL that every session's
+    script thread shares; in a worker process it doesn't. Inputs go over as
+    analytics.SharedColumns rather than pickled frames. Results are kept per
+    stage (an analytics stage of one data source) for the latest snapshot
+    version: a request for a newer version submits the work and waits up to
+    ``wait`` seconds, then returns the last completed result so the page
+    keeps rendering; a later run picks up the new result once it's ready.
+    """
+
+    def __init__(self, workers: int, wait: float):
+        self.workers = workers
+        self.wait = wait
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._latest: Dict[Tuple, Tuple[Tuple[int, int], object]] = {}
+        self._pending: Dict[Tuple, Tuple[Tuple[int, int], object]] = {}
+        self._pool = self._new_pool()
+
+    def _new_pool(self):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        with self._importable_main():
+            for _ in range(self.workers):
+                pool.submit(analytics.ping)
+        return pool
+
+    @staticmethod
+    def _importable_main():
+        """Point __main__ at the analytics module while workers start.
+
+        Spawned workers re-import the parent's __main__, which under
+        `streamlit run` is this script; they only need the kernels.
+        """
+        class Swap:
+            def __enter__(self):
+                self.main = sys.modules['__main__']
+                sys.modules['__main__'] = analytics
+
+            def __exit__(self, *exc):
+                sys.modules['__main__'] = self.main
+        return Swap()
+
+    def _submit(self, kernel: str, columns: Dict[str, np.ndarray], kwargs: Dict):
+        from concurrent.futures.process import BrokenProcessPool
+
+        shared = analytics.SharedColumns(columns)
+        try:
+            with self._importable_main():
+                try:
+                    future = self._pool.submit(analytics.run_kernel, kernel, shared.spec, kwargs)
+                except BrokenProcessPool:
+                    self._pool = self._new_pool()
+                    future = self._pool.submit(analytics.run_kernel, kernel, shared.spec, kwargs)
+        except Exception:
+            shared.release()
+            raise
+        future.add_done_callback(lambda _: shared.release())
+        return future
+
+    def result(self, stage: Tuple, version: Tuple[int, int], kernel: str, make_inputs, kwargs: Dict,
+               finish) -> Tuple[Tuple[int, int], object]:
+        """(version, finish(kernel output)), or the stage's last (version, result) if that isn't ready."""
+        from concurrent.futures import TimeoutError as FutureTimeout
+
+        with self._lock:
+            latest = self._latest.get(stage)
+            if latest is not None and latest[0] >= version:
+                if latest[0] == version:
+                    return latest
+                latest = None   # an older snapshot (cached fallback): compute it directly below
+                pending = None
+            else:
+                pending = self._pending.get(stage)
+                if pending is None or pending[0] != version:
+                    try:
+                        pending = (version, self._submit(kernel, make_inputs(), kwargs))
+                        self._pending[stage] = pending
+                    except Exception as e:
+                        self.last_error = f"Compute pool: {e}"
+                        pending = None
+
+        if pending is not None:
+            try:
+                output = pending[1].result(timeout=self.wait if latest is not None else None)
+            except FutureTimeout:
+                return latest
+            except Exception as e:
+                self.last_error = f"Compute worker: {e}"
+                output = None
+            if output is not None:
+                value = finish(output)
+                with self._lock:
+                    current = self._latest.get(stage)
+                    if current is None or current[0] < version:
+                        self._latest[stage] = (version, value)
+                    if self._pending.get(stage) is pending:
+                        del self._pending[stage]
+                return version, value
+        # Pool unavailable, worker failed, or an older snapshot: run in-process.
+        return version, finish(analytics.KERNELS[kernel](**make_inputs(), **kwargs))
+
+
+@st.cache_resource(show_spinner=False)
+def get_compute_backend() -> Optional[ComputeBackend]:
+    """Process-wide compute pool when DASHBOARD_COMPUTE_WORKERS > 0, else None."""
+    return ComputeBackend(COMPUTE_WORKERS, COMPUTE_WAIT) if COMPUTE_WORKERS > 0 else None
+
+
+# Analytics stages: quote-frame inputs, kernel, kernel arguments, and the
+# conversion of kernel output (plus the quote frame) to the page's result.
+ANALYTICS_STAGES = {
+    'breadth': (breadth_inputs, 'breadth', {}, lambda df, output: output),
+    'sectors': (sector_inputs, 'sector_aggregates', {'n': len(SECTOR_NAMES), 'top_n': 3}, sector_frame),
+}
+
+
+def analytics_stage(stage: str, source: Tuple, version: Tuple[int, int],
+                    df: pd.DataFrame) -> Tuple[Tuple[int, int], object]:
+    """One analytics stage for a snapshot, through the compute pool when configured.
+
+    ``version`` is (snapshot version, volume-profile minute). Returns
+    (version the result was computed from, result). In-process
+    results are memoized in the ResultsCache; offloaded ones by the
+    ComputeBackend, which may return an earlier version's result while the
+    new one is still computing, so anything derived from the result should
+    be keyed by the returned version.
+    """
+    if df.empty:
+        return version, {} if stage == 'breadth' else pd.DataFrame()
+    make_inputs, kernel, kwargs, finish = ANALYTICS_STAGES[stage]
+    backend = get_compute_backend()
+    if backend is None:
+        return version, get_results_cache().get(
+            (stage,) + source + version,
+            lambda: finish(df, analytics.KERNELS[kernel](**make_inputs(df), **kwargs)))
+    return backend.result((stage,) + source, version, kernel, lambda: make_inputs(df), kwargs,
+                          functools.partial(finish, df))
+
+
+# ============================================================================
+# RANKINGS
+# ============================================================================
+
+def _ranked(values: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Scores for a ranked view: values where valid (and not NaN), else -inf."""
+    return np.where(valid & ~np.isnan(values), values, -np.inf)
+
+
+def _relative_volume(c: Dict[str, np.ndarray]) -> np.ndarray:
+    expected = c['Expected Volume']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _ranked(c['Volume'] / expected, (expected > 0) & (c['Volume'] > 0))
+
+
+def _fraction_of_high(c: Dict[str, np.ndarray]) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _ranked(c['Price'] / c['52W High'], (c['Price'] > 0) & (c['52W High'] > 0))
+
+
+def _best(rows: np.ndarray, scores: np.ndarray, k: int, kth: Optional[float] = None) -> np.ndarray:
+    """Positions of the k best scores, ties at the kth score going to the lower rows.
+
+    ``kth`` is the kth best score if already known. Every other position
+    scores at or below it.
+    """
+    if kth is None:
+        kth = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > kth)
+    tied = np.flatnonzero(scores == kth)
+    tied = tied[np.argsort(rows[tied], kind='stable')[:k - len(above)]]
+    return np.concatenate([above, tied])
+
+
+# Ranked views of the quote frame: each scores every row (higher ranks
+# first, -inf excludes the row) from the RANKING_COLUMNS arrays. Every view
+# keeps its top RANKING_DEPTH rows, the most any sidebar setting shows, so
+# one index serves every session's counts.
+RANKINGS = {
+    'gainers': lambda c: _ranked(c['Change (%)'], c['Change (%)'] > 0),
+    'losers': lambda c: _ranked(-c['Change (%)'], c['Change (%)'] < 0),
+    'volume': lambda c: _ranked(c['Volume'].astype(np.float64), c['Volume'] >= 0),
+    'unusual_volume': _relative_volume,
+    'near_high': _fraction_of_high,
+}
+RANKING_COLUMNS = ('Price', 'Change (%)', 'Volume', 'Expected Volume', '52W High')
+RANKING_DEPTH = 25
+
+
+class RankingIndex:
+    """Top rows of every ranked view (RANKINGS) for one quote source.
+
+    A full update scores all rows for every view into one (views x rows)
+    matrix and finds each view's cutoff score with a single partition
+    along the rows axis. Each view keeps ``depth + margin`` candidate rows
+    (ties at the cutoff go to the lower rows, as in a stable sort) and the
+    cutoff, such that every other row scores at or below it. Given the rows
+    that changed since the previous update (the streaming quote table
+    tracks them), an update rescores only those rows plus the retained
+    candidates, so the work follows the number of changed quotes; a view
+    falls back to a full pass when the changes leave fewer than ``depth``
+    rows strictly above its cutoff, since rows left out at the cutoff
+    could tie with the top ones.
+    """
+
+    def __init__(self, depth: int = RANKING_DEPTH, margin: Optional[int] = None):
+        self.depth = depth
+        self.keep = depth + (depth if margin is None else margin)
+        self._lock = threading.Lock()
+        self.version = None
+        self.rows = 0
+        self.epoch = None
+        self._candidates: Dict[str, np.ndarray] = {}
+        self._cutoff: Dict[str, float] = {}
+        self.full_passes = 0
+        self.incremental_passes = 0
+
+    def update(self, version: int, df: pd.DataFrame, changed: Optional[np.ndarray] = None,
+               epoch=None) -> Dict[str, np.ndarray]:
+        """Row positions in df of each view's top rows, best first.
+
+        ``changed`` lists the rows whose values may differ from the frame of
+        the previous update (rows beyond its length count as changed); with
+        None, for a frame older than the last one, or when ``epoch`` (the
+        volume-profile minute, which moves every row's expected volume)
+        differs from the last update's, every view is recomputed in full.
+        """
+        columns = {c: df[c].to_numpy() for c in RANKING_COLUMNS}
+        n = len(df)
+        with self._lock:
+            incremental = (changed is not None and self.version is not None and version >= self.version
+                           and n >= self.rows and epoch == self.epoch)
+            views, stale = {}, list(RANKINGS)
+            if incremental:
+                changed = np.union1d(changed, np.arange(self.rows, n))
+                rows = np.union1d(changed, np.concatenate(list(self._candidates.values())))
+                subset = {c: v[rows] for c, v in columns.items()}
+                scores = np.vstack([score(subset) for score in RANKINGS.values()])
+                stale = []
+                for name, row_scores in zip(RANKINGS, scores):
+                    cutoff = self._cutoff[name]
+                    if cutoff == -np.inf or (row_scores > cutoff).sum() >= min(self.depth, n):
+                        views[name] = self._select(name, rows, row_scores, self._cutoff[name])
+                    else:
+                        stale.append(name)
+                self.incremental_passes += 1
+            if stale:
+                scores = np.vstack([RANKINGS[name](columns) for name in stale])
+                all_rows = np.arange(n)
+                if n > self.keep:
+                    kth = -np.partition(-scores, self.keep - 1, axis=1)[:, self.keep - 1]
+                for i, name in enumerate(stale):
+                    if n > self.keep:
+                        picked, cutoff = _best(all_rows, scores[i], self.keep, kth[i]), kth[i]
+                    else:
+                        picked, cutoff = all_rows, -np.inf
+                    views[name] = self._select(name, picked, scores[i, picked], cutoff)
+                self.full_passes += 1
+            self.version, self.rows, self.epoch = version, n, epoch
+        return views
+
+    def _select(self, name: str, rows: np.ndarray, scores: np.ndarray, cutoff: float) -> np.ndarray:
+        """Keep the best ``keep`` of rows as the view's candidates; return its top rows."""
+        if len(rows) > self.keep:
+            part = _best(rows, scores, self.keep)
+            cutoff = max(cutoff, scores[part].min())
+            rows, scores = rows[part], scores[part]
+        order = np.lexsort((rows, -scores))     # best first, ties in row order
+        rows, scores = rows[order], scores[order]
+        self._candidates[name] = rows
+        self._cutoff[name] = cutoff
+        top = rows[:self.depth]
+        return top[scores[:self.depth] > -np.inf]
+
+
+@st.cache_resource(show_spinner=False)
+def get_ranking_index(source: Tuple) -> RankingIndex:
+    """The process-wide ranking index for one quote source."""
+    return RankingIndex()
+
+
+# ============================================================================
+# CORRELATION
+# ============================================================================
+
+class CorrelationEngine:
+    """Running pairwise correlations of one source's intraday returns.
+
+    Each new snapshot, at most one per ``bar_seconds`` of market time, is a
+    bar: returns are log price changes since the previous bar, and
+    analytics.comoment_update folds them into running means and
+    co-moments, so a bar costs O(N^2) however long the session has run
+    instead of recomputing an N x N matrix over every bar. Bars are only
+    taken during the regular session, and one in which no price moved is
+    dropped, so quiet pre-market and after-hours refreshes don't pad the
+    bar count with zero returns; the first bar of a session resets the
+    engine and only sets prices, so the overnight gap isn't a return.
+    Outside the session the last summary stays up. Symbols get a slot the
+    first time they are seen, most-traded first, until ``capacity``; later
+    arrivals are ignored until the next session. Correlations are
+    pairwise-complete, so names that joined late or skipped a bar keep
+    every bar they share with each other.
+    """
+
+    def __init__(self, capacity: int, bar_seconds: int, min_bars: int):
+        self.capacity = capacity
+        self.bar_seconds = bar_seconds
+        self.min_bars = min_bars
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, day: Optional[date]):
+        c = self.capacity
+        self.day = day
+        self.size = 0
+        self.bars = 0
+        self.symbols = np.empty(c, dtype=object)
+        self._index = pd.Index([], dtype=object)
+        self._last_price = np.full(c, np.nan)
+        self._count = np.zeros((c, c), dtype=np.int64)
+        self._mean = np.zeros((c, c))
+        self._m2 = np.zeros((c, c))
+        self._cross = np.zeros((c, c))
+        self._last_bar: Optional[datetime] = None
+        self._last_version = None
+        self._result: Optional[Dict] = None
+
+    def update(self, version: int, df: pd.DataFrame, now: datetime) -> Dict:
+        """Take a bar from df if one is due, and return the current summary (see _summarize)."""
+        with self._lock:
+            if not is_market_open(now):
+                if self._result is None:
+                    self._result = self._summarize()
+                return self._result
+            if self.day != now.date():
+                self._reset(now.date())
+            due = self._last_bar is None or (now - self._last_bar).total_seconds() >= self.bar_seconds
+            # Versions only grow, so a session still on an older snapshot adds nothing.
+            newer = self._last_version is None or version > self._last_version
+            if due and newer and not df.empty:
+                self._add_bar(df)
+                self._last_bar, self._last_version = now, version
+            if self._result is None:
+                self._result = self._summarize()
+            return self._result
+
+    def _add_bar(self, df: pd.DataFrame):
+        symbols = df['Symbol'].to_numpy()
+        price = df['Price'].to_numpy(dtype=np.float64)
+        slots = self._index.get_indexer(symbols)
+        room = self.capacity - self.size
+        new = np.flatnonzero((slots < 0) & (price > 0))
+        if len(new) and room > 0:
+            dollar_volume = price[new] * df['Volume'].to_numpy(dtype=np.float64)[new]
+            new = new[np.argsort(-dollar_volume, kind='stable')[:room]]
+            self.symbols[self.size:self.size + len(new)] = symbols[new]
+            slots[new] = np.arange(self.size, self.size + len(new))
+            self.size += len(new)
+            self._index = pd.Index(self.symbols[:self.size])
+
+        n = self.size
+        current = np.full(n, np.nan)
+        current[slots[slots >= 0]] = price[slots >= 0]
+        previous = self._last_price[:n]
+        valid = (current > 0) & (previous > 0)
+        returns = np.log(np.where(valid, current, 1.0) / np.where(valid, previous, 1.0))
+        if valid.sum() >= 2 and (returns[valid] != 0).any():
+            analytics.comoment_update(self._count[:n, :n], self._mean[:n, :n], self._m2[:n, :n],
+                                      self._cross[:n, :n], returns, valid)
+            self.bars += 1
+        self._last_price[:n] = np.where(current > 0, current, previous)
+        self._result = None
+
+    def _summarize(self) -> Dict:
+        """Top correlated pairs and a cluster-ordered matrix of the most co-moving names.
+
+        The heatmap takes the CORRELATION_HEATMAP_MAX names with the highest
+        correlation to any other name, ordered by analytics.cluster_order;
+        ``clusters`` labels each with its cluster (see CORRELATION_CLUSTER_MIN).
+        """
+        n = self.size
+        count = self._count[:n, :n]
+        corr = analytics.correlation(count, self._m2[:n, :n], self._cross[:n, :n], self.min_bars)
+        symbols = self.symbols[:n]
+        i, j, values = analytics.top_pairs(corr, CORRELATION_TOP_PAIRS)
+        pairs = pd.DataFrame({
+            'Pair': [f"{a} / {b}" for a, b in zip(symbols[i], symbols[j])],
+            'Correlation': values,
+            'Bars': count[i, j],
+            'Sectors': [a if a == b else f"{a} / {b}" for a, b in zip(
+                map(get_sector_for_symbol, symbols[i]), map(get_sector_for_symbol, symbols[j]))],
+        })
+
+        off_diagonal = corr.copy()
+        np.fill_diagonal(off_diagonal, np.nan)
+        strength = np.full(n, -np.inf)
+        known = np.isfinite(off_diagonal).any(axis=1)
+        if known.any():
+            strength[known] = np.nanmax(off_diagonal[known], axis=1)
+        chosen = np.flatnonzero(known)
+        if len(chosen) > CORRELATION_HEATMAP_MAX:
+            chosen = chosen[np.argpartition(-strength[chosen], CORRELATION_HEATMAP_MAX - 1)[:CORRELATION_HEATMAP_MAX]]
+        matrix = corr[np.ix_(chosen, chosen)]
+        order, clusters = analytics.cluster_order(matrix, CORRELATION_CLUSTER_MIN)
+        return {
+            'bars': self.bars,
+            'tracked': n,
+            'pairs': pairs,
+            'symbols': symbols[chosen][order].tolist(),
+            'matrix': matrix[np.ix_(order, order)],
+            'clusters': clusters[order],
+        }
+
+
+@st.cache_resource(show_spinner=False)
+def get_correlation_engine(source: Tuple) -> CorrelationEngine:
+    """The process-wide correlation engine for one quote source."""
+    return CorrelationEngine(CORRELATION_MAX_SYMBOLS, CORRELATION_BAR_SECONDS, CORRELATION_MIN_BARS)
+
+
+# ============================================================================
+# HISTORY STORE
+# ============================================================================
+
+class HistoryStore:
+    """Day-partitioned Arrow history of refreshes for end-of-day analytics.
+
+    Each persisted refresh writes three small Arrow IPC files, one per
+    table (quotes, breadth, sectors), under <root>/<table>/date=YYYY-MM-DD/.
+    Files are uncompressed IPC so reads can memory-map them and hand out
+    zero-copy column buffers; a query only opens the day partitions in its
+    range and only materializes the columns it asks for. When a new day
+    starts, the previous days' files are compacted into one file per day.
+    """
+
+    TABLES = ('quotes', 'breadth', 'sectors')
+
+    def __init__(self, root: str, min_interval: float = 60):
+        self.root = root
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._last_write: Optional[datetime] = None
+        self._last_fingerprint: Optional[int] = None
+
+    def record(self, quotes: pd.DataFrame, breadth: Dict, sectors: pd.DataFrame,
+               now: Optional[datetime] = None) -> bool:
+        """Persist one refresh; returns False if skipped as too soon or unchanged.
+
+        Every session calls this after computing a refresh, so the same
+        snapshot arrives many times; the fingerprint keeps one copy.
+        """
+        if quotes.empty:
+            return False
+        now = now or datetime.now(EASTERN)
+        fingerprint = int(pd.util.hash_pandas_object(
+            quotes[['Symbol', 'Price', 'Volume']], index=False).sum())
+        with self._lock:
+            if fingerprint == self._last_fingerprint:
+                return False
+            if self._last_write and (now - self._last_write).total_seconds() < self.min_interval:
+                return False
+            new_day = self._last_write is None or self._last_write.date() != now.date()
+            self._write('quotes', quotes, now)
+            self._write('breadth', pd.DataFrame([breadth]), now)
+            self._write('sectors', sectors, now)
+            self._last_write = now
+            self._last_fingerprint = fingerprint
+        if new_day:
+            self.compact(before=now.date())
+        return True
+
+    def _write(self, table: str, frame: pd.DataFrame, now: datetime):
+        import pyarrow as pa
+
+        day_dir = os.path.join(self.root, table, f"date={now:%Y-%m-%d}")
+        os.makedirs(day_dir, exist_ok=True)
+        arrow_table = pa.Table.from_pandas(frame.assign(ts=pd.Timestamp(now)), preserve_index=False)
+        # Microseconds plus a zero-padded sequence number, so records with
+        # the same timestamp (a tape import writes several per second) never
+        # overwrite each other and still list in write order.
+        stem = os.path.join(day_dir, f"{now:%H%M%S-%f}")
+        seq = 0
+        while os.path.exists(f"{stem}-{seq:04d}.arrow"):
+            seq += 1
+        path = f"{stem}-{seq:04d}.arrow"
+        with pa.OSFile(path + '.tmp', 'wb') as sink, pa.ipc.new_file(sink, arrow_table.schema) as writer:
+            writer.write_table(arrow_table)
+        os.replace(path + '.tmp', path)
+
+    def days(self, table: str = 'breadth') -> List[date]:
+        """Trading days with data, oldest first."""
+        base = os.path.join(self.root, table)
+        if not os.path.isdir(base):
+            return []
+        return sorted(date.fromisoformat(name[5:]) for name in os.listdir(base) if name.startswith('date='))
+
+    def _day_files(self, table: str, day: date) -> List[str]:
+        day_dir = os.path.join(self.root, table, f"date={day:%Y-%m-%d}")
+        return [os.path.join(day_dir, name) for name in sorted(os.listdir(day_dir)) if name.endswith('.arrow')]
+
+    def scan(self, table: str, columns: Optional[List[str]] = None, start: Optional[date] = None,
+             end: Optional[date] = None, last_days: Optional[int] = None) -> Optional["pa.Table"]:
+        """Memory-map the partitions in range and return only the requested columns.
+
+        The result is a chunked Arrow table whose buffers point into the
+        mapped files, so nothing is copied until the caller converts it.
+        """
+        import pyarrow as pa
+
+        days = [d for d in self.days(table) if (start is None or d >= start) and (end is None or d <= end)]
+        if last_days is not None:
+            days = days[-last_days:]
+        wanted = None if columns is None else list(dict.fromkeys(['ts', *columns]))
+        pieces = []
+        for day in days:
+            for path in self._day_files(table, day):
+                arrow_table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+                if wanted is not None:
+                    arrow_table = arrow_table.select([c for c in wanted if c in arrow_table.column_names])
+                pieces.append(arrow_table)
+        if not pieces:
+            return None
+        return pa.concat_tables(pieces, promote_options='permissive')
+
+    def compact(self, before: date):
+        """Merge each finished day's per-refresh files into a single file."""
+        import pyarrow as pa
+
+        for table in self.TABLES:
+            for day in self.days(table):
+                files = self._day_files(table, day)
+                if day >= before or len(files) <= 1:
+                    continue
+                merged = self.scan(table, start=day, end=day).combine_chunks()
+                path = os.path.join(os.path.dirname(files[0]), 'day.arrow')
+                with pa.OSFile(path + '.tmp', 'wb') as sink, pa.ipc.new_file(sink, merged.schema) as writer:
+                    writer.write_table(merged)
+                os.replace(path + '.tmp', path)
+                for old in files:
+                    if old != path:
+                        os.remove(old)
+
+    def breadth_at(self, clock: str = '10:30', days: int = 60) -> pd.DataFrame:
+        """Breadth as of a time of day (last snapshot at or before it) for the last N days."""
+        arrow_table = self.scan('breadth', ['gainers_pct', 'ad_ratio', 'gainers', 'losers', 'total'],
+                                last_days=days)
+        if arrow_table is None:
+            return pd.DataFrame()
+        df = arrow_table.to_pandas()
+        ts = df.pop('ts').dt.tz_convert(EASTERN)
+        df = df[ts.dt.time <= dt_time.fromisoformat(clock)]
+        return df.groupby(ts.dt.date.rename('date')).last()
+
+    def sector_averages(self, freq: str = 'W', periods: int = 12) -> pd.DataFrame:
+        """Mean sector change per period (default: weekly), sectors as columns."""
+        arrow_table = self.scan('sectors', ['Sector', 'Avg Change'])
+        if arrow_table is None:
+            return pd.DataFrame()
+        df = arrow_table.to_pandas()
+        df['period'] = df['ts'].dt.tz_convert(EASTERN).dt.tz_localize(None).dt.to_period(freq)
+        table = df.pivot_table(index='period', columns='Sector', values='Avg Change', aggfunc='mean')
+        return table.tail(periods)
+
+
+@st.cache_resource(show_spinner=False)
+def get_history_store() -> Optional[HistoryStore]:
+    """Process-wide history store when DASHBOARD_HISTORY_DIR is set, else None."""
+    return HistoryStore(HISTORY_DIR, HISTORY_MIN_INTERVAL) if HISTORY_DIR else None
+
+
+# ============================================================================
+# ALERTS
+# ============================================================================
+
+ALERT_SCOPES = ('symbol', 'sector', 'market')
+
+
+def parse_alert_rules(raw: List[Dict]) -> List[Dict]:
+    """Validate rule dicts and fill in defaults; raises ValueError on a bad rule."""
+    rules = []
+    for i, rule in enumerate(raw):
+        try:
+            scope, field, op = rule.get('scope', 'symbol'), str(rule['field']), rule.get('op', 'above')
+            threshold, hysteresis = float(rule['threshold']), float(rule.get('hysteresis', 0))
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"alert rule {i + 1}: {e!r}") from None
+        if scope not in ALERT_SCOPES or op not in ('above', 'below') or hysteresis < 0:
+            raise ValueError(f"alert rule {i + 1}: bad scope, op or hysteresis")
+        symbols = rule.get('symbols')
+        rules.append({
+            'name': str(rule.get('name') or f"{field} {op} {threshold:g}"),
+            'scope': scope, 'field': field, 'op': op, 'threshold': threshold, 'hysteresis': hysteresis,
+            'symbols': sorted({s.upper() for s in symbols}) if symbols else None,
+        })
+    return rules
+
+
+@st.cache_data(show_spinner=False)
+def _cached_alert_rules(path: str, mtime: float) -> List[Dict]:
+    with open(path) as f:
+        return parse_alert_rules(json.load(f))
+
+
+def get_alert_rules() -> List[Dict]:
+    """Rules from DASHBOARD_ALERT_RULES (re-read when the file changes), else the defaults."""
+    if not ALERT_RULES_PATH:
+        return parse_alert_rules(DEFAULT_ALERT_RULES)
+    try:
+        return _cached_alert_rules(ALERT_RULES_PATH, os.path.getmtime(ALERT_RULES_PATH))
+    except (OSError, ValueError) as e:
+        st.session_state['last_error'] = f"Alert rules: {e}"
+        return []
+
 
-def calculate_sector_performance(df: pd.DataFrame) -> pd.DataFrame:
-    """Calculate performance metrics by sector"""
-    if df.empty:
-        return pd.DataFrame()
-    
-    # Add sector column
-    df = df.copy()
-    df['Sector'] = df['Symbol'].apply(lambda x: get_sector_for_symbol(x))
-    
-    # Group by sector and calculate metrics
-    sector_stats = df.groupby('Sector').agg({
-        'Change (%)': ['mean', 'count'],
-        'Volume': 'sum',
-        'Symbol': lambda x: list(x)[:3]  # Top 3 symbols
-    }).reset_index()
-    
-    sector_stats.columns = ['Sector', 'Avg Change', 'Count', 'Total Volume', 'Top Stocks']
-    sector_stats = sector_stats.sort_values('Avg Change', ascending=False)
-    
-    return sector_stats
+class ThresholdIndex:
+    """The 'above' rules on one (scope, field), sorted by threshold.
 
+    'below' rules are indexed as 'above' rules on the negated value. A value
+    v fires rule i when it moves from v <= T[i] to v > T[i], which for a
+    move from old to new is exactly the rules with T in [min, max) of the
+    two: one searchsorted pair, however many rules there are. The rules
+    that re-arm (value back at or below T[i] - hysteresis) come from a
+    second array sorted by that level.
+    """
 
-def calculate_breadth_indicators(df: pd.DataFrame) -> Dict:
-    """Calculate market breadth indicators"""
-    if df.empty:
-        return {}
-    
-    total = len(df)
-    gainers = len(df[df['Change (%)'] > 0])
-    losers = len(df[df['Change (%)'] < 0])
-    unchanged = total - gainers - losers
-    
-    # Advance/Decline ratio. With zero declines the ratio is undefined
-    # (effectively infinite); represent that explicitly rather than
-    # returning a raw gainer count that would render as e.g. "45.00x".
-    ad_ratio = gainers / losers if losers > 0 else float('inf')
-
-    strong_gainers = len(df[df['Change (%)'] > 5])
-    strong_losers = len(df[df['Change (%)'] < -5])
-
-    # New highs/lows: stocks trading within 5% of their 52-week high/low,
-    # using the screener's fiftyTwoWeekHigh/Low fields. Guard on valid
-    # (>0) bounds and price so missing fields don't produce false hits.
-    near_highs = 0
-    near_lows = 0
-    if {'52W High', '52W Low', 'Price'}.issubset(df.columns):
-        priced = df[df['Price'] > 0]
-        valid_high = priced[priced['52W High'] > 0]
-        near_highs = int((valid_high['Price'] >= 0.95 * valid_high['52W High']).sum())
-        valid_low = priced[priced['52W Low'] > 0]
-        near_lows = int((valid_low['Price'] <= 1.05 * valid_low['52W Low']).sum())
-
-    # True relative volume: today's volume vs the 3-month average volume,
-    # per stock. Use the median across stocks with a valid average so a
-    # single outlier doesn't skew the headline figure. None => no data.
-    rel_volume = None
-    if {'Volume', 'Avg Volume'}.issubset(df.columns):
-        valid_vol = df[df['Avg Volume'] > 0]
-        if not valid_vol.empty:
-            rel_volume = float((valid_vol['Volume'] / valid_vol['Avg Volume']).median())
+    def __init__(self, rule_ids: List[int], thresholds: List[float], hysteresis: List[float], sign: float):
+        self.sign = sign
+        ids = np.asarray(rule_ids, dtype=np.intp)
+        fire_at = sign * np.asarray(thresholds, dtype=np.float64)
+        rearm_at = fire_at - np.asarray(hysteresis, dtype=np.float64)
+        order = np.argsort(fire_at, kind='stable')
+        self.fire_at, self.fire_ids = fire_at[order], ids[order]
+        order = np.argsort(rearm_at, kind='stable')
+        self.rearm_at, self.rearm_ids = rearm_at[order], ids[order]
 
-    return {
-        'total': total,
-        'gainers': gainers,
-        'losers': losers,
-        'unchanged': unchanged,
-        'gainers_pct': (gainers / total * 100) if total > 0 else 0,
-        'ad_ratio': ad_ratio,
-        'strong_gainers': strong_gainers,
-        'strong_losers': strong_losers,
-        'near_highs': near_highs,
-        'near_lows': near_lows,
-        'rel_volume': rel_volume,
-    }
+    def ranges(self, old: np.ndarray, new: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """Per move, the slices of fire_ids and rearm_ids whose levels it crossed."""
+        old, new = self.sign * old, self.sign * new
+        low, high = np.minimum(old, new), np.maximum(old, new)
+        return (np.searchsorted(self.fire_at, low), np.searchsorted(self.fire_at, high),
+                np.searchsorted(self.rearm_at, low), np.searchsorted(self.rearm_at, high), new > old)
 
 
-def screen_growth_stocks(stocks_data: List[Dict], config: Dict) -> List[Dict]:
-    """Screen stocks for growth criteria"""
-    growth_stocks = []
-    biotech_keywords = ['biotech', 'pharmaceutical', 'drug manufacturers', 'biopharm', 'therapeutics']
-    
-    # Limit to avoid too many API calls
-    for stock in stocks_data[:35]:
-        symbol = stock.get('symbol', '')
-        price = stock.get('regularMarketPrice', 0)
-        
-        if price < config['growth_min_price']:
-            continue
-        
-        financial_data = get_financial_data(symbol)
-        if not financial_data:
-            continue
-        
-        criteria_met = 0
-        
-        # Revenue growth
-        revenue_growth = financial_data.get('revenue_growth')
-        if revenue_growth is not None and revenue_growth >= config['growth_revenue_threshold']:
-            criteria_met += 1
-        
-        # EPS growth
-        eps_growth = financial_data.get('eps_growth')
-        if eps_growth is not None and eps_growth >= config['growth_eps_threshold']:
-            criteria_met += 1
-        
-        # Volume
-        if financial_data.get('avg_volume_50d', 0) >= config['growth_min_volume']:
-            criteria_met += 1
-        
-        # Industry check
-        industry = financial_data.get('industry', '').lower()
-        if config['exclude_biotech']:
-            if not any(kw in industry for kw in biotech_keywords):
-                criteria_met += 1
-        else:
-            criteria_met += 1
-        
-        if criteria_met == 4:
-            growth_stocks.append({
-                'Symbol': symbol,
-                'Name': stock.get('shortName', 'N/A'),
-                'Price': price,
-                'Change (%)': stock.get('regularMarketChangePercent', 0),
-                'Volume': stock.get('regularMarketVolume', 0),
-                'Revenue Growth (%)': revenue_growth,
-                'EPS Growth (%)': eps_growth,
-                'Sector': financial_data.get('sector', 'Unknown'),
-            })
-    
-    return growth_stocks
+class AlertEngine:
+    """Evaluates alert rules against what changed between snapshots.
+
+    Each scope's previous values are kept by key (symbol, sector or
+    'Market'); an update diffs the new snapshot against them in one
+    vectorized pass and hands only the changed values to the threshold
+    indexes, so the per-rule work grows with the number of threshold
+    crossings, not with universe size times rule count. A key seen for the
+    first time is only recorded: nothing fires until it moves.
+
+    Hysteresis: a rule that fired for a key is latched until the value
+    goes back past the threshold by the rule's hysteresis. Only latches in
+    that band need storing (above the threshold a rule is latched, below
+    the band it is armed), so ``_latched`` stays small, and a key that
+    leaves the universe takes its latches with it. On top of that, a
+    (rule, key) pair doesn't fire twice within ``cooldown`` seconds.
+    Updates are deduplicated by snapshot key, so every session can call
+    update() and the first one does the work.
+    """
+
+    def __init__(self, rules: List[Dict], cooldown: float = ALERT_COOLDOWN, sink: Optional['AlertSink'] = None,
+                 keep: int = 100):
+        self.rules = rules
+        self.cooldown = cooldown
+        self.sink = sink
+        self._lock = threading.Lock()
+        self._indexes: Dict[Tuple[str, str], List[ThresholdIndex]] = {}
+        for scope, field in dict.fromkeys((r['scope'], r['field']) for r in rules):
+            indexes = []
+            for op, sign in (('above', 1.0), ('below', -1.0)):
+                ids = [i for i, r in enumerate(rules) if (r['scope'], r['field'], r['op']) == (scope, field, op)]
+                if ids:
+                    indexes.append(ThresholdIndex(ids, [rules[i]['threshold'] for i in ids],
+                                                  [rules[i]['hysteresis'] for i in ids], sign))
+            self._indexes[scope, field] = indexes
+        self._previous: Dict[str, Tuple[pd.Index, Dict[str, np.ndarray]]] = {}
+        self._latched = set()
+        self._last_fired: Dict[Tuple[int, str], float] = {}
+        self._snapshot_key = None
+        self.recent = deque(maxlen=keep)
+        self.changes = 0        # changed (key, field) values examined
+        self.crossings = 0      # of those, moves across some rule's level
+        self.suppressed = 0     # fires dropped by the cooldown
+
+    def update(self, snapshot_key: Tuple, scopes: Dict[str, Tuple[np.ndarray, Dict]],
+               now: Optional[float] = None) -> List[Dict]:
+        """Evaluate one snapshot and return the alerts it fired.
+
+        ``snapshot_key`` is a tuple of versions that only grow (quote
+        version, then the analytics results' versions). Sessions call this
+        in any order, so one whose key is the last one's, or older in any
+        part, is behind and skipped: diffing it against newer values would
+        report reverse crossings.
+        ``scopes`` maps a scope to (keys, table), where table[field] gives
+        the values aligned with keys (a DataFrame or a dict of arrays).
+        """
+        now = time.time() if now is None else now
+        fired = []
+        with self._lock:
+            last = self._snapshot_key
+            if last is not None and (snapshot_key == last or any(
+                    new < old for new, old in zip(snapshot_key, last))):
+                return fired
+            self._snapshot_key = snapshot_key
+            self._last_fired = {k: t for k, t in self._last_fired.items() if now - t < self.cooldown}
+            for scope, (keys, table) in scopes.items():
+                fields = [f for s, f in self._indexes if s == scope and f in table]
+                if fields:
+                    self._update_scope(scope, keys, table, fields, now, fired)
+            self.recent.extend(fired)
+        if fired:
+            log.info("alerts: %s", "; ".join(a['message'] for a in fired))
+            if self.sink is not None:
+                self.sink.send(fired)
+        return fired
+
+    def _update_scope(self, scope: str, keys, table, fields: List[str], now: float, fired: List[Dict]):
+        index = pd.Index(keys)
+        unique = ~index.duplicated()
+        if not unique.all():
+            index = index[unique]
+        values = {f: np.asarray(table[f], dtype=np.float64)[unique] for f in fields}
+        previous = self._previous.get(scope)
+        self._previous[scope] = (index, values)
+        if previous is None:
+            return
+        old_index, old_values = previous
+        same = old_index.equals(index)
+        if not same and self._latched:
+            departed = set(old_index.difference(index))
+            if departed:
+                self._latched = {(rule_id, key) for rule_id, key in self._latched
+                                 if key not in departed or self.rules[rule_id]['scope'] != scope}
+        positions = np.arange(len(index)) if same else old_index.get_indexer(index)
+        known = positions >= 0
+        for field in fields:
+            if field not in old_values:
+                continue
+            new = values[field][known]
+            old = old_values[field][positions[known]]
+            changed = np.flatnonzero((new != old) & ~np.isnan(new) & ~np.isnan(old))
+            if not changed.size:
+                continue
+            self.changes += changed.size
+            changed_keys = index[known][changed]
+            for ti in self._indexes[scope, field]:
+                self._apply(ti, changed_keys, old[changed], new[changed], now, fired)
+
+    def _apply(self, ti: ThresholdIndex, keys, old: np.ndarray, new: np.ndarray, now: float, fired: List[Dict]):
+        fire_lo, fire_hi, rearm_lo, rearm_hi, rising = ti.ranges(old, new)
+        crossed = np.flatnonzero((fire_hi > fire_lo) | (~rising & (rearm_hi > rearm_lo)))
+        self.crossings += crossed.size
+        for j in crossed.tolist():
+            key = keys[j]
+            if rising[j]:
+                for rule_id in ti.fire_ids[fire_lo[j]:fire_hi[j]].tolist():
+                    if (rule_id, key) in self._latched:
+                        self._latched.discard((rule_id, key))
+                    else:
+                        self._fire(rule_id, key, float(new[j]), now, fired)
+            else:
+                # Fell back through the threshold: latched while in the
+                # hysteresis band, re-armed once below it.
+                self._latched.update((rule_id, key) for rule_id in ti.fire_ids[fire_lo[j]:fire_hi[j]].tolist())
+                self._latched.difference_update(
+                    (rule_id, key) for rule_id in ti.rearm_ids[rearm_lo[j]:rearm_hi[j]].tolist())
+
+    def _fire(self, rule_id: int, key: str, value: float, now: float, fired: List[Dict]):
+        rule = self.rules[rule_id]
+        if rule['symbols'] is not None and key not in rule['symbols']:
+            return
+        last = self._last_fired.get((rule_id, key))
+        if last is not None and now - last < self.cooldown:
+            self.suppressed += 1
+            return
+        self._last_fired[rule_id, key] = now
+        verb = "rose above" if rule['op'] == 'above' else "fell below"
+        fired.append({
+            'time': now,
+            'rule': rule['name'],
+            'scope': rule['scope'],
+            'key': key,
+            'field': rule['field'],
+            'op': rule['op'],
+            'threshold': rule['threshold'],
+            'value': value,
+            'message': f"{key}: {rule['field']} {verb} {rule['threshold']:g} ({value:,.2f})",
+        })
+
+    def recent_alerts(self, seconds: float, now: Optional[float] = None) -> List[Dict]:
+        """Alerts fired in the last ``seconds``, newest first."""
+        cutoff = (time.time() if now is None else now) - seconds
+        with self._lock:
+            return [a for a in reversed(self.recent) if a['time'] >= cutoff]
+
+
+class AlertSink:
+    """Delivers fired alerts to a JSON-lines file and/or a webhook.
+
+    Delivery runs on a daemon thread so a slow webhook never holds up a
+    page run; if the queue backs up, new alerts are dropped and logged.
+    Engines are per source, so sessions showing different stock counts of
+    one universe each detect the same crossing; the sink delivers a
+    (rule, key) alert once per ``cooldown`` whichever engine sent it.
+    """
+
+    def __init__(self, path: Optional[str] = None, url: Optional[str] = None, max_queue: int = 1000,
+                 cooldown: float = ALERT_COOLDOWN):
+        self.path = path
+        self.url = url
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._sent: Dict[Tuple[str, str, str], float] = {}
+        self.duplicates = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name='alert-sink', daemon=True)
+        self._thread.start()
+
+    def send(self, alerts: List[Dict]):
+        with self._lock:
+            now = max(a['time'] for a in alerts)
+            self._sent = {k: t for k, t in self._sent.items() if now - t < self.cooldown}
+            fresh = []
+            for alert in alerts:
+                key = (alert['rule'], alert['scope'], alert['key'])
+                if key in self._sent:
+                    self.duplicates += 1
+                else:
+                    self._sent[key] = alert['time']
+                    fresh.append(alert)
+        for alert in fresh:
+            try:
+                self._queue.put_nowait(alert)
+            except queue.Full:
+                log.warning("alert sink backed up; dropped: %s", alert['message'])
+
+    def _run(self):
+        session = None
+        while True:
+            alert = self._queue.get()
+            record = dict(alert, time=datetime.fromtimestamp(alert['time'], EASTERN).isoformat())
+            if self.path:
+                try:
+                    with open(self.path, 'a') as f:
+                        f.write(json.dumps(record) + '\n')
+                except OSError as e:
+                    log.warning("alert log %s: %s", self.path, e)
+            if self.url:
+                try:
+                    if session is None:
+                        import requests
+                        session = requests.Session()
+                    session.post(self.url, json=record, timeout=5).raise_for_status()
+                except Exception as e:
+                    log.warning("alert webhook %s: %s", self.url, e)
+
+
+@st.cache_resource(show_spinner=False)
+def get_alert_sink() -> Optional[AlertSink]:
+    """Process-wide alert sink when DASHBOARD_ALERT_LOG or DASHBOARD_ALERT_WEBHOOK is set, else None."""
+    if not (ALERT_LOG_PATH or ALERT_WEBHOOK_URL):
+        return None
+    return AlertSink(ALERT_LOG_PATH, ALERT_WEBHOOK_URL, cooldown=ALERT_COOLDOWN)
+
+
+@st.cache_resource(show_spinner=False)
+def get_alert_engine(source: Tuple, rules: List[Dict]) -> AlertEngine:
+    """The process-wide alert engine for one quote source and rule set."""
+    return AlertEngine(rules, ALERT_COOLDOWN, get_alert_sink())
+
+
+def alert_scopes(df: pd.DataFrame, breadth: Dict, sector_df: pd.DataFrame) -> Dict[str, Tuple[np.ndarray, Dict]]:
+    """Keys and values for each alert scope from one refresh's results."""
+    market = {k: np.array([v], dtype=np.float64) for k, v in breadth.items() if isinstance(v, (int, float))}
+    scopes = {'symbol': (df['Symbol'].to_numpy(), df), 'market': (np.array(['Market'], dtype=object), market)}
+    if not sector_df.empty:
+        scopes['sector'] = (sector_df['Sector'].to_numpy(), sector_df)
+    return scopes
 
 
 # ============================================================================
 # CHART FUNCTIONS
 # ============================================================================
 
-def create_volume_chart(df: pd.DataFrame) -> go.Figure:
+def create_volume_chart(df: pd.DataFrame) -> "go.Figure":
     """Create volume leaders bar chart with gain/loss coloring.
 
     Expects the caller to pass an already-ranked/trimmed frame.
     """
+    import plotly.graph_objects as go
+
     df = df.copy()
 
     colors = [COLORS['positive'] if x >= 0 else COLORS['negative'] 
@@ -775,30 +3072,64 @@ def create_volume_chart(df: pd.DataFrame) -> go.Figure:
     return fig
 
 
-def create_sector_heatmap(sector_df: pd.DataFrame) -> go.Figure:
-    """Create sector performance treemap"""
-    if sector_df.empty:
+# Treemap tile sizes: the weight of each symbol in the sector heatmap.
+TREEMAP_WEIGHTS = {
+    'Market Cap': lambda df: df['Market Cap'].to_numpy(dtype=np.float64),
+    'Dollar Volume': lambda df: df['Price'].to_numpy(dtype=np.float64) * df['Volume'].to_numpy(dtype=np.float64),
+}
+TREEMAP_MAX_NODES = 150     # whatever the universe size; Plotly slows badly on a TV past a few hundred
+
+
+def create_sector_heatmap(df: pd.DataFrame, weight_by: str = 'Market Cap') -> "go.Figure":
+    """Create a sector -> symbol treemap sized by weight_by and colored by change.
+
+    Each sector keeps its heaviest symbols as tiles and rolls the rest into
+    one "+N more" tile (analytics.sector_leaves), so the figure stays under
+    TREEMAP_MAX_NODES however many symbols there are.
+    """
+    import plotly.graph_objects as go
+
+    if df.empty:
         return go.Figure()
-    
-    # Filter out "Other" category for cleaner visualization
-    display_df = sector_df[sector_df['Sector'] != 'Other'].copy()
-    
-    if display_df.empty:
+
+    codes = sector_codes(df['Symbol'].to_numpy())
+    weight = TREEMAP_WEIGHTS[weight_by](df)
+    # Leave out the "Other" bucket for a cleaner visualization.
+    weight = np.where(codes == OTHER_SECTOR_CODE, np.nan, weight)
+    tree = analytics.sector_leaves(codes, weight, df['Change (%)'].to_numpy(dtype=np.float64),
+                                   len(SECTOR_NAMES), TREEMAP_MAX_NODES)
+    if not len(tree['present']):
         return go.Figure()
-    
-    # Use equal sizing for better visual balance (not weighted by count)
-    display_df['Size'] = 1
-    
+
+    sector_names = np.array(SECTOR_NAMES, dtype=object)
+    present = tree['present']
+    leaf_rows = tree['leaf_rows']
+    leaf_sectors = sector_names[codes[leaf_rows]]
+    leaf_symbols = df['Symbol'].to_numpy()[leaf_rows]
+    rolled = present[tree['others_count'][present] > 0]
+
+    ids = [*sector_names[present], *(f"{p}/{s}" for p, s in zip(leaf_sectors, leaf_symbols)),
+           *(f"{sector}/others" for sector in sector_names[rolled])]
+    labels = [*sector_names[present], *leaf_symbols, *(f"+{n} more" for n in tree['others_count'][rolled])]
+    parents = [''] * len(present) + [*leaf_sectors, *sector_names[rolled]]
+    # Sector tiles get value 0 and take the sum of their children ("remainder").
+    values = np.concatenate([np.zeros(len(present)), weight[leaf_rows], tree['others_weight'][rolled]])
+    changes = np.concatenate([tree['change'][present], df['Change (%)'].to_numpy(dtype=np.float64)[leaf_rows],
+                              tree['others_change'][rolled]])
+    weights = np.concatenate([tree['weight'][present], weight[leaf_rows], tree['others_weight'][rolled]])
+
     fig = go.Figure(data=[
         go.Treemap(
-            labels=display_df['Sector'],
-            parents=[''] * len(display_df),
-            values=display_df['Size'],
-            text=[f"{change:+.2f}%" for change in display_df['Avg Change']],
+            ids=ids,
+            labels=labels,
+            parents=parents,
+            values=values,
+            branchvalues='remainder',
+            text=[f"{change:+.2f}%" for change in changes],
             textinfo='label+text',
             textfont=dict(size=13, color='white', family='Inter'),
             marker=dict(
-                colors=display_df['Avg Change'],
+                colors=changes,
                 colorscale=[
                     [0, COLORS['negative']],
                     [0.5, '#2a2a3e'],
@@ -807,16 +3138,17 @@ def create_sector_heatmap(sector_df: pd.DataFrame) -> go.Figure:
                 cmid=0,
                 cmin=-5,
                 cmax=5,
-                line=dict(width=2, color=COLORS['bg_primary'])
+                line=dict(width=1, color=COLORS['bg_primary'])
             ),
-            hovertemplate='<b>%{label}</b><br>Avg Change: %{text}<br>Stocks: %{customdata}<extra></extra>',
-            customdata=display_df['Count']
+            hovertemplate=f'<b>%{{label}}</b><br>Change: %{{text}}<br>{weight_by}: %{{customdata}}<extra></extra>',
+            customdata=[format_large_number(w) for w in weights],
+            maxdepth=2,
         )
     ])
     
     fig.update_layout(
         title=dict(
-            text="Sector Heatmap",
+            text=f"Sector Heatmap (by {weight_by.lower()})",
             font=dict(color=COLORS['accent'], size=16),
             x=0
         ),
@@ -828,8 +3160,73 @@ def create_sector_heatmap(sector_df: pd.DataFrame) -> go.Figure:
     return fig
 
 
-def create_gainers_losers_chart(gainers_df: pd.DataFrame, losers_df: pd.DataFrame) -> go.Figure:
+def create_correlation_heatmap(correlation: Dict) -> "go.Figure":
+    """Create the cluster-ordered correlation heatmap from a CorrelationEngine summary.
+
+    Names are ordered so clusters sit on the diagonal, and each cluster of
+    two or more names is outlined.
+    """
+    import plotly.graph_objects as go
+
+    symbols = correlation['symbols']
+    if not symbols:
+        return go.Figure()
+
+    matrix = correlation['matrix']
+    fig = go.Figure(data=[
+        go.Heatmap(
+            z=matrix,
+            x=symbols,
+            y=symbols,
+            zmin=-1,
+            zmax=1,
+            zmid=0,
+            colorscale=[
+                [0, COLORS['negative']],
+                [0.5, '#2a2a3e'],
+                [1, COLORS['positive']]
+            ],
+            colorbar=dict(thickness=10, tickfont=dict(color=COLORS['text_secondary'], size=10)),
+            hovertemplate='<b>%{y} / %{x}</b><br>Correlation: %{z:.2f}<extra></extra>',
+            xgap=1,
+            ygap=1,
+        )
+    ])
+
+    clusters = correlation['clusters']
+    bounds = np.flatnonzero(np.diff(clusters)) + 1
+    for start, end in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(clusters)]))):
+        if end - start > 1:
+            fig.add_shape(type='rect', x0=start - 0.5, x1=end - 0.5, y0=start - 0.5, y1=end - 0.5,
+                          line=dict(color=COLORS['accent'], width=2))
+
+    fig.update_layout(
+        title=dict(
+            text=f"🔗 Moving Together ({correlation['bars']} bars)",
+            font=dict(color=COLORS['accent'], size=16),
+            x=0
+        ),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color=COLORS['text_secondary'], family='Inter'),
+        xaxis=dict(showgrid=False, tickfont=dict(size=10), tickangle=-90),
+        yaxis=dict(showgrid=False, tickfont=dict(size=10), autorange='reversed'),
+        margin=dict(l=60, r=10, t=50, b=60),
+        height=420,
+        hoverlabel=dict(
+            bgcolor=COLORS['bg_secondary'],
+            font_size=12,
+            font_family='Inter'
+        )
+    )
+
+    return fig
+
+
+def create_gainers_losers_chart(gainers_df: pd.DataFrame, losers_df: pd.DataFrame) -> "go.Figure":
     """Create horizontal bar chart for top movers"""
+    import plotly.graph_objects as go
+
     # Prepare data
     gainers = gainers_df.head(5).copy()
     losers = losers_df.head(5).copy()
@@ -893,14 +3290,21 @@ def create_gainers_losers_chart(gainers_df: pd.DataFrame, losers_df: pd.DataFram
 # DISPLAY FUNCTIONS
 # ============================================================================
 
-def display_header(avg_change: float):
-    """Display compact dashboard header with title and status"""
-    et = pytz.timezone('US/Eastern')
-    now = datetime.now(et)
+def display_header(avg_change: Optional[float]):
+    """Display compact dashboard header with title and status.
+
+    avg_change is None until the first quote refresh has completed.
+    """
+    now = datetime.now(EASTERN)
     date_str = now.strftime('%A, %B %d, %Y')
     time_str = now.strftime('%I:%M %p ET')
     
-    status_class, emoji, status_text = get_market_status(avg_change)
+    if avg_change is None:
+        status_class, emoji, status_text = "neutral", "⏳", "LOADING"
+        change_str = ""
+    else:
+        status_class, emoji, status_text = get_market_status(avg_change)
+        change_str = format_change(avg_change)
     market_indicator = "🟢 Open" if is_market_open() else "🔴 Closed"
     
     st.markdown(f"""
@@ -912,14 +3316,30 @@ def display_header(avg_change: float):
             </span>
         </div>
         <div class="market-badge {status_class}">
-            {emoji} {status_text} {format_change(avg_change)}
+            {emoji} {status_text} {change_str}
         </div>
     </div>
     """, unsafe_allow_html=True)
 
 
-def display_metrics_row(df: pd.DataFrame, breadth: Dict, growth_count: int):
-    """Display main metrics row"""
+def display_alert_banner(alerts: List[Dict]):
+    """Banner of recently fired alerts, newest first (nothing when there are none)."""
+    if not alerts:
+        return
+    rows = []
+    for alert in alerts[:ALERT_BANNER_ROWS]:
+        fired_at = datetime.fromtimestamp(alert['time'], EASTERN).strftime('%H:%M')
+        css_class = 'positive' if alert['op'] == 'above' else 'negative'
+        rows.append(f'<div class="alert-row {css_class}"><span class="alert-time">{fired_at}</span> '
+                    f'<strong>{html.escape(alert["rule"])}</strong> · {html.escape(alert["message"])}</div>')
+    more = len(alerts) - ALERT_BANNER_ROWS
+    if more > 0:
+        rows.append(f'<div class="alert-time">+{more} more</div>')
+    st.markdown(f'<div class="alert-banner">{"".join(rows)}</div>', unsafe_allow_html=True)
+
+
+def display_metrics_row(df: pd.DataFrame, breadth: Dict, growth_count: Optional[int]):
+    """Display main metrics row. growth_count is None until the first growth screen."""
     avg_change = df['Change (%)'].mean() if not df.empty else 0
     total_volume = df['Volume'].sum() if not df.empty else 0
     
@@ -967,7 +3387,7 @@ def display_metrics_row(df: pd.DataFrame, breadth: Dict, growth_count: int):
     with cols[5]:
         st.metric(
             "Growth Stocks",
-            growth_count,
+            growth_count if growth_count is not None else "…",
             "Meet all criteria"
         )
 
@@ -1026,14 +3446,15 @@ def display_intraday_metrics(breadth: Dict):
             delta_color="inverse"
         )
 
-    # Relative volume: median today's-vs-3-month-average across stocks
+    # Relative volume: median of today's volume vs the volume expected by
+    # this time of day (3-month average x intraday volume profile)
     with cols[5]:
         rel_vol = breadth.get('rel_volume')
         rel_vol_display = f"{rel_vol:.1f}x" if rel_vol is not None else "N/A"
         st.metric(
             "Rel. Volume",
             rel_vol_display,
-            "median vs 3M avg"
+            "median vs usual by now"
         )
 
     # Market breadth percentage
@@ -1098,7 +3519,7 @@ def display_sector_performance(sector_df: pd.DataFrame):
                         border-radius: 10px;
                         padding: 15px 12px;
                         text-align: center;
-                        height: 110px;
+                        height: 130px;
                     ">
                         <div style="color: #8892b0; font-size: 0.75rem; font-weight: 500; 
                                     text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 8px;">
@@ -1110,10 +3531,48 @@ def display_sector_performance(sector_df: pd.DataFrame):
                         <div style="color: {COLORS['accent']}; font-size: 0.8rem; margin-top: 5px;">
                             {row['Count']} stocks
                         </div>
+                        <div style="color: {COLORS['text_secondary']}; font-size: 0.7rem; margin-top: 3px;">
+                            Cap-wtd {format_change(row['Cap-Weighted Change'])} •
+                            Vol-wtd {format_change(row['Volume-Weighted Change'])}
+                        </div>
                     </div>
                     """, unsafe_allow_html=True)
 
 
+# Column formats for the data tables. Values stay numeric end to end (so the
+# Arrow payload is compact and columns sort numerically in the browser);
+# these specs tell the frontend how to display them.
+def price_column(label: str = "Price"):
+    return st.column_config.NumberColumn(label, format="$%.2f")
+
+
+def change_column(label: str = "Change"):
+    return st.column_config.NumberColumn(label, format="%+.2f%%")
+
+
+def volume_column(label: str = "Volume"):
+    return st.column_config.NumberColumn(label, format="compact")
+
+
+def growth_column(label: str):
+    return st.column_config.NumberColumn(label, format="%.0f%%")
+
+
+def render_table(df: pd.DataFrame, columns: Dict, max_height: int = 400):
+    """Render df with native dtypes, formatted client-side via st.column_config.
+
+    columns maps each source column to show (in order) to its column config
+    or display label; only those columns are serialized.
+    """
+    st.dataframe(
+        df[list(columns)],
+        column_config=columns,
+        width='stretch',
+        hide_index=True,
+        height=min(max_height, 35 * len(df) + 38)
+    )
+
+
 def display_movers_table(df: pd.DataFrame, title: str, emoji: str):
     """Display styled movers table"""
     if df.empty:
@@ -1122,19 +3581,13 @@ def display_movers_table(df: pd.DataFrame, title: str, emoji: str):
     
     st.markdown(f'<div class="section-header">{emoji} {title}</div>', unsafe_allow_html=True)
     
-    # Prepare display dataframe
-    display_df = df[['Symbol', 'Name', 'Price', 'Change (%)', 'Volume']].copy()
-    display_df['Price'] = display_df['Price'].apply(lambda x: f"${x:.2f}")
-    display_df['Change (%)'] = display_df['Change (%)'].apply(format_change)
-    display_df['Volume'] = display_df['Volume'].apply(format_volume)
-    display_df.columns = ['Symbol', 'Name', 'Price', 'Change', 'Volume']
-    
-    st.dataframe(
-        display_df,
-        width='stretch',
-        hide_index=True,
-        height=min(400, 35 * len(display_df) + 38)
-    )
+    render_table(df, {
+        'Symbol': "Symbol",
+        'Name': "Name",
+        'Price': price_column(),
+        'Change (%)': change_column(),
+        'Volume': volume_column(),
+    })
 
 
 def display_growth_stocks(growth_stocks: List[Dict]):
@@ -1153,44 +3606,72 @@ def display_growth_stocks(growth_stocks: List[Dict]):
         st.info("No stocks currently meet all growth criteria. Adjust thresholds in sidebar settings.")
         return
     
-    df = pd.DataFrame(growth_stocks)
-    display_df = df[['Symbol', 'Name', 'Sector', 'Price', 'Revenue Growth (%)', 'EPS Growth (%)', 'Change (%)']].copy()
-    
-    display_df['Price'] = display_df['Price'].apply(lambda x: f"${x:.2f}")
-    display_df['Revenue Growth (%)'] = display_df['Revenue Growth (%)'].apply(
-        lambda x: f"{x:,.0f}%" if pd.notna(x) else "N/A")
-    display_df['EPS Growth (%)'] = display_df['EPS Growth (%)'].apply(
-        lambda x: f"{x:,.0f}%" if pd.notna(x) else "N/A")
-    display_df['Change (%)'] = display_df['Change (%)'].apply(format_change)
-    display_df.columns = ['Symbol', 'Name', 'Sector', 'Price', 'Rev Growth', 'EPS Growth', 'Today']
-    
-    st.dataframe(
-        display_df,
-        width='stretch',
-        hide_index=True,
-        height=min(450, 35 * len(display_df) + 38)
-    )
+    render_table(pd.DataFrame(growth_stocks), {
+        'Symbol': "Symbol",
+        'Name': "Name",
+        'Sector': "Sector",
+        'Price': price_column(),
+        'Revenue Growth (%)': growth_column("Rev Growth"),
+        'EPS Growth (%)': growth_column("EPS Growth"),
+        'Change (%)': change_column("Today"),
+    }, max_height=450)
 
 
-def display_volume_leaders(df: pd.DataFrame, count: int = 10):
-    """Display volume leaders table"""
+def display_volume_leaders(volume_df: pd.DataFrame):
+    """Display volume leaders table (volume_df already holds the top stocks by volume)"""
     st.markdown('<div class="section-header">📊 Volume Leaders</div>', unsafe_allow_html=True)
 
-    volume_df = df.nlargest(count, 'Volume').copy()
-    volume_df['Rank'] = range(1, len(volume_df) + 1)
-    
-    display_df = volume_df[['Rank', 'Symbol', 'Name', 'Volume', 'Price', 'Change (%)']].copy()
-    display_df['Price'] = display_df['Price'].apply(lambda x: f"${x:.2f}")
-    display_df['Change (%)'] = display_df['Change (%)'].apply(format_change)
-    display_df['Volume'] = display_df['Volume'].apply(lambda x: f"{format_volume(x)} shares")
-    display_df.columns = ['#', 'Symbol', 'Name', 'Volume', 'Price', 'Change']
-    
-    st.dataframe(
-        display_df,
-        width='stretch',
-        hide_index=True,
-        height=min(400, 35 * len(display_df) + 38)
-    )
+    render_table(volume_df.assign(Rank=np.arange(1, len(volume_df) + 1)), {
+        'Rank': "#",
+        'Symbol': "Symbol",
+        'Name': "Name",
+        'Volume': volume_column("Volume (shares)"),
+        'Price': price_column(),
+        'Change (%)': change_column(),
+    })
+
+
+def display_unusual_volume(df: pd.DataFrame):
+    """Display the stocks trading furthest above their expected volume for the time of day"""
+    st.markdown('<div class="section-header">🔥 Unusual Volume</div>', unsafe_allow_html=True)
+    if df.empty:
+        st.info("No average volume data available")
+        return
+
+    render_table(df.assign(**{'Rel Volume': df['Volume'] / df['Expected Volume']}), {
+        'Symbol': "Symbol",
+        'Rel Volume': st.column_config.NumberColumn("Rel. Vol", format="%.1fx"),
+        'Volume': volume_column(),
+        'Price': price_column(),
+        'Change (%)': change_column(),
+    })
+
+
+def display_near_highs(df: pd.DataFrame):
+    """Display the stocks trading closest to (or above) their 52-week high"""
+    st.markdown('<div class="section-header">🏔️ Near 52-Week High</div>', unsafe_allow_html=True)
+    if df.empty:
+        st.info("No 52-week range data available")
+        return
+
+    render_table(df.assign(**{'Of High': df['Price'] / df['52W High'] * 100}), {
+        'Symbol': "Symbol",
+        'Price': price_column(),
+        '52W High': price_column("52W High"),
+        'Of High': st.column_config.NumberColumn("% of High", format="%.1f%%"),
+        'Change (%)': change_column(),
+    })
+
+
+def display_correlated_pairs(pairs: pd.DataFrame):
+    """Display the most correlated pairs of intraday returns"""
+    st.markdown('<div class="section-header">🔗 Most Correlated Pairs</div>', unsafe_allow_html=True)
+    render_table(pairs, {
+        'Pair': "Pair",
+        'Correlation': st.column_config.NumberColumn("Correlation", format="%.2f"),
+        'Bars': "Bars",
+        'Sectors': "Sectors",
+    }, max_height=420)
 
 
 # ============================================================================
@@ -1224,12 +3705,40 @@ def render_sidebar(config: Dict) -> Dict:
             help="Minimum 50-day average volume for growth screening")
         config['exclude_biotech'] = st.checkbox(
             "Exclude Biotech/Pharma", config['exclude_biotech'])
+        config['growth_refresh_interval'] = st.slider(
+            "Growth Screen Refresh (min)", 5, 120, config['growth_refresh_interval'],
+            help="The growth screen reruns on its own, slower schedule")
 
         st.markdown("### 📊 Display Settings")
+        watchlists = get_watchlists()
+        if watchlists:
+            universes = [MOST_ACTIVE] + list(watchlists)
+            current = config['universe'] if config['universe'] in universes else MOST_ACTIVE
+            config['universe'] = st.selectbox(
+                "Universe", universes, index=universes.index(current),
+                help="Yahoo's most active stocks, or a watchlist from DASHBOARD_WATCHLISTS"
+            )
         config['stock_count'] = st.slider(
             "Stocks to Fetch", 25, 100, config['stock_count'],
+            disabled=config['universe'] != MOST_ACTIVE,
             help="More stocks = better sector coverage but slower load"
         )
+        config['heatmap_weight'] = st.selectbox(
+            "Heatmap Tile Size", list(TREEMAP_WEIGHTS), index=list(TREEMAP_WEIGHTS).index(config['heatmap_weight']),
+            help="Size sector heatmap tiles by market cap or by today's dollar volume"
+        )
+        config['show_correlation'] = st.checkbox(
+            "Correlation Panel", config['show_correlation'],
+            help="Heatmap and top pairs of names whose intraday returns move together"
+        )
+        config['show_alerts'] = st.checkbox(
+            "Alert Banner", config['show_alerts'],
+            help="Show alerts fired in the last few minutes (rules from DASHBOARD_ALERT_RULES)"
+        )
+        config['low_power'] = st.checkbox(
+            "Low-Power Display", config['low_power'],
+            help="Drop blur, hover transitions and animations for weak kiosk hardware"
+        )
         config['top_gainers_count'] = st.slider(
             "Top Gainers", 3, 25, config['top_gainers_count'],
             help="Rows shown in the Top Gainers table"
@@ -1242,27 +3751,180 @@ def render_sidebar(config: Dict) -> Dict:
             "Volume Leaders", 3, 25, config['volume_leaders_count'],
             help="Bars/rows shown in the Volume Leaders chart and table"
         )
+        config['extra_rankings_count'] = st.slider(
+            "Unusual Volume / Near High", 3, 25, config['extra_rankings_count'],
+            help="Rows shown in the Unusual Volume and Near 52-Week High tables"
+        )
+
+        st.markdown("### 📡 Streaming")
+        config['streaming_enabled'] = st.checkbox(
+            "Streaming Mode", config['streaming_enabled'],
+            help="Apply live websocket ticks and redraw every few seconds"
+        )
+        config['stream_url'] = st.text_input(
+            "Stream URL", config['stream_url'],
+            disabled=not config['streaming_enabled']
+        )
+        config['stream_ui_interval'] = st.slider(
+            "UI Update (sec)", 1, 10, config['stream_ui_interval'],
+            disabled=not config['streaming_enabled'],
+            help="Ticks are coalesced and the page redrawn at this cadence"
+        )
 
         st.markdown("---")
         
         if st.button("🔄 Force Refresh", width='stretch'):
             st.cache_data.clear()
+            get_fundamentals_cache().clear()
             st.rerun()
         
         # Status indicators
         st.markdown("---")
         market_status = "🟢 Open" if is_market_open() else "🔴 Closed"
         refresh_min = config['refresh_interval_market_open'] if is_market_open() else config['refresh_interval_market_closed']
+        if config['universe'] in watchlists:
+            stocks_str = f"{config['universe']} ({len(watchlists[config['universe']])})"
+        else:
+            stocks_str = config['stock_count']
         
         st.markdown(f"""
         **Market:** {market_status}  
         **Refresh:** Every {refresh_min} min  
-        **Stocks:** {config['stock_count']}
+        **Stocks:** {stocks_str}
         """)
     
     return config
 
 
+# ============================================================================
+# PROFILING
+# ============================================================================
+
+class ProfileStore:
+    """Rotating directory of cProfile dumps, one file per profiled fragment run.
+
+    Files are named <timestamp>-<fragment>.prof and open with pstats or
+    snakeviz; once there are more than ``keep`` the oldest are deleted.
+    """
+
+    def __init__(self, directory: str, keep: int = 50):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def save(self, name: str, profiler) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{datetime.now(EASTERN):%Y%m%d-%H%M%S-%f}-{name}.prof")
+        profiler.dump_stats(path)
+        with self._lock:
+            files = sorted(f for f in os.listdir(self.directory) if f.endswith('.prof'))
+            for old in files[:-self.keep] if self.keep > 0 else []:
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except OSError:
+                    pass
+        return path
+
+
+@st.cache_resource(show_spinner=False)
+def get_profile_store() -> ProfileStore:
+    """The process-wide profile directory."""
+    return ProfileStore(PROFILE_DIR, PROFILE_KEEP)
+
+
+def profile_summary(profiler, top_n: int = PROFILE_TOP_N) -> pd.DataFrame:
+    """Hottest functions of one run by cumulative time."""
+    import pstats
+
+    stats = pstats.Stats(profiler)
+    rows = [{
+        'Function': f"{func[2]} ({os.path.basename(func[0])}:{func[1]})",
+        'Calls': nc,
+        'Own (ms)': tt * 1000,
+        'Cumulative (ms)': ct * 1000,
+    } for func, (cc, nc, tt, ct, callers) in stats.stats.items()]
+    return pd.DataFrame(rows).nlargest(top_n, 'Cumulative (ms)') if rows else pd.DataFrame(rows)
+
+
+def profiled(name: str, enabled: bool):
+    """Decorator that profiles each call of a fragment when enabled.
+
+    Applied under @st.fragment so every fragment rerun is profiled on its
+    own. When disabled it returns the function itself, so the off state
+    costs nothing per run. Each run's profile goes to the ProfileStore and
+    its summary to session state for the diagnostics expander.
+    """
+    def decorate(fn):
+        if not enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            import cProfile
+
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Python 3.12+ allows one active profiler per process; another
+                # session holds it, so run this one unprofiled.
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler.disable()
+                path = get_profile_store().save(name, profiler)
+                st.session_state.setdefault('profiles', {})[name] = {
+                    'time': datetime.now(EASTERN),
+                    'seconds': time.perf_counter() - started,
+                    'path': path,
+                    'summary': profile_summary(profiler),
+                }
+        return wrapper
+    return decorate
+
+
+def display_profiles(profiles: Dict):
+    """Diagnostics expander with the latest profile of each fragment."""
+    with st.expander(f"🔬 Diagnostics: fragment profiles ({len(profiles)})"):
+        if not profiles:
+            st.caption("No fragment has finished a profiled run yet.")
+        for name, profile in sorted(profiles.items()):
+            st.markdown(f"**{name}** — {profile['seconds'] * 1000:,.0f} ms at "
+                        f"{profile['time'].strftime('%H:%M:%S ET')} • `{profile['path']}`")
+            render_table(profile['summary'], {
+                'Function': "Function",
+                'Calls': st.column_config.NumberColumn("Calls", format="%d"),
+                'Own (ms)': st.column_config.NumberColumn("Own (ms)", format="%.1f"),
+                'Cumulative (ms)': st.column_config.NumberColumn("Cumulative (ms)", format="%.1f"),
+            }, max_height=560)
+
+
+# ============================================================================
+# WARM-UP
+# ============================================================================
+
+def warm_caches(config: Dict) -> Dict:
+    """Run the cold data pipeline once so the first real session hits warm caches.
+
+    Called from a headless session that server.py opens at startup (see
+    main()). Fills the screener snapshot and the fundamentals cache for the
+    default configuration; the rest of that headless page run then builds
+    every derived frame and chart. Returns a readiness report.
+    """
+    started = time.perf_counter()
+    _, stocks_data = get_screener_snapshot().get(config['stock_count'])
+    growth_stocks = screen_growth_stocks(stocks_data, config) if stocks_data else []
+    return {
+        'ready': bool(stocks_data),
+        'screener_quotes': len(stocks_data),
+        'growth_stocks': len(growth_stocks),
+        'seconds': round(time.perf_counter() - started, 2),
+        'error': st.session_state.get('last_error'),
+    }
+
+
 # ============================================================================
 # MAIN APPLICATION
 # ============================================================================
@@ -1277,82 +3939,171 @@ def main():
         st.session_state['last_error'] = None
     if 'cached_stocks' not in st.session_state:
         st.session_state['cached_stocks'] = None
+        st.session_state['cached_version'] = None
+        st.session_state['cached_tag'] = ()
     if 'last_refresh_time' not in st.session_state:
-        st.session_state['last_refresh_time'] = datetime.now(pytz.timezone('US/Eastern'))
+        st.session_state['last_refresh_time'] = datetime.now(EASTERN)
     
     config = st.session_state['config']
 
-    # Inject custom CSS
-    inject_custom_css()
+    # Warm-up run opened by server.py before any display connects: fill the
+    # caches first, then fall through and render the whole page once so the
+    # derived frames and figures are built too. The report goes last so the
+    # server only reads it after the full page has finished. The run is
+    # keyed by server.py's per-process token, so clients can't trigger it.
+    warmup_report = None
+    warmup_token = os.environ.get('DASHBOARD_WARMUP_TOKEN')
+    if warmup_token and hmac.compare_digest(st.query_params.get('warmup', ''), warmup_token):
+        warmup_report = warm_caches(config)
 
     # Render sidebar and get updated config
     config = render_sidebar(config)
     st.session_state['config'] = config
 
-    # The dashboard body runs inside a fragment with run_every set, so Streamlit
-    # reruns only this section on the refresh interval instead of re-executing
-    # the whole script. That avoids rebuilding the sidebar/CSS and the full-page
-    # flicker on every refresh. Sidebar interactions still trigger a full rerun,
-    # which re-reads run_every and picks up any changed interval.
-    refresh_interval = get_refresh_interval(config)
+    # Inject custom CSS (after the sidebar, so a toggled Low-Power Display
+    # applies on the same run)
+    low_power = {'1': True, '0': False}.get(st.query_params.get('lowpower'), config['low_power'])
+    inject_custom_css(low_power)
+
+    # The page is split into fragments with their own run_every, so Streamlit
+    # reruns each section on its own cadence instead of re-executing the whole
+    # script. The clock and countdown tick every second from session state,
+    # the quote-driven sections follow the refresh interval, and the slow
+    # growth screen runs on its own much longer interval without holding up
+    # anything else. Sidebar interactions still trigger a full rerun, which
+    # re-reads every run_every and picks up any changed interval.
+    # In streaming mode the quote sections instead run at the short UI cadence
+    # and redraw from the live quote table, coalescing every tick that arrived
+    # since the previous run into a single recompute.
+    # When replaying a tape the live intervals are scaled to the playback speed.
+    if config['streaming_enabled']:
+        refresh_interval = config['stream_ui_interval']
+    else:
+        refresh_interval = get_refresh_interval(config)
+    growth_interval = config['growth_refresh_interval'] * 60
+    replay = get_tape_replay()
+    if replay is not None:
+        refresh_interval = replay.refresh_interval(refresh_interval)
+        growth_interval = replay.refresh_interval(growth_interval)
+
+    # Profiling wraps each fragment run in cProfile; when it is off the
+    # fragments are left undecorated.
+    profiling = PROFILE_ENABLED or st.query_params.get('profile') == '1'
+
+    @st.fragment(run_every=1)
+    @profiled('clock', profiling)
+    def render_clock():
+        display_header(st.session_state.get('avg_change'))
 
     @st.fragment(run_every=refresh_interval)
-    def render_dashboard():
+    @profiled('quotes', profiling)
+    def render_quotes():
         config = st.session_state['config']
 
-        # Fetch market data
+        # Fetch market data. The snapshot is shared by every session; each
+        # takes its own stock_count slice of it.
+        snapshot, count = get_universe(config)
         with st.spinner(""):
-            stocks_data = get_most_active_stocks(config['stock_count'])
+            screener_version, stocks_data = snapshot.get(count)
+        universe_tag = snapshot.tag
 
         # Handle data fetch errors
         if not stocks_data:
-            reason = st.session_state.get('last_error')
+            # A failure served from the fetch cache doesn't set last_error
+            # again, but the circuit state is shared, so report that instead.
+            endpoint = 'quote' if get_watchlists().get(config['universe']) else 'screener'
+            reason = st.session_state.get('last_error') or get_circuit_breaker(endpoint).describe()
             detail = f" ({reason})" if reason else ""
             if st.session_state['cached_stocks']:
                 stocks_data = st.session_state['cached_stocks']
+                screener_version = st.session_state['cached_version']
+                universe_tag = st.session_state['cached_tag']
                 st.warning(f"⚠️ Using cached data - live feed temporarily unavailable{detail}")
             else:
                 st.error(f"❌ Unable to fetch market data. Please check connection and try again.{detail}")
                 return
         else:
             st.session_state['cached_stocks'] = stocks_data
+            st.session_state['cached_version'] = screener_version
+            st.session_state['cached_tag'] = universe_tag
             st.session_state['last_error'] = None
-            st.session_state['last_refresh_time'] = datetime.now(pytz.timezone('US/Eastern'))
-
-        # Convert to DataFrame
-        df = pd.DataFrame([{
-            'Symbol': s.get('symbol', ''),
-            'Name': s.get('shortName', 'N/A'),
-            'Price': s.get('regularMarketPrice', 0),
-            'Change (%)': s.get('regularMarketChangePercent', 0),
-            'Volume': s.get('regularMarketVolume', 0),
-            'Avg Volume': s.get('averageDailyVolume3Month', 0),
-            '52W High': s.get('fiftyTwoWeekHigh', 0),
-            '52W Low': s.get('fiftyTwoWeekLow', 0),
-        } for s in stocks_data])
+            st.session_state['last_refresh_time'] = datetime.now(EASTERN)
+
+        # Everything below is derived from one snapshot, so it is computed
+        # once per (snapshot, relevant settings) and shared by every session
+        # through the results cache. Streaming mode snapshots the live quote
+        # table, which already holds the whole universe; the screener
+        # snapshot then only seeds reference fields (once per version).
+        # Keys also carry the volume-profile minute: 'Expected Volume' (and
+        # the relative volumes, rankings and breadth built on it) moves with
+        # the clock, not only with new quotes.
+        results = get_results_cache()
+        minute = session_minute(market_clock())
+        if config['streaming_enabled']:
+            stream = get_quote_stream(config['stream_url'])
+            if stream.seeded_version != screener_version:
+                stream.table.seed(stocks_data)
+                stream.seeded_version = screener_version
+            # Version and frame come from one snapshot() call, so results
+            # are never keyed by a version other than the data they describe.
+            version, table_df = stream.table.snapshot()
+            source = ('stream', config['stream_url'])
+            snap = source + (version, minute)
+            df = results.get(('quotes',) + snap, lambda: with_expected_volume(table_df, minute))
+        else:
+            source, version = ('screener', config['universe'], count) + universe_tag, screener_version
+            snap = source + (version, minute)
+            df = results.get(('quotes',) + snap, lambda: with_expected_volume(stocks_data.frame(), minute))
 
         # Calculate derived data
-        breadth = calculate_breadth_indicators(df)
-        sector_df = calculate_sector_performance(df)
-        avg_change = df['Change (%)'].mean() if not df.empty else 0
+        # Breadth and sector aggregates are the CPU-heavy stages; with a
+        # compute pool configured they run in worker processes, and the page
+        # shows the previous snapshot's result until the new one is ready.
+        breadth_version, breadth = analytics_stage('breadth', source, (version, minute), df)
+        sector_version, sector_df = analytics_stage('sectors', source, (version, minute), df)
+        st.session_state['avg_change'] = df['Change (%)'].mean() if not df.empty else 0
 
-        # Sort for display
-        gainers_df = df[df['Change (%)'] > 0].nlargest(config['top_gainers_count'], 'Change (%)')
-        losers_df = df[df['Change (%)'] < 0].nsmallest(config['top_losers_count'], 'Change (%)')
+        history = get_history_store()
+        if history is not None:
+            history.record(df, breadth, sector_df)
 
-        # Screen growth stocks
-        growth_stocks = screen_growth_stocks(stocks_data, config)
+        # Alerts are evaluated once per snapshot for the whole process
+        # (whichever session gets here first), against what changed since
+        # the previous one; every session shows the shared recent list.
+        rules = get_alert_rules()
+        if rules and not df.empty:
+            engine = get_alert_engine(source, rules)
+            engine.update((version, breadth_version, sector_version), alert_scopes(df, breadth, sector_df))
+            if config['show_alerts']:
+                display_alert_banner(engine.recent_alerts(ALERT_BANNER_SECONDS))
 
-        # ========== DASHBOARD LAYOUT ==========
+        # Rank for display: every ranked view (movers, volume leaders,
+        # unusual volume, near 52-week high) comes from one ranking index per
+        # source, shared by the charts and tables. In streaming mode it only
+        # rescores the rows that ticked since its last update.
+        ranking = get_ranking_index(source)
+        changed = stream.table.changed_rows(ranking.version) if (
+            config['streaming_enabled'] and ranking.version is not None) else None
+        if changed is not None:
+            changed = changed[changed < len(df)]    # rows added since this snapshot aren't in df
+        rankings = results.get(('rankings',) + snap, lambda: ranking.update(version, df, changed, epoch=minute))
 
-        # Wrap in div for burn-in prevention
-        st.markdown('<div class="dashboard-wrapper">', unsafe_allow_html=True)
+        # Read-only API (server.py /api): publish this source's results once
+        # per snapshot and analytics version; the growth fragment adds its list.
+        snapshot_store.STORE.publish(source, (version, breadth_version, sector_version), version,
+                                     df, breadth, sector_df, rankings)
+        st.session_state['snapshot_source'] = source
 
-        # Header
-        display_header(avg_change)
+        gainers_count = config['top_gainers_count']
+        losers_count = config['top_losers_count']
+        volume_count = config['volume_leaders_count']
+        gainers_df = df.take(rankings['gainers'][:gainers_count])
+        losers_df = df.take(rankings['losers'][:losers_count])
+        volume_df = df.take(rankings['volume'][:volume_count])
 
-        # Main metrics row
-        display_metrics_row(df, breadth, len(growth_stocks))
+        # Main metrics row. The growth count comes from the growth fragment's
+        # last run and may lag it by up to one quote refresh.
+        display_metrics_row(df, breadth, st.session_state.get('growth_count'))
 
         st.markdown("---")
 
@@ -1365,11 +4116,13 @@ def main():
         col1, col2 = st.columns(2)
 
         with col1:
-            fig = create_gainers_losers_chart(gainers_df, losers_df)
+            fig = results.get(('movers_chart',) + snap + (gainers_count, losers_count),
+                              lambda: create_gainers_losers_chart(gainers_df, losers_df))
             st.plotly_chart(fig, width='stretch', config={'displayModeBar': False})
 
         with col2:
-            fig = create_volume_chart(df.nlargest(config['volume_leaders_count'], 'Volume'))
+            fig = results.get(('volume_chart',) + snap + (volume_count,),
+                              lambda: create_volume_chart(volume_df))
             st.plotly_chart(fig, width='stretch', config={'displayModeBar': False})
 
         st.markdown("---")
@@ -1382,9 +4135,32 @@ def main():
 
         with col2:
             if not sector_df.empty:
-                fig = create_sector_heatmap(sector_df)
+                weight_by = config['heatmap_weight']
+                fig = results.get(('sector_heatmap',) + snap + (weight_by,),
+                                  lambda: create_sector_heatmap(df, weight_by))
                 st.plotly_chart(fig, width='stretch', config={'displayModeBar': False})
 
+        # Co-movement: the engine takes a bar from each new snapshot whether
+        # or not this session shows the panel, so the correlations cover the
+        # whole session when it's turned on.
+        engine = get_correlation_engine(source)
+        correlation = results.get(('correlation',) + snap, lambda: engine.update(version, df, market_clock()))
+        if config['show_correlation']:
+            st.markdown("---")
+            if correlation['pairs'].empty:
+                st.info(f"🔗 Collecting intraday bars for correlations: {correlation['bars']} of "
+                        f"{CORRELATION_MIN_BARS} so far")
+            else:
+                col1, col2 = st.columns([3, 2])
+
+                with col1:
+                    fig = results.get(('correlation_heatmap',) + snap,
+                                      lambda: create_correlation_heatmap(correlation))
+                    st.plotly_chart(fig, width='stretch', config={'displayModeBar': False})
+
+                with col2:
+                    display_correlated_pairs(correlation['pairs'])
+
         st.markdown("---")
 
         # Tables section
@@ -1399,21 +4175,67 @@ def main():
         st.markdown("---")
 
         # Volume Leaders
-        display_volume_leaders(df, config['volume_leaders_count'])
+        display_volume_leaders(volume_df)
 
         st.markdown("---")
 
-        # Growth Stocks
+        col1, col2 = st.columns(2)
+        extra_count = config['extra_rankings_count']
+
+        with col1:
+            display_unusual_volume(df.take(rankings['unusual_volume'][:extra_count]))
+
+        with col2:
+            display_near_highs(df.take(rankings['near_high'][:extra_count]))
+
+    @st.fragment(run_every=growth_interval)
+    @profiled('growth', profiling)
+    def render_growth():
+        config = st.session_state['config']
+        stocks_data = st.session_state['cached_stocks']
+        if not stocks_data:
+            return
+
+        growth_key = ('growth', config['universe']) + st.session_state['cached_tag'] + (
+            st.session_state['cached_version'], len(stocks_data),
+            config['growth_min_price'], config['growth_revenue_threshold'],
+            config['growth_eps_threshold'], config['growth_min_volume'], config['exclude_biotech'])
+        growth_stocks = get_results_cache().get(growth_key, lambda: screen_growth_stocks(stocks_data, config))
+        if 'snapshot_source' in st.session_state:
+            criteria = {k: config[k] for k in ('growth_min_price', 'growth_revenue_threshold',
+                                               'growth_eps_threshold', 'growth_min_volume', 'exclude_biotech')}
+            snapshot_store.STORE.publish_growth(st.session_state['snapshot_source'], growth_key, criteria,
+                                                growth_stocks)
+        st.session_state['growth_count'] = len(growth_stocks)
         display_growth_stocks(growth_stocks)
 
-        # Close wrapper
-        st.markdown('</div>', unsafe_allow_html=True)
+    @st.fragment(run_every=1)
+    @profiled('footer', profiling)
+    def render_footer():
+        config = st.session_state['config']
+        now = datetime.now(EASTERN)
+
+        if config['streaming_enabled']:
+            stream = get_quote_stream(config['stream_url'])
+            if stream.connected:
+                stream_status = f"🟢 Streaming • {len(stream.table)} symbols • {stream.ticks_per_second():,.0f} ticks/s"
+            else:
+                stream_status = f"🔴 Stream disconnected{f' ({stream.last_error})' if stream.last_error else ''}"
+            st.markdown(f"""
+            <div class="last-updated">
+                {stream_status} •
+                Last tick: {datetime.fromtimestamp(stream.last_tick_time, EASTERN).strftime('%H:%M:%S ET') if stream.last_tick_time else 'none yet'} •
+                UI update: every {config['stream_ui_interval']}s
+            </div>
+            """, unsafe_allow_html=True)
+            return
 
-        # Footer with timestamp and countdown
-        et = pytz.timezone('US/Eastern')
-        now = datetime.now(et)
-        refresh_min = config['refresh_interval_market_open'] if is_market_open() else config['refresh_interval_market_closed']
-        refresh_sec = refresh_min * 60
+        refresh_sec = refresh_interval
+        if replay is not None:
+            speed = f"{replay.speed:g}×" if replay.speed > 0 else "max speed"
+            interval_str = f"{refresh_sec}s (tape replay at {speed})"
+        else:
+            interval_str = f"{refresh_sec // 60} min"
 
         # Calculate time until next refresh
         last_refresh = st.session_state.get('last_refresh_time', now)
@@ -1432,12 +4254,32 @@ def main():
         <div class="last-updated">
             Last updated: {last_refresh.strftime('%H:%M:%S ET')} •
             Next refresh in: <strong style="color: {COLORS['accent']};">{countdown_str}</strong> •
-            Interval: {refresh_min} min
+            Interval: {interval_str}
         </div>
         """, unsafe_allow_html=True)
 
-    render_dashboard()
+    # ========== DASHBOARD LAYOUT ==========
+
+    # Wrap in div for burn-in prevention
+    st.markdown('<div class="dashboard-wrapper">', unsafe_allow_html=True)
+
+    render_clock()
+    render_quotes()
+
+    st.markdown("---")
+
+    render_growth()
+
+    # Close wrapper
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    render_footer()
+
+    if profiling:
+        st.fragment(run_every=5)(lambda: display_profiles(st.session_state.get('profiles', {})))()
 
+    if warmup_report is not None:
+        st.json(warmup_report)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,193 @@
+"""
+Typed, columnar decoding of Yahoo quote payloads.
+
+Screener and quote responses are read straight into one typed array per
+field, following QUOTE_SCHEMA, instead of building a dict per row and
+letting pandas infer types. With msgspec installed the JSON is decoded
+against the schema itself: only the schema's fields are materialized
+(unused fields are skipped by the parser, not decoded into dicts) and types
+are validated on the way. Without it, or when a payload fails validation,
+the body is decoded with orjson (or json) and each column is read with
+defaults for missing, null or invalid values. The DataFrame is then
+assembled from the arrays without copying the numeric columns.
+
+Lives outside app.py because QuoteColumns is returned from st.cache_data
+functions, which pickle their results: a class defined in the Streamlit
+script (__main__) is redefined on every rerun, so pickling would race
+with other sessions' reruns.
+"""
+
+import logging
+import operator
+import sys
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    import msgspec  # optional: schema-typed decoding
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson  # optional: several times faster than json for large payloads
+    json_loads = orjson.loads
+except ImportError:
+    import json
+    json_loads = json.loads
+
+log = logging.getLogger('dashboard')
+
+# Yahoo field -> (DataFrame column, dtype, value used when the field is
+# missing, null or not a valid number). Rows without a symbol are dropped.
+QUOTE_SCHEMA = {
+    'symbol': ('Symbol', object, ''),
+    'shortName': ('Name', object, 'N/A'),
+    'regularMarketPrice': ('Price', np.float64, 0.0),
+    'regularMarketChangePercent': ('Change (%)', np.float64, 0.0),
+    'regularMarketVolume': ('Volume', np.int64, 0),
+    'averageDailyVolume3Month': ('Avg Volume', np.int64, 0),
+    'fiftyTwoWeekHigh': ('52W High', np.float64, 0.0),
+    'fiftyTwoWeekLow': ('52W Low', np.float64, 0.0),
+    'marketCap': ('Market Cap', np.float64, 0.0),
+    # Epoch seconds of the upcoming earnings report, or the latest once it
+    # has passed; 0 when unknown. Drives fundamentals invalidation in app.py.
+    'earningsTimestamp': ('Earnings Time', np.int64, 0),
+}
+QUOTE_FIELDS = tuple(QUOTE_SCHEMA)
+
+_decoders: Dict[tuple, object] = {}
+
+
+def _schema_decoder(path: tuple):
+    """msgspec decoder for a payload with the quote list at path (cached per path)."""
+    decoder = _decoders.get(path)
+    if decoder is None:
+        python_type = {object: str, np.float64: float, np.int64: int}
+        quote = msgspec.defstruct('Quote', [(field, python_type[dtype], default)
+                                            for field, (_, dtype, default) in QUOTE_SCHEMA.items()])
+        node = List[quote]
+        for key in reversed(path):
+            node = List[node] if isinstance(key, int) else msgspec.defstruct(key, [(key, node)])
+        decoder = _decoders[path] = msgspec.json.Decoder(node)
+    return decoder
+
+
+def _coerce(values: Iterable, dtype, default, field: str, n: int) -> np.ndarray:
+    """Slow path for a column that failed the fast typed read: replace invalid values."""
+    out = np.empty(n, dtype=dtype)
+    invalid = 0
+    for i, value in enumerate(values):
+        try:
+            out[i] = default if value is None or isinstance(value, (str, bool)) else value
+            invalid += isinstance(value, (str, bool))
+        except (TypeError, ValueError, OverflowError):
+            out[i] = default
+            invalid += 1
+    if invalid:
+        log.warning("%d invalid '%s' values replaced with %r", invalid, field, default)
+    return out
+
+
+class QuoteColumns:
+    """A quote snapshot as one typed array per schema column.
+
+    Supports len(), slicing and boolean/integer indexing (returning a new
+    QuoteColumns), item access by column name, and conversion to a
+    DataFrame or back to Yahoo-style records (for the market tape).
+    """
+
+    __slots__ = ('arrays',)
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+
+    @classmethod
+    def empty(cls) -> 'QuoteColumns':
+        return cls({column: np.empty(0, dtype=dtype) for column, dtype, _ in QUOTE_SCHEMA.values()})
+
+    @classmethod
+    def from_records(cls, quotes: Sequence[Dict]) -> 'QuoteColumns':
+        """Read Yahoo quote dicts into typed columns, one pass per field."""
+        n = len(quotes)
+        arrays = {}
+        for field, (column, dtype, default) in QUOTE_SCHEMA.items():
+            if dtype is object:
+                values = np.empty(n, dtype=object)
+                values[:] = [q.get(field) or default for q in quotes]
+                if field == 'symbol':
+                    values[:] = [sys.intern(s) if isinstance(s, str) else str(s) for s in values]
+            else:
+                try:
+                    values = np.fromiter((q.get(field) or default for q in quotes), dtype=dtype, count=n)
+                except (TypeError, ValueError, OverflowError):
+                    values = _coerce((q.get(field) for q in quotes), dtype, default, field, n)
+            arrays[column] = values
+        return cls(arrays)._drop_unnamed()
+
+    @classmethod
+    def from_structs(cls, quotes: List) -> 'QuoteColumns':
+        """Read schema-typed msgspec structs into columns; their types are already validated."""
+        n = len(quotes)
+        arrays = {}
+        for field, (column, dtype, default) in QUOTE_SCHEMA.items():
+            values = map(operator.attrgetter(field), quotes)
+            if dtype is object:
+                array = np.empty(n, dtype=object)
+                array[:] = list(map(sys.intern, values)) if field == 'symbol' else [v or default for v in values]
+            else:
+                array = np.fromiter(values, dtype=dtype, count=n)
+            arrays[column] = array
+        return cls(arrays)._drop_unnamed()
+
+    @classmethod
+    def from_json(cls, content: bytes, path: Sequence) -> 'QuoteColumns':
+        """Decode a response body and read the quote list found at path."""
+        path = tuple(path)
+        if msgspec is not None:
+            try:
+                payload = _schema_decoder(path).decode(content)
+                for key in path:
+                    payload = payload[key] if isinstance(key, int) else getattr(payload, key)
+                return cls.from_structs(payload)
+            except msgspec.ValidationError as e:
+                log.warning("quote payload failed schema validation (%s); decoding leniently", e)
+        payload = json_loads(content)
+        for key in path:
+            payload = payload[key]
+        return cls.from_records(payload)
+
+    def _drop_unnamed(self) -> 'QuoteColumns':
+        missing = self.arrays['Symbol'] == ''
+        if missing.any():
+            log.warning("dropped %d quotes without a symbol", int(missing.sum()))
+            return self[~missing]
+        return self
+
+    @classmethod
+    def concat(cls, parts: List['QuoteColumns']) -> 'QuoteColumns':
+        if not parts:
+            return cls.empty()
+        return cls({column: np.concatenate([p.arrays[column] for p in parts]) for column in parts[0].arrays})
+
+    def __len__(self) -> int:
+        return len(self.arrays['Symbol'])
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.arrays[key]
+        return QuoteColumns({column: values[key] for column, values in self.arrays.items()})
+
+    def frame(self) -> pd.DataFrame:
+        """DataFrame over the arrays; numeric columns are not copied."""
+        return pd.DataFrame(self.arrays, copy=False)
+
+    def records(self) -> List[Dict]:
+        """Yahoo-style quote dicts, for the tape and other record consumers."""
+        columns = [(field, self.arrays[column].tolist()) for field, (column, _, _) in QUOTE_SCHEMA.items()]
+        return [dict(zip(QUOTE_FIELDS, row)) for row in zip(*(values for _, values in columns))]
+
+    def fingerprint(self) -> int:
+        """Cheap content hash of symbols, prices and volumes."""
+        return hash((tuple(self.arrays['Symbol']), self.arrays['Price'].tobytes(), self.arrays['Volume'].tobytes()))
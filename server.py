@@ -0,0 +1,293 @@
+"""
+ASGI entry point: serves app.py and warms its caches before displays connect.
+
+    streamlit run server.py
+
+On startup a headless session runs the dashboard once with ?warmup=<token>,
+which fills the screener snapshot and fundamentals caches and builds every
+derived frame and chart, all in this server process. The token is generated
+per process and handed to app.py in DASHBOARD_WARMUP_TOKEN, so only this
+session, not any client adding a query parameter, can start a warm-up.
+GET /readyz returns 503 until that run has succeeded, so a load balancer or
+orchestrator health check can hold traffic until the caches are hot. A
+failed warm-up (e.g. Yahoo down) is retried with backoff.
+
+GET /frametime compares the normal and low-power (?lowpower=1) renderings:
+it loads the dashboard in each mode in a full-size frame, waits for it to
+settle, then records requestAnimationFrame intervals and long tasks for a
+fixed window and reports frame-time percentiles per mode. Open it in the
+kiosk's browser, or headless via tools/frame_time.py; the results are also
+left in window.frameTimeResults for automation.
+
+    /frametime?seconds=30&settle=15&modes=0,1
+
+GET /api/snapshot serves the dashboard's latest computed snapshot (see
+snapshot_store.py) to other tools: normalized quotes, breadth, the sector
+table, the ranked top-K views and the growth list, with the snapshot
+version and generation time. /api/snapshot/<part> serves one part; tabular
+parts come as an Arrow IPC stream with ?format=arrow or an Accept header
+asking for it. Responses carry an ETag, and a matching If-None-Match gets
+an empty 304. The Age header gives the snapshot's age in seconds.
+GET /api/sources lists the published sources; ?source= picks one (default:
+the most recently updated).
+"""
+
+import asyncio
+import json
+import os
+import secrets
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+import streamlit as st
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse, Response
+from starlette.routing import Route
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.runtime import Runtime
+
+import snapshot_store
+
+WARMUP_TIMEOUT = 300        # seconds for one headless page run
+WARMUP_RETRY_MAX = 300      # cap on the backoff between failed attempts
+WARMUP_TOKEN = secrets.token_urlsafe(24)
+os.environ['DASHBOARD_WARMUP_TOKEN'] = WARMUP_TOKEN
+
+# Readiness as reported by /readyz. Only the warm-up task writes it.
+READINESS: Dict = {
+    'status': 'starting',    # starting -> warming -> ready | failed
+    'attempts': 0,
+    'started_at': time.time(),
+    'ready_at': None,
+    'report': None,
+    'error': None,
+}
+
+
+class HeadlessClient:
+    """SessionClient that discards output but watches for the end of the run.
+
+    Keeps the last st.json payload the page emitted, which is the warm-up
+    report app.py writes at the end of a warm-up run.
+    """
+
+    def __init__(self):
+        self.finished = asyncio.Event()
+        self.status: Optional[str] = None
+        self.report: Optional[Dict] = None
+
+    def write_forward_msg(self, msg: ForwardMsg) -> None:
+        kind = msg.WhichOneof('type')
+        if kind == 'delta' and msg.delta.new_element.WhichOneof('type') == 'json':
+            self.report = json.loads(msg.delta.new_element.json.body)
+        elif kind == 'script_finished':
+            self.status = ForwardMsg.ScriptFinishedStatus.Name(msg.script_finished)
+            if msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                self.finished.set()
+
+    @property
+    def client_context(self):
+        return None
+
+
+async def run_warmup_session() -> Dict:
+    """Run app.py once in a headless session and return its warm-up report."""
+    runtime = Runtime.instance()
+    client = HeadlessClient()
+    session_id = runtime.connect_session(client, user_info={})
+    try:
+        msg = BackMsg()
+        msg.rerun_script.query_string = f'warmup={WARMUP_TOKEN}'
+        runtime.handle_backmsg(session_id, msg)
+        await asyncio.wait_for(client.finished.wait(), WARMUP_TIMEOUT)
+    finally:
+        runtime.close_session(session_id)
+
+    if client.status != 'FINISHED_SUCCESSFULLY':
+        raise RuntimeError(f"warm-up run ended with {client.status}")
+    if client.report is None:
+        raise RuntimeError("warm-up run produced no report (script error?)")
+    return client.report
+
+
+async def warm_up():
+    """Retry the warm-up session with backoff until it reports ready."""
+    backoff = 5
+    while True:
+        READINESS['status'] = 'warming'
+        READINESS['attempts'] += 1
+        try:
+            report = await run_warmup_session()
+            READINESS['report'] = report
+            if report.get('ready'):
+                READINESS.update(status='ready', ready_at=time.time(), error=None)
+                print(f"Warm-up complete in {report['seconds']}s: {report}", flush=True)
+                return
+            READINESS['error'] = report.get('error') or "screener returned no quotes"
+        except Exception as e:
+            READINESS['error'] = str(e)
+        READINESS['status'] = 'failed'
+        print(f"Warm-up attempt {READINESS['attempts']} failed ({READINESS['error']}); "
+              f"retrying in {backoff}s", flush=True)
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, WARMUP_RETRY_MAX)
+
+
+async def readyz(request: Request) -> JSONResponse:
+    """Readiness probe: 200 once the caches are warm, 503 until then."""
+    body = dict(READINESS, uptime=round(time.time() - READINESS['started_at'], 1))
+    return JSONResponse(body, status_code=200 if READINESS['status'] == 'ready' else 503)
+
+
+FRAME_TIME_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Frame time</title>
+<style>
+  html, body { margin: 0; height: 100%; background: #0e1117; color: #fafafa; font: 14px monospace; }
+  iframe { position: fixed; inset: 0; width: 100%; height: 100%; border: 0; }
+  #report { position: fixed; right: 12px; bottom: 12px; z-index: 1; padding: 10px 14px;
+            background: rgba(0, 0, 0, 0.85); border: 1px solid #444; white-space: pre; }
+</style></head>
+<body><div id="report">starting...</div>
+<script>
+const params = new URLSearchParams(location.search);
+const seconds = Number(params.get('seconds') || 30);
+const settle = Number(params.get('settle') || 15);
+const modes = (params.get('modes') || '0,1').split(',');
+const report = document.getElementById('report');
+window.frameTimeResults = {done: false, seconds, settle, modes: {}};
+
+function percentile(sorted, p) {
+  return sorted.length ? sorted[Math.min(sorted.length - 1, Math.floor(p / 100 * sorted.length))] : null;
+}
+
+function show(status) {
+  const lines = [status];
+  for (const [mode, r] of Object.entries(window.frameTimeResults.modes)) {
+    lines.push(`lowpower=${mode}: ${r.fps} fps  p50 ${r.p50} ms  p95 ${r.p95} ms  p99 ${r.p99} ms  ` +
+               `max ${r.max} ms  janky ${r.janky_pct}%  long tasks ${r.long_tasks} (${r.long_task_ms} ms)`);
+  }
+  report.textContent = lines.join('\\n');
+}
+
+function measure(mode) {
+  return new Promise(resolve => {
+    const frame = document.createElement('iframe');
+    frame.src = `/?lowpower=${mode}`;
+    document.body.appendChild(frame);
+    frame.onload = () => setTimeout(() => {
+      // Frames and long tasks are taken from the dashboard's own window.
+      const win = frame.contentWindow;
+      const deltas = [];
+      let longTasks = 0, longTaskMs = 0, observer = null;
+      if (win.PerformanceObserver && (win.PerformanceObserver.supportedEntryTypes || []).includes('longtask')) {
+        observer = new win.PerformanceObserver(list => {
+          for (const entry of list.getEntries()) { longTasks += 1; longTaskMs += entry.duration; }
+        });
+        observer.observe({type: 'longtask'});
+      }
+      let last = null, end = null;
+      const tick = now => {
+        if (last !== null) deltas.push(now - last);
+        last = now;
+        if (end === null) end = now + seconds * 1000;
+        if (now < end) return win.requestAnimationFrame(tick);
+        if (observer) observer.disconnect();
+        const sorted = deltas.slice().sort((a, b) => a - b);
+        const total = deltas.reduce((a, b) => a + b, 0);
+        const round = v => v === null ? null : Math.round(v * 100) / 100;
+        frame.remove();
+        resolve({
+          frames: deltas.length,
+          fps: round(deltas.length / (total / 1000)),
+          p50: round(percentile(sorted, 50)), p95: round(percentile(sorted, 95)),
+          p99: round(percentile(sorted, 99)), max: round(sorted[sorted.length - 1] ?? null),
+          janky_pct: round(100 * deltas.filter(d => d > 1000 / 60 * 1.5).length / Math.max(1, deltas.length)),
+          long_tasks: longTasks, long_task_ms: Math.round(longTaskMs),
+        });
+      };
+      show(`measuring lowpower=${mode} for ${seconds}s...`);
+      win.requestAnimationFrame(tick);
+    }, settle * 1000);
+    show(`loading lowpower=${mode}, settling ${settle}s...`);
+  });
+}
+
+(async () => {
+  for (const mode of modes) window.frameTimeResults.modes[mode] = await measure(mode);
+  window.frameTimeResults.done = true;
+  show('done');
+})();
+</script></body></html>
+"""
+
+
+async def frametime(request: Request) -> HTMLResponse:
+    """Frame-time comparison page for the normal and low-power renderings."""
+    return HTMLResponse(FRAME_TIME_PAGE)
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison, as for GET)."""
+    if not header:
+        return False
+    tags = [t.strip().removeprefix('W/') for t in header.split(',')]
+    return '*' in tags or etag in tags
+
+
+async def api_snapshot(request: Request) -> Response:
+    """The latest snapshot, or one part of it, as JSON or Arrow."""
+    part = request.path_params.get('part', 'all')
+    if part not in snapshot_store.PARTS:
+        return JSONResponse({'error': f"unknown part {part!r}", 'parts': list(snapshot_store.PARTS)},
+                            status_code=404)
+    fmt = request.query_params.get('format')
+    if fmt is None:
+        fmt = 'arrow' if snapshot_store.ARROW_TYPE in request.headers.get('accept', '') else 'json'
+    if fmt not in ('json', 'arrow') or (fmt == 'arrow' and part not in snapshot_store.TABLE_PARTS):
+        return JSONResponse({'error': f"{part} is not available as {fmt}"}, status_code=406)
+
+    snapshot, growth = snapshot_store.STORE.get(request.query_params.get('source'))
+    if snapshot is None:
+        return JSONResponse({'error': "no snapshot published yet", 'sources': snapshot_store.STORE.sources()},
+                            status_code=503 if request.query_params.get('source') is None else 404)
+    headers = {
+        'Cache-Control': 'no-cache',
+        'Age': str(max(0, int(time.time() - snapshot.generated_at))),
+        'X-Snapshot-Source': snapshot.name,
+        'X-Snapshot-Version': str(snapshot.version),
+    }
+    # A cache miss encodes the whole part (pandas/pyarrow work); do that in a
+    # worker thread so the event loop keeps serving the dashboard sessions.
+    body = snapshot_store.STORE.cached_body(snapshot, growth, part, fmt)
+    if body is None:
+        body = await asyncio.to_thread(snapshot_store.STORE.body, snapshot, growth, part, fmt)
+    etag, media_type, content = body
+    headers['ETag'] = etag
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content, media_type=media_type, headers=headers)
+
+
+async def api_sources(request: Request) -> JSONResponse:
+    """Published snapshot sources, most recently updated first."""
+    return JSONResponse(snapshot_store.STORE.sources())
+
+
+@asynccontextmanager
+async def lifespan(app):
+    task = asyncio.create_task(warm_up())
+    try:
+        yield
+    finally:
+        task.cancel()
+
+
+app = st.App("app.py", lifespan=lifespan, routes=[
+    Route("/readyz", readyz),
+    Route("/frametime", frametime),
+    Route("/api/sources", api_sources),
+    Route("/api/snapshot", api_snapshot),
+    Route("/api/snapshot/{part}", api_snapshot),
+])
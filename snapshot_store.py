@@ -0,0 +1,232 @@
+"""
+Latest computed snapshot per quote source, for the read-only API in server.py.
+
+app.py publishes each source's quote frame, breadth dict, sector table and
+ranked views once per snapshot version, and the growth screen whenever it
+reruns; server.py's /api routes serve them to other tools, so they get the
+dashboard's numbers without fetching from Yahoo themselves. Lives outside
+app.py because the Streamlit script runs as __main__ and is re-executed on
+every rerun, while this module is imported once and its STORE is the same
+object for the script and the server. Published frames are the shared
+ResultsCache objects and are only read.
+
+Response bodies are encoded on the first request for each (source, part,
+format) after a publish and kept with their ETag until the next one, so
+polls between snapshots, usually answered 304 through If-None-Match, cost
+a dict lookup. server.py runs the encoding itself in a worker thread, off
+the event loop that serves every session.
+"""
+
+import json
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# API parts: the whole snapshot ('all') or one piece of it. Every part but
+# breadth is tabular and can also be served as an Arrow IPC stream.
+PARTS = ('all', 'breadth', 'quotes', 'sectors', 'top', 'growth')
+TABLE_PARTS = ('quotes', 'sectors', 'top', 'growth')
+JSON_TYPE = 'application/json'
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+
+
+def source_name(source: Tuple) -> str:
+    """API name of a quote source, e.g. 'screener:Most Active:90', 'screener:Tech:12:3f9a01c2' (a
+    watchlist, tagged by its contents) or 'stream:ws://host:8765'."""
+    return ':'.join(str(part) for part in source)
+
+
+def _plain(value):
+    """JSON-safe copy of a breadth-style dict: numpy scalars to Python, inf/NaN to null."""
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_plain(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _records(frame: pd.DataFrame) -> bytes:
+    """Frame as a JSON array of records (NaN as null), encoded by pandas in one pass."""
+    return frame.to_json(orient='records', double_precision=6).encode()
+
+
+class PublishedSnapshot:
+    """One source's latest published results; ``top`` holds row positions into quotes per view."""
+
+    __slots__ = ('name', 'key', 'revision', 'version', 'generated_at', 'quotes', 'breadth', 'sectors', 'top')
+
+    def __init__(self, name: str, key, revision: int, version: int, quotes: pd.DataFrame, breadth: Dict,
+                 sectors: pd.DataFrame, top: Dict[str, np.ndarray]):
+        self.name = name
+        self.key = key
+        self.revision = revision
+        self.version = version
+        self.generated_at = time.time()
+        self.quotes = quotes
+        self.breadth = breadth
+        self.sectors = sectors
+        self.top = top
+
+    def top_frames(self) -> Dict[str, pd.DataFrame]:
+        return {view: self.quotes.take(rows) for view, rows in self.top.items()}
+
+
+class SnapshotStore:
+    """Process-wide latest snapshot and growth list per source, with encoded bodies.
+
+    ``publish`` and ``publish_growth`` are no-ops when the key (snapshot and
+    analytics versions, or the growth cache key) is unchanged, so every
+    session can call them on each run. ``body`` returns (etag, content type,
+    bytes) for a part, encoding it at most once per revision.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._encode_lock = threading.Lock()
+        self._snapshots: Dict[str, PublishedSnapshot] = {}
+        self._growth: Dict[str, Dict] = {}
+        self._bodies: Dict[Tuple, Tuple[str, str, bytes]] = {}
+        self._revision = 0
+        # Distinguishes this process's ETags from a previous server's.
+        self._boot = f"{int(time.time() * 1000):x}"
+
+    def publish(self, source: Tuple, key, version: int, quotes: pd.DataFrame, breadth: Dict,
+                sectors: pd.DataFrame, top: Dict[str, np.ndarray]) -> bool:
+        name = source_name(source)
+        with self._lock:
+            current = self._snapshots.get(name)
+            if current is not None and current.key == key:
+                return False
+            self._revision += 1
+            self._snapshots[name] = PublishedSnapshot(name, key, self._revision, version, quotes, breadth,
+                                                      sectors, top)
+            self._drop_bodies(name)
+        return True
+
+    def publish_growth(self, source: Tuple, key, criteria: Dict, stocks: List[Dict]) -> bool:
+        name = source_name(source)
+        with self._lock:
+            current = self._growth.get(name)
+            if current is not None and current['key'] == key:
+                return False
+            self._revision += 1
+            self._growth[name] = {'key': key, 'revision': self._revision, 'generated_at': time.time(),
+                                  'criteria': criteria, 'stocks': stocks}
+            self._drop_bodies(name)
+        return True
+
+    def _drop_bodies(self, name: str):
+        for cached in [k for k in self._bodies if k[0] == name]:
+            del self._bodies[cached]
+
+    def sources(self) -> List[Dict]:
+        """Published sources, most recently updated first."""
+        now = time.time()
+        with self._lock:
+            snapshots = sorted(self._snapshots.values(), key=lambda s: s.generated_at, reverse=True)
+            return [{'source': s.name, 'version': s.version, 'generated_at': s.generated_at,
+                     'age_seconds': round(now - s.generated_at, 1), 'rows': len(s.quotes),
+                     'growth': s.name in self._growth} for s in snapshots]
+
+    def get(self, name: Optional[str] = None) -> Tuple[Optional[PublishedSnapshot], Optional[Dict]]:
+        """(snapshot, growth) for a source, or for the most recently updated one."""
+        with self._lock:
+            if name is None and self._snapshots:
+                name = max(self._snapshots.values(), key=lambda s: s.generated_at).name
+            return self._snapshots.get(name), self._growth.get(name)
+
+    @staticmethod
+    def _body_key(snapshot: PublishedSnapshot, growth: Optional[Dict], part: str, fmt: str) -> Tuple:
+        growth_revision = growth['revision'] if growth else 0
+        revision = {'growth': (growth_revision,), 'all': (snapshot.revision, growth_revision)}.get(
+            part, (snapshot.revision,))
+        return (snapshot.name, part, fmt) + revision
+
+    def cached_body(self, snapshot: PublishedSnapshot, growth: Optional[Dict], part: str,
+                    fmt: str) -> Optional[Tuple[str, str, bytes]]:
+        """body() if it is already encoded, else None; never encodes."""
+        return self._bodies.get(self._body_key(snapshot, growth, part, fmt))
+
+    def body(self, snapshot: PublishedSnapshot, growth: Optional[Dict], part: str,
+             fmt: str) -> Tuple[str, str, bytes]:
+        """(etag, content type, body) of a part in 'json' or 'arrow' format.
+
+        Encoding a large snapshot takes a while, so async callers should
+        try cached_body() first and run this in a worker thread.
+        """
+        cache_key = self._body_key(snapshot, growth, part, fmt)
+        revision = cache_key[3:]
+        cached = self._bodies.get(cache_key)
+        if cached is not None:
+            return cached
+        with self._encode_lock:
+            cached = self._bodies.get(cache_key)
+            if cached is None:
+                if fmt == 'arrow':
+                    content = self._arrow(snapshot, growth, part)
+                else:
+                    content = self._json(snapshot, growth, part)
+                etag = '"' + '-'.join([self._boot, part, fmt] + [str(r) for r in revision]) + '"'
+                cached = (etag, ARROW_TYPE if fmt == 'arrow' else JSON_TYPE, content)
+                with self._lock:
+                    # Only cache if no publish replaced this revision meanwhile.
+                    if self._snapshots.get(snapshot.name) is snapshot and self._growth.get(snapshot.name) is growth:
+                        self._bodies[cache_key] = cached
+        return cached
+
+    def _json(self, snapshot: PublishedSnapshot, growth: Optional[Dict], part: str) -> bytes:
+        if part == 'breadth':
+            return json.dumps(_plain(snapshot.breadth)).encode()
+        if part == 'quotes':
+            return _records(snapshot.quotes)
+        if part == 'sectors':
+            return _records(snapshot.sectors)
+        if part == 'top':
+            return b'{' + b','.join(json.dumps(view).encode() + b':' + _records(frame)
+                                    for view, frame in snapshot.top_frames().items()) + b'}'
+        if part == 'growth':
+            if growth is None:
+                return b'null'
+            header = json.dumps({'generated_at': growth['generated_at'], 'criteria': _plain(growth['criteria'])})
+            return header[:-1].encode() + b',"stocks":' + json.dumps(_plain(growth['stocks'])).encode() + b'}'
+        header = json.dumps({'source': snapshot.name, 'version': snapshot.version,
+                             'generated_at': snapshot.generated_at})
+        return (header[:-1].encode()
+                + b',"breadth":' + self._json(snapshot, growth, 'breadth')
+                + b',"sectors":' + self._json(snapshot, growth, 'sectors')
+                + b',"top":' + self._json(snapshot, growth, 'top')
+                + b',"growth":' + self._json(snapshot, growth, 'growth')
+                + b',"quotes":' + self._json(snapshot, growth, 'quotes') + b'}')
+
+    def _arrow(self, snapshot: PublishedSnapshot, growth: Optional[Dict], part: str) -> bytes:
+        import pyarrow as pa
+
+        if part == 'quotes':
+            frame = snapshot.quotes
+        elif part == 'sectors':
+            frame = snapshot.sectors
+        elif part == 'top':
+            frames = [f.assign(View=view, Rank=np.arange(1, len(f) + 1)) for view, f in snapshot.top_frames().items()]
+            frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        else:
+            frame = pd.DataFrame(growth['stocks'] if growth else [])
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        table = table.replace_schema_metadata({
+            'source': snapshot.name, 'version': str(snapshot.version),
+            'generated_at': str(growth['generated_at'] if part == 'growth' and growth else snapshot.generated_at),
+        })
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+
+STORE = SnapshotStore()
@@ -0,0 +1,125 @@
+"""
+AlertEngine and ThresholdIndex on short synthetic snapshot sequences.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import numpy as np
+
+import app
+
+
+def rules(*raw):
+    return app.parse_alert_rules(list(raw))
+
+
+UP5 = {'name': 'up5', 'field': 'Change (%)', 'op': 'above', 'threshold': 5, 'hysteresis': 1}
+DOWN5 = {'name': 'down5', 'field': 'Change (%)', 'op': 'below', 'threshold': -5, 'hysteresis': 1}
+
+
+def symbols(values: dict):
+    keys = np.array(list(values), dtype=object)
+    return {'symbol': (keys, {'Change (%)': np.array(list(values.values()), dtype=np.float64)})}
+
+
+class Feed:
+    """Feeds snapshots with increasing keys and a clock one second apart."""
+
+    def __init__(self, engine: app.AlertEngine):
+        self.engine = engine
+        self.version = 0
+
+    def __call__(self, values: dict, now: float = None):
+        self.version += 1
+        fired = self.engine.update((self.version,), symbols(values), now=self.version if now is None else now)
+        return [(a['rule'], a['key']) for a in fired]
+
+
+def test_threshold_index_ranges():
+    index = app.ThresholdIndex([0, 1, 2], [1.0, 2.0, 3.0], [0.5, 0.5, 0.5], 1.0)
+    fire_lo, fire_hi, _, _, rising = index.ranges(np.array([0.5, 3.5]), np.array([2.5, 1.5]))
+    assert index.fire_ids[fire_lo[0]:fire_hi[0]].tolist() == [0, 1]
+    assert index.fire_ids[fire_lo[1]:fire_hi[1]].tolist() == [1, 2]
+    assert rising.tolist() == [True, False]
+
+
+def test_first_sight_only_records():
+    feed = Feed(app.AlertEngine(rules(UP5), cooldown=0))
+    assert feed({'A': 6}) == []
+    assert feed({'A': 7}) == []
+    assert feed({'A': 4, 'B': 9}) == []     # B is new
+    assert feed({'A': 6, 'B': 9}) == [('up5', 'A')]
+
+
+def test_above_and_below_fire_on_crossing():
+    feed = Feed(app.AlertEngine(rules(UP5, DOWN5), cooldown=0))
+    feed({'A': 0, 'B': 0})
+    assert feed({'A': 5.5, 'B': -6}) == [('up5', 'A'), ('down5', 'B')]
+    assert feed({'A': 8, 'B': -9}) == []    # already past the threshold
+
+
+def test_hysteresis_latches_until_rearmed():
+    feed = Feed(app.AlertEngine(rules(UP5), cooldown=0))
+    feed({'A': 0})
+    assert feed({'A': 6}) == [('up5', 'A')]
+    assert feed({'A': 4.5}) == []           # back inside the band: latched
+    assert feed({'A': 6}) == []             # so this doesn't fire
+    assert feed({'A': 3.5}) == []           # below the band: re-armed
+    assert feed({'A': 6}) == [('up5', 'A')]
+
+
+def test_move_through_band_in_one_step_rearms():
+    feed = Feed(app.AlertEngine(rules(UP5), cooldown=0))
+    feed({'A': 0})
+    feed({'A': 6})
+    assert feed({'A': 0}) == []
+    assert feed({'A': 6}) == [('up5', 'A')]
+
+
+def test_cooldown_suppresses_repeat_fires():
+    engine = app.AlertEngine(rules(UP5), cooldown=100)
+    feed = Feed(engine)
+    feed({'A': 0}, now=0)
+    assert feed({'A': 6}, now=1) == [('up5', 'A')]
+    feed({'A': 0}, now=2)
+    assert feed({'A': 6}, now=50) == []
+    assert engine.suppressed == 1
+    feed({'A': 0}, now=60)
+    assert feed({'A': 6}, now=102) == [('up5', 'A')]
+
+
+def test_symbol_filter():
+    feed = Feed(app.AlertEngine(rules(dict(UP5, symbols=['b'])), cooldown=0))
+    feed({'A': 0, 'B': 0})
+    assert feed({'A': 6, 'B': 6}) == [('up5', 'B')]
+
+
+def test_departed_keys_drop_latches():
+    engine = app.AlertEngine(rules(UP5), cooldown=0)
+    feed = Feed(engine)
+    feed({'A': 0, 'B': 0})
+    feed({'A': 6, 'B': 0})
+    feed({'A': 4.5, 'B': 0})
+    assert engine._latched == {(0, 'A')}
+    feed({'B': 0})
+    assert engine._latched == set()
+
+
+def test_duplicate_keys_use_first_occurrence():
+    engine = app.AlertEngine(rules(UP5), cooldown=0)
+    keys = np.array(['A', 'A', 'B'], dtype=object)
+    engine.update((1,), {'symbol': (keys, {'Change (%)': np.array([0.0, 9.0, 0.0])})}, now=1)
+    fired = engine.update((2,), {'symbol': (keys, {'Change (%)': np.array([6.0, 0.0, 0.0])})}, now=2)
+    assert [(a['key'], a['value']) for a in fired] == [('A', 6.0)]
+
+
+def test_stale_or_repeated_snapshot_is_skipped():
+    engine = app.AlertEngine(rules(UP5), cooldown=0)
+    engine.update((1, 1), symbols({'A': 0}), now=1)
+    assert len(engine.update((3, 3), symbols({'A': 6}), now=2)) == 1
+    # A session still on version 2 must not diff its older values against 3's.
+    assert engine.update((2, 2), symbols({'A': 0}), now=3) == []
+    assert engine.update((3, 3), symbols({'A': 0}), now=4) == []
+    assert engine.update((3, 2), symbols({'A': 0}), now=5) == []
+    assert engine._latched == set()
+    assert len(engine.update((4, 4), symbols({'A': 7}), now=6)) == 0     # still above since version 3
@@ -0,0 +1,69 @@
+"""
+CircuitBreaker state when concurrent requests complete out of order.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import threading
+
+import pytest
+
+import app
+
+
+class Response:
+    def __init__(self, status_code: int, retry_after: str = None):
+        self.status_code = status_code
+        self.headers = {'Retry-After': retry_after} if retry_after else {}
+
+
+def test_stale_success_does_not_close_open_circuit():
+    breaker = app.CircuitBreaker('test')
+    admitted, release = threading.Event(), threading.Event()
+    results = {}
+
+    def slow_ok():
+        admitted.set()
+        release.wait(5)
+        return Response(200)
+
+    # A request admitted while closed is still in flight when a 429 opens the circuit.
+    slow = threading.Thread(target=lambda: results.update(
+        slow=breaker.call('batch-1', slow_ok, app.response_failure)))
+    slow.start()
+    assert admitted.wait(5)
+    breaker.call('batch-2', lambda: Response(429, '60'), app.response_failure)
+    assert breaker.state == 'open'
+    open_until = breaker.open_until
+
+    release.set()
+    slow.join(5)
+    assert results['slow'].status_code == 200
+    assert breaker.state == 'open'
+    assert breaker.open_until == open_until
+    assert breaker.trips == 1
+    assert 'retrying in' in breaker.describe()
+
+
+def test_probe_success_closes_circuit():
+    breaker = app.CircuitBreaker('test', cooldown=0)
+    breaker.call('a', lambda: Response(429), app.response_failure)
+    assert breaker.state == 'open'
+    breaker.call('a', lambda: Response(200), app.response_failure)
+    assert (breaker.state, breaker.trips, breaker.failures) == ('closed', 0, 0)
+
+
+def test_interrupted_probe_does_not_close_circuit():
+    breaker = app.CircuitBreaker('test', cooldown=0)
+    breaker.call('a', lambda: Response(429), app.response_failure)
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        breaker.call('a', interrupted, app.response_failure)
+    assert breaker.state == 'open'
+    assert breaker.trips == 1
+    # The probe slot was released, so the next call probes and can close it.
+    breaker.call('a', lambda: Response(200), app.response_failure)
+    assert breaker.state == 'closed'
@@ -0,0 +1,80 @@
+"""
+RankingIndex incremental updates against a full sort of the same frame.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+
+
+def frame(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    # Coarse values so many rows tie on each view's score.
+    price = rng.integers(1, 20, n).astype(np.float64)
+    return pd.DataFrame({
+        'Symbol': [f"S{i}" for i in range(n)],
+        'Price': price,
+        'Change (%)': rng.integers(-4, 5, n).astype(np.float64),
+        'Volume': rng.integers(0, 10, n).astype(np.float64) * 1000,
+        'Expected Volume': rng.integers(0, 4, n).astype(np.float64) * 1000,
+        '52W High': price + rng.integers(0, 5, n),
+    })
+
+
+def expected(df: pd.DataFrame, depth: int) -> dict:
+    """Each view by a full sort_values: best score first, ties in row order, -inf rows left out."""
+    columns = {c: df[c].to_numpy() for c in app.RANKING_COLUMNS}
+    views = {}
+    for name, score in app.RANKINGS.items():
+        ranked = pd.DataFrame({'score': score(columns), 'row': np.arange(len(df))})
+        ranked = ranked[ranked['score'] > -np.inf].sort_values(['score', 'row'], ascending=[False, True])
+        views[name] = ranked['row'].to_numpy()[:depth]
+    return views
+
+
+def mutate(rng: np.random.Generator, df: pd.DataFrame, count: int) -> np.ndarray:
+    """Change a few rows in place, NaNs included; returns their positions."""
+    rows = np.sort(rng.choice(len(df), count, replace=False))
+    fresh = frame(rng, count)
+    for column in app.RANKING_COLUMNS:
+        values = fresh[column].to_numpy(copy=True)
+        values[rng.random(count) < 0.15] = np.nan
+        df.loc[rows, column] = values
+    return rows
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_incremental_updates_match_full_sort(seed):
+    rng = np.random.default_rng(seed)
+    df = frame(rng, 400)
+    index = app.RankingIndex(depth=10, margin=5)
+    version = 1
+    views = index.update(version, df)
+    for _ in range(40):
+        for name, rows in expected(df, 10).items():
+            np.testing.assert_array_equal(views[name], rows, err_msg=name)
+        df = df.copy()
+        changed = mutate(rng, df, int(rng.integers(1, 30)))
+        version += 1
+        views = index.update(version, df, changed)
+    assert index.incremental_passes > 0
+
+
+def test_new_rows_and_epoch_change():
+    rng = np.random.default_rng(7)
+    df = frame(rng, 200)
+    index = app.RankingIndex(depth=10, margin=5)
+    index.update(1, df, epoch=1)
+    grown = pd.concat([df, frame(rng, 20)], ignore_index=True)
+    views = index.update(2, grown, np.array([], dtype=np.intp), epoch=1)
+    for name, rows in expected(grown, 10).items():
+        np.testing.assert_array_equal(views[name], rows, err_msg=name)
+    passes = index.full_passes
+    grown['Expected Volume'] *= 2
+    views = index.update(3, grown, np.array([], dtype=np.intp), epoch=2)
+    assert index.full_passes == passes + 1
+    for name, rows in expected(grown, 10).items():
+        np.testing.assert_array_equal(views[name], rows, err_msg=name)
@@ -0,0 +1,94 @@
+"""
+Frame-time comparison of the normal and low-power (?lowpower=1) displays.
+
+Starts server.py on a replayed (or synthesized) tape, or attaches to a
+running one, opens its /frametime page in headless Chromium and prints the
+page's per-mode results: frames per second, frame-interval percentiles,
+the share of janky frames (over 1.5 vsync intervals) and long tasks.
+--cpu-throttle slows the browser's CPU through the DevTools protocol, to
+approximate a Fire TV stick or similar kiosk hardware on a desktop.
+
+Usage:
+    python tools/frame_time.py --seconds 30 --cpu-throttle 4
+    python tools/frame_time.py --url http://kiosk-server:8501 --modes 1 --json results.json
+
+Needs playwright (pip install playwright && playwright install chromium).
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from load_test import free_port, start_server, wait_healthy  # noqa: E402
+
+COLUMNS = ('frames', 'fps', 'p50', 'p95', 'p99', 'max', 'janky_pct', 'long_tasks', 'long_task_ms')
+
+
+def run_page(base_url: str, args) -> dict:
+    from playwright.sync_api import sync_playwright
+
+    query = f"seconds={args.seconds:g}&settle={args.settle:g}&modes={args.modes}"
+    timeout = (args.seconds + args.settle + 30) * len(args.modes.split(',')) * 1000
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            page = browser.new_page(viewport={'width': args.width, 'height': args.height})
+            if args.cpu_throttle > 1:
+                cdp = page.context.new_cdp_session(page)
+                cdp.send('Emulation.setCPUThrottlingRate', {'rate': args.cpu_throttle})
+            page.goto(f"{base_url}/frametime?{query}")
+            page.wait_for_function("window.frameTimeResults && window.frameTimeResults.done", timeout=timeout)
+            return page.evaluate("window.frameTimeResults")
+        finally:
+            browser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=30, help="seconds measured per mode")
+    parser.add_argument('--settle', type=float, default=15, help="seconds after load before measuring")
+    parser.add_argument('--modes', default='0,1', help="lowpower values to measure, in order")
+    parser.add_argument('--cpu-throttle', type=float, default=1, help="CPU slowdown factor, e.g. 4")
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--tape', help="market tape to replay (default: synthesize one)")
+    parser.add_argument('--speed', type=float, default=60, help="tape replay speed")
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('--url', help="attach to a running server.py instead of starting one")
+    parser.add_argument('--json', help="also write the results to this file")
+    parser.add_argument('--verbose', action='store_true', help="show the server's output")
+    args = parser.parse_args()
+    args.target = 'server.py'
+
+    server = None
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            args.port = args.port or free_port()
+            base_url = f"http://localhost:{args.port}"
+            server = start_server(args, workdir)
+        try:
+            wait_healthy(base_url)
+            results = run_page(base_url, args)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+    throttle = f", CPU throttled {args.cpu_throttle:g}x" if args.cpu_throttle > 1 else ""
+    print(f"{args.seconds:g}s per mode at {args.width}x{args.height}{throttle}")
+    print(f"{'lowpower':>8}  " + '  '.join(f"{c:>{len(c)}}" for c in COLUMNS))
+    for mode, row in results['modes'].items():
+        print(f"{mode:>8}  " + '  '.join(f"{row.get(c, ''):>{len(c)}}" for c in COLUMNS))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
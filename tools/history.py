@@ -0,0 +1,66 @@
+"""
+Query the dashboard's session history (written when DASHBOARD_HISTORY_DIR is set).
+
+Usage:
+    python tools/history.py DIR days
+    python tools/history.py DIR breadth-at 10:30 --days 60
+    python tools/history.py DIR sectors --freq W --periods 12
+    python tools/history.py DIR import-tape session.tape
+
+import-tape backfills history from a recorded market tape by running each
+screener snapshot through the dashboard's breadth and sector calculations.
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app import (  # noqa: E402
+    EASTERN, HistoryStore, TapeReader,
+    calculate_breadth_indicators, calculate_sector_performance, quotes_frame,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('root', help="history directory (DASHBOARD_HISTORY_DIR)")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('days', help="list trading days with data")
+    p = sub.add_parser('breadth-at', help="breadth as of a time of day over the last N days")
+    p.add_argument('clock', help="HH:MM, Eastern time")
+    p.add_argument('--days', type=int, default=60)
+    p = sub.add_parser('sectors', help="mean sector change per period")
+    p.add_argument('--freq', default='W', help="pandas period alias (D, W, M)")
+    p.add_argument('--periods', type=int, default=12)
+    p = sub.add_parser('import-tape', help="backfill history from a market tape")
+    p.add_argument('tape')
+    args = parser.parse_args()
+
+    store = HistoryStore(args.root, min_interval=0)
+    pd.set_option('display.width', 200)
+    if args.command == 'days':
+        for day in store.days():
+            print(day)
+    elif args.command == 'breadth-at':
+        print(store.breadth_at(args.clock, args.days).to_string())
+    elif args.command == 'sectors':
+        print(store.sector_averages(args.freq, args.periods).round(2).to_string())
+    elif args.command == 'import-tape':
+        reader = TapeReader(args.tape)
+        written = 0
+        for i, kind in enumerate(reader.kinds):
+            if kind != 'screener':
+                continue
+            df = quotes_frame(reader.read(i)['data'])
+            now = datetime.fromtimestamp(reader.times[i], EASTERN)
+            written += store.record(df, calculate_breadth_indicators(df), calculate_sector_performance(df), now=now)
+        store.compact(before=datetime.now(EASTERN).date())
+        print(f"Imported {written:,} snapshots into {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Import-time profile of app.py checked against a startup budget.
+
+Runs `python -X importtime -c "import app"` in a fresh interpreter (taking
+the fastest of a few runs to damp noise), prints the heaviest top-level
+imports, and fails if:
+  - the cumulative import time of app.py exceeds the budget, or
+  - any module that app.py is supposed to load lazily was imported at
+    startup (and names the module that pulled it in).
+
+Usage:
+    python tools/import_budget.py
+    python tools/import_budget.py --budget-ms 1200 --top 15
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must stay off the startup path; app.py imports them on first
+# use. plotly.graph_objects isn't listed: Streamlit itself imports it, and it
+# resolves its trace classes lazily, so it's cheap.
+LAZY_MODULES = ('yfinance', 'requests', 'plotly.express', 'websockets')
+
+DEFAULT_BUDGET_MS = 1500
+
+
+def profile_once() -> List[Tuple[int, int, int, str]]:
+    """Return (self_us, cumulative_us, depth, module) rows for one cold import."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # The name is indented by one space plus two per nesting level.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def app_subtree(rows: List[Tuple[int, int, int, str]]) -> List[Tuple[int, int, int, str]]:
+    """Rows imported on behalf of app.py, ending with the 'app' row itself.
+
+    Children are printed before their parent, so the subtree is everything
+    after the previous top-level row up to and including 'app'.
+    """
+    end = next(i for i, row in enumerate(rows) if row[3] == 'app' and row[2] == 0)
+    start = max((i for i in range(end) if rows[i][2] == 0), default=-1) + 1
+    return rows[start:end + 1]
+
+
+def find_importer(rows: List[Tuple[int, int, int, str]], index: int) -> str:
+    """Walk the -X importtime tree back to the top-level import that caused rows[index].
+
+    importtime prints children before their parent, so the parent is the
+    next row below the current depth.
+    """
+    depth = rows[index][2]
+    for _, _, row_depth, name in rows[index + 1:]:
+        if row_depth < depth:
+            if row_depth <= 1:
+                return name
+            depth = row_depth
+    return 'app'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"maximum cumulative import time for app.py (default {DEFAULT_BUDGET_MS})")
+    parser.add_argument('--runs', type=int, default=3, help="cold imports to take the fastest of")
+    parser.add_argument('--top', type=int, default=10, help="heaviest top-level imports to list")
+    args = parser.parse_args()
+
+    runs = [app_subtree(profile_once()) for _ in range(args.runs)]
+    rows = min(runs, key=lambda r: r[-1][1])
+    app_ms = rows[-1][1] / 1000
+
+    print(f"app.py cold import: {app_ms:,.0f} ms (fastest of {args.runs}, budget {args.budget_ms:,.0f} ms)")
+    print("\nHeaviest imports triggered by app.py:")
+    top_level = sorted((r for r in rows if r[2] == 1), key=lambda r: r[1], reverse=True)
+    for _, cumulative_us, _, name in top_level[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if app_ms > args.budget_ms:
+        failures.append(f"import time {app_ms:,.0f} ms exceeds budget of {args.budget_ms:,.0f} ms")
+    for lazy in LAZY_MODULES:
+        # Report the outermost matching row, i.e. the package rather than
+        # whichever of its submodules happened to finish loading first.
+        hits = [i for i, row in enumerate(rows) if row[3] == lazy or row[3].startswith(lazy + '.')]
+        if hits:
+            index = min(hits, key=lambda i: rows[i][2])
+            failures.append(f"'{rows[index][3]}' imported at startup (via {find_importer(rows, index)}); "
+                            f"it should load lazily on first use")
+
+    if failures:
+        print("\nFAIL")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+Concurrent-session load test: how many displays can one server drive?
+
+Starts the dashboard (or attaches to a running server), then for each
+session count N opens N headless websocket sessions that behave like a
+browser tab: they run the page once and then re-trigger every fragment on
+the run_every interval the server announces. Data comes from a market tape
+(synthesized if none is given), so the run is offline and repeatable.
+
+For each N it reports:
+  - server CPU (percent of one core) and RSS, plus RSS added per session
+  - fragment latency percentiles (rerun request -> script finished), per
+    fragment interval, and the share of runs slower than their interval
+  - the same for the quote refresh fragment on its own (refresh_*),
+    recognised as the fragment that draws the metric tiles
+  - bytes sent to each session per fragment run
+and prints the scaling curve; --csv writes it as rows and --plot writes it
+as an HTML chart.
+
+Usage:
+    python tools/load_test.py --sessions 1 2 4 8 16 32 --duration 60
+    python tools/load_test.py --tape session.tape --speed 60 --csv curve.csv --plot curve.html
+    python tools/load_test.py --url http://localhost:8501 --pid 12345 --sessions 10
+
+Needs the websockets package (as for streaming mode). Process stats come
+from psutil when installed, else from /proc (Linux).
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+class ProcessSampler:
+    """CPU seconds and RSS of the server process."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        try:
+            import psutil
+            self._process = psutil.Process(pid)
+        except ImportError:
+            self._process = None
+            self._ticks = os.sysconf('SC_CLK_TCK')
+            self._page = os.sysconf('SC_PAGE_SIZE')
+
+    def cpu_seconds(self) -> float:
+        if self._process is not None:
+            times = self._process.cpu_times()
+            return times.user + times.system
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self._ticks   # utime + stime
+
+    def rss_bytes(self) -> int:
+        if self._process is not None:
+            return self._process.memory_info().rss
+        with open(f"/proc/{self.pid}/statm") as f:
+            return int(f.read().split()[1]) * self._page
+
+
+class HeadlessSession:
+    """One simulated display on a websocket connection.
+
+    Mirrors what the frontend does for st.fragment(run_every=...): each
+    auto_rerun message schedules a fragment rerun at that interval. Runs
+    are issued one at a time, and each is timed from request to
+    script_finished and charged the bytes received in between.
+    """
+
+    def __init__(self, url: str, query_string: str):
+        self.url = url
+        self.query_string = query_string
+        self.intervals: Dict[str, float] = {}       # fragment id -> run_every
+        self.due: Dict[str, float] = {}             # fragment id -> next run (monotonic)
+        self.runs: List[tuple] = []                 # (interval, latency, bytes, quotes?), measured runs only
+        self.quotes_fragment = None                 # id of the fragment drawing st.metric tiles
+        self.measuring = False
+        self.ready = asyncio.Event()
+        self._ws = None
+
+    async def _request(self, fragment_id: str = '') -> bool:
+        """Send one rerun and wait for it to finish; True if it ran to completion."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = self.query_string
+        msg.rerun_script.page_script_hash = ''
+        if fragment_id:
+            msg.rerun_script.fragment_id = fragment_id
+            msg.rerun_script.is_auto_rerun = True
+        started = time.perf_counter()
+        await self._ws.send(msg.SerializeToString())
+        received = 0
+        while True:
+            data = await self._ws.recv()
+            received += len(data)
+            fwd = ForwardMsg()
+            fwd.ParseFromString(data)
+            kind = fwd.WhichOneof('type')
+            if kind == 'delta':
+                # Only the quote refresh draws metric tiles, so they identify
+                # its fragment whatever the other fragments' intervals are.
+                if fwd.delta.fragment_id and fwd.delta.new_element.WhichOneof('type') == 'metric':
+                    self.quotes_fragment = fwd.delta.fragment_id
+            elif kind == 'auto_rerun':
+                interval = fwd.auto_rerun.interval
+                self.intervals[fwd.auto_rerun.fragment_id] = interval
+                self.due.setdefault(fwd.auto_rerun.fragment_id, time.monotonic() + interval)
+            elif kind == 'script_finished':
+                if fwd.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                if self.measuring and fragment_id:
+                    self.runs.append((self.intervals[fragment_id], time.perf_counter() - started, received,
+                                      fragment_id == self.quotes_fragment))
+                return fwd.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY
+
+    async def run(self):
+        async with websockets.connect(self.url, max_size=None) as ws:
+            self._ws = ws
+            await self._request()
+            self.ready.set()
+            while True:
+                if not self.due:
+                    await asyncio.sleep(0.1)
+                    continue
+                fragment_id = min(self.due, key=self.due.get)
+                delay = self.due[fragment_id] - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await self._request(fragment_id)
+                # Like the browser's timer: the next run is due an interval
+                # after this one was due, not after it finished.
+                self.due[fragment_id] = max(self.due[fragment_id] + self.intervals[fragment_id],
+                                            time.monotonic())
+
+
+def percentiles(values: List[float]) -> List[float]:
+    return list(np.percentile(values, [50, 95, 99])) if values else [float('nan')] * 3
+
+
+async def measure(url: str, sampler: ProcessSampler, sessions: int, duration: float,
+                  warmup: float, query_string: str, baseline_rss: int) -> Dict:
+    """Run `sessions` displays, measure for `duration` seconds, return one curve row."""
+    clients = [HeadlessSession(url, query_string) for _ in range(sessions)]
+    tasks = [asyncio.create_task(c.run()) for c in clients]
+    try:
+        await asyncio.wait_for(asyncio.gather(*(c.ready.wait() for c in clients)), timeout=300)
+        await asyncio.sleep(warmup)
+        for c in clients:
+            c.measuring = True
+        cpu_start, wall_start = sampler.cpu_seconds(), time.perf_counter()
+        rss_samples = []
+        end = wall_start + duration
+        while time.perf_counter() < end:
+            await asyncio.sleep(min(1.0, max(0.0, end - time.perf_counter())))
+            rss_samples.append(sampler.rss_bytes())
+            failed = [t for t in tasks if t.done()]
+            if failed:
+                failed[0].result()   # surface the session's exception
+        cpu = (sampler.cpu_seconds() - cpu_start) / (time.perf_counter() - wall_start)
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    runs = [r for c in clients for r in c.runs]
+    rss = max(rss_samples)
+    row = {
+        'sessions': sessions,
+        'cpu_pct': round(cpu * 100, 1),
+        'rss_mb': round(rss / 2**20, 1),
+        'rss_per_session_mb': round((rss - baseline_rss) / sessions / 2**20, 2),
+        'runs': len(runs),
+    }
+    latencies = [latency for _, latency, _, _ in runs]
+    row['p50_ms'], row['p95_ms'], row['p99_ms'] = (round(v * 1000, 1) for v in percentiles(latencies))
+    row['late_pct'] = round(100 * sum(latency > interval for interval, latency, _, _ in runs) / len(runs), 1) \
+        if runs else float('nan')
+    # The quote refresh is the fragment that matters for capacity; report it
+    # on its own as well.
+    refresh = [(interval, latency, size) for interval, latency, size, quotes in runs if quotes]
+    if refresh:
+        p50, p95, _ = percentiles([latency for _, latency, _ in refresh])
+        row['refresh_interval_s'] = refresh[0][0]
+        row['refresh_p50_ms'] = round(p50 * 1000, 1)
+        row['refresh_p95_ms'] = round(p95 * 1000, 1)
+        row['refresh_kb'] = round(np.mean([size for _, _, size in refresh]) / 1024, 1)
+    row['kb_per_run'] = round(np.mean([size for _, _, size, _ in runs]) / 1024, 2) if runs else float('nan')
+    return row
+
+
+async def warm(url: str, query_string: str):
+    """Run the page once so the baseline RSS includes imports and warm caches."""
+    session = HeadlessSession(url, query_string)
+    task = asyncio.create_task(session.run())
+    try:
+        await asyncio.wait_for(session.ready.wait(), timeout=300)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+def wait_healthy(base_url: str, timeout: float = 60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/_stcore/health", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"server at {base_url} did not become healthy within {timeout:.0f}s")
+
+
+def start_server(args, workdir: str) -> subprocess.Popen:
+    """Start `streamlit run` on the target replaying a tape, synthesizing one if needed."""
+    tape = args.tape
+    if tape is None:
+        tape = os.path.join(workdir, 'load_test.tape')
+        subprocess.run([sys.executable, str(REPO_ROOT / 'tools' / 'tape.py'), 'synth', tape,
+                        '--symbols', '90', '--minutes', '390'], check=True)
+    env = dict(os.environ, DASHBOARD_TAPE_REPLAY=tape, DASHBOARD_TAPE_SPEED=str(args.speed))
+    env.pop('DASHBOARD_STREAM_URL', None)
+    return subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', args.target,
+         '--server.headless', 'true', '--server.port', str(args.port),
+         '--browser.gatherUsageStats', 'false'],
+        cwd=REPO_ROOT, env=env,
+        stdout=subprocess.DEVNULL if not args.verbose else None,
+        stderr=subprocess.DEVNULL if not args.verbose else None,
+    )
+
+
+def write_plot(rows: List[Dict], path: str):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    n = [r['sessions'] for r in rows]
+    fig = make_subplots(rows=2, cols=2, subplot_titles=(
+        "Fragment latency (ms)", "Server CPU (% of one core)", "Server RSS (MB)", "KB per refresh"))
+    for key, name in (('p50_ms', 'p50'), ('p95_ms', 'p95'), ('p99_ms', 'p99'), ('refresh_p95_ms', 'refresh p95')):
+        fig.add_trace(go.Scatter(x=n, y=[r.get(key) for r in rows], name=name, mode='lines+markers'), 1, 1)
+    fig.add_trace(go.Scatter(x=n, y=[r['cpu_pct'] for r in rows], name='CPU', mode='lines+markers'), 1, 2)
+    fig.add_trace(go.Scatter(x=n, y=[r['rss_mb'] for r in rows], name='RSS', mode='lines+markers'), 2, 1)
+    fig.add_trace(go.Scatter(x=n, y=[r.get('refresh_kb') for r in rows], name='KB/refresh',
+                             mode='lines+markers'), 2, 2)
+    fig.update_xaxes(title_text="sessions")
+    fig.update_layout(title="Dashboard scaling curve", height=700)
+    fig.write_html(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8, 16],
+                        help="session counts to measure, in order")
+    parser.add_argument('--duration', type=float, default=60, help="seconds measured per session count")
+    parser.add_argument('--warmup', type=float, default=5, help="seconds after ramp-up before measuring")
+    parser.add_argument('--tape', help="market tape to replay (default: synthesize one)")
+    parser.add_argument('--speed', type=float, default=60,
+                        help="tape speed; also scales the refresh interval (default 60: 5 min -> 5 s)")
+    parser.add_argument('--target', default='app.py', help="script to serve (app.py or server.py)")
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('--url', help="attach to a running server instead of starting one")
+    parser.add_argument('--pid', type=int, help="server pid for CPU/RSS when using --url")
+    parser.add_argument('--query', default='', help="query string for every session, e.g. lowpower=1")
+    parser.add_argument('--csv', help="write the curve to this CSV file")
+    parser.add_argument('--plot', help="write the curve to this HTML file")
+    parser.add_argument('--verbose', action='store_true', help="show the server's output")
+    args = parser.parse_args()
+
+    server = None
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.url:
+            base_url = args.url.rstrip('/')
+            if args.pid is None:
+                parser.error("--url needs --pid to sample server CPU and RSS")
+            pid = args.pid
+        else:
+            args.port = args.port or free_port()
+            base_url = f"http://localhost:{args.port}"
+            server = start_server(args, workdir)
+            pid = server.pid
+        try:
+            wait_healthy(base_url)
+            sampler = ProcessSampler(pid)
+            ws_url = base_url.replace('http', 'ws', 1) + '/_stcore/stream'
+            asyncio.run(warm(ws_url, args.query))
+            baseline_rss = sampler.rss_bytes()
+            print(f"Server pid {pid}, warm idle RSS {baseline_rss / 2**20:,.0f} MB; "
+                  f"{args.duration:g}s per step", flush=True)
+
+            rows = []
+            columns = ('sessions', 'cpu_pct', 'rss_mb', 'rss_per_session_mb', 'runs',
+                       'p50_ms', 'p95_ms', 'p99_ms', 'late_pct', 'refresh_p95_ms', 'refresh_kb')
+            print('  '.join(f"{c:>{len(c)}}" for c in columns))
+            for sessions in args.sessions:
+                row = asyncio.run(measure(ws_url, sampler, sessions, args.duration, args.warmup,
+                                          args.query, baseline_rss))
+                rows.append(row)
+                print('  '.join(f"{row.get(c, ''):>{len(c)}}" for c in columns), flush=True)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            # refresh_* columns are only present for steps in which a quote
+            # refresh landed, so take every row's keys in first-seen order.
+            fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+            writer = csv.DictWriter(f, fieldnames=fieldnames, restval='')
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Wrote {args.csv}")
+    if args.plot:
+        write_plot(rows, args.plot)
+        print(f"Wrote {args.plot}")
+
+
+if __name__ == "__main__":
+    main()
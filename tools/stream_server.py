@@ -0,0 +1,155 @@
+"""
+Local stand-in quote stream for developing and load testing streaming mode.
+
+Serves ticks over a websocket in the same compact format the dashboard's
+QuoteStream consumes: each message is a JSON list of {"s", "p", "v"} ticks.
+Ticks are either synthetic (a random walk per symbol) or replayed from a
+recorded JSONL file, at a configurable rate.
+
+Usage:
+    python tools/stream_server.py --symbols 500 --rate 2000
+    python tools/stream_server.py --replay ticks.jsonl --rate 500
+    python tools/stream_server.py --bench 10 --rate 50000 --batch 500
+
+Then run the dashboard with DASHBOARD_STREAM_URL=ws://localhost:8765.
+--bench starts the server and an in-process client that applies ticks to
+the dashboard's QuoteTable, and reports the sustained applied tick rate.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import websockets
+
+
+def load_seed(path: str) -> List[Dict]:
+    """Load quotes from a saved screener payload or a plain list of quotes."""
+    payload = json.loads(Path(path).read_text())
+    if isinstance(payload, dict):
+        payload = payload['finance']['result'][0]['quotes']
+    return payload
+
+
+def synthetic_ticks(symbols: int, seed_quotes: List[Dict]) -> Iterator[Dict]:
+    """Endless random-walk ticks, one symbol at a time in random order."""
+    rng = random.Random(42)
+    if seed_quotes:
+        book = {q['symbol']: [q.get('regularMarketPrice') or 10.0, q.get('regularMarketVolume') or 0]
+                for q in seed_quotes}
+    else:
+        book = {f"SYM{i:04d}": [rng.uniform(5, 500), rng.randint(100_000, 5_000_000)]
+                for i in range(symbols)}
+    names = list(book)
+    while True:
+        symbol = rng.choice(names)
+        state = book[symbol]
+        state[0] = max(0.01, state[0] * (1 + rng.gauss(0, 0.0008)))
+        state[1] += rng.randint(100, 5_000)
+        yield {'s': symbol, 'p': round(state[0], 4), 'v': state[1]}
+
+
+def replay_ticks(path: str) -> Iterator[Dict]:
+    """Loop over a recorded JSONL file; each line is a tick or a list of ticks."""
+    while True:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if isinstance(record, list):
+                    yield from record
+                else:
+                    yield record
+
+
+async def broadcast(clients: set, ticks: Iterator[Dict], rate: float, batch: int):
+    """Send batches of ticks to every connected client at `rate` ticks/s."""
+    interval = batch / rate
+    next_send = time.perf_counter()
+    while True:
+        message = json.dumps(list(itertools.islice(ticks, batch)))
+        for ws in list(clients):
+            try:
+                await ws.send(message)
+            except websockets.ConnectionClosed:
+                clients.discard(ws)
+        next_send += interval
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            # Falling behind: yield to the loop but don't try to catch up
+            # with a burst, which would misreport the sustained rate.
+            next_send = time.perf_counter()
+            await asyncio.sleep(0)
+
+
+async def bench_client(url: str, seconds: float):
+    """Apply ticks to the dashboard's QuoteTable and report throughput."""
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from app import QuoteTable
+
+    table = QuoteTable()
+    messages = 0
+    async with websockets.connect(url, max_size=None) as ws:
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            table.apply_ticks(json.loads(await ws.recv()))
+            messages += 1
+        elapsed = time.perf_counter() - start
+    print(f"Applied {table.ticks_applied:,} ticks in {messages:,} messages over {elapsed:.1f}s")
+    print(f"Sustained rate: {table.ticks_applied / elapsed:,.0f} ticks/s "
+          f"across {len(table):,} symbols")
+
+
+async def main_async(args):
+    seed_quotes = load_seed(args.seed) if args.seed else []
+    ticks = replay_ticks(args.replay) if args.replay else synthetic_ticks(args.symbols, seed_quotes)
+    clients: set = set()
+
+    async def handler(ws):
+        clients.add(ws)
+        try:
+            await ws.wait_closed()
+        finally:
+            clients.discard(ws)
+
+    async with websockets.serve(handler, args.host, args.port, max_size=None):
+        url = f"ws://{args.host}:{args.port}"
+        print(f"Streaming {args.rate:,.0f} ticks/s in batches of {args.batch} on {url}")
+        sender = asyncio.create_task(broadcast(clients, ticks, args.rate, args.batch))
+        if args.bench:
+            await bench_client(url, args.bench)
+            sender.cancel()
+        else:
+            await sender
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--symbols', type=int, default=500, help="synthetic universe size")
+    parser.add_argument('--seed', help="screener payload JSON to take symbols and prices from")
+    parser.add_argument('--replay', help="JSONL file of recorded ticks to replay instead")
+    parser.add_argument('--rate', type=float, default=1000, help="ticks per second")
+    parser.add_argument('--batch', type=int, default=50, help="ticks per websocket message")
+    parser.add_argument('--bench', type=float, metavar='SECONDS',
+                        help="run an in-process client for SECONDS and report throughput")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
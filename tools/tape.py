@@ -0,0 +1,118 @@
+"""
+Inspect market tapes or synthesize one for offline work.
+
+Tapes are recorded by the dashboard when DASHBOARD_TAPE_RECORD is set (add
+DASHBOARD_TAPE_FUNDAMENTALS=1 to include fundamentals responses), and played
+back with DASHBOARD_TAPE_REPLAY=<path> and DASHBOARD_TAPE_SPEED=<N> (1 = real
+time, 0 = as fast as the dashboard asks).
+
+Usage:
+    python tools/tape.py info session.tape
+    python tools/tape.py synth offline.tape --symbols 90 --minutes 390
+    DASHBOARD_TAPE_REPLAY=offline.tape DASHBOARD_TAPE_SPEED=60 streamlit run app.py
+"""
+
+import argparse
+import os
+import random
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app import EASTERN, SECTOR_MAP, TapeReader, TapeWriter  # noqa: E402
+
+
+def info(args):
+    reader = TapeReader(args.path)
+    if not len(reader):
+        print("Empty tape")
+        return
+    start = datetime.fromtimestamp(reader.times[0], EASTERN)
+    end = datetime.fromtimestamp(reader.times[-1], EASTERN)
+    size = os.path.getsize(args.path)
+    raw = sum(len(str(reader.read(i)['data'])) for i in range(len(reader))) if args.ratio else None
+    print(f"{args.path}: {len(reader):,} records, {size / 1024:,.1f} KiB compressed")
+    print(f"  {start:%Y-%m-%d %H:%M:%S} -> {end:%Y-%m-%d %H:%M:%S %Z} ({(end - start).total_seconds() / 60:,.1f} min)")
+    for kind, n in sorted(Counter(reader.kinds).items()):
+        print(f"  {kind:<14} {n:>8,}")
+    if raw:
+        print(f"  compression ratio ~{raw / size:.1f}x")
+
+
+def synth(args):
+    """Write a synthetic random-walk session, for profiling without network access."""
+    rng = random.Random(args.seed)
+    symbols = [s for symbols in SECTOR_MAP.values() for s in symbols]
+    rng.shuffle(symbols)
+    book = {}
+    for symbol in symbols[:args.symbols]:
+        price = rng.uniform(5, 500)
+        book[symbol] = {
+            'symbol': symbol,
+            'shortName': f"{symbol} Inc.",
+            'regularMarketPrice': price,
+            'previousClose': price,
+            'regularMarketChangePercent': 0.0,
+            'regularMarketVolume': 0,
+            'averageDailyVolume3Month': rng.randint(1_000_000, 80_000_000),
+            'fiftyTwoWeekHigh': price * rng.uniform(1.0, 1.6),
+            'fiftyTwoWeekLow': price * rng.uniform(0.4, 1.0),
+            'marketCap': rng.randint(1, 3000) * 1_000_000_000,
+        }
+
+    writer = TapeWriter(args.path)
+    t = datetime.now(EASTERN).replace(hour=9, minute=30, second=0, microsecond=0).timestamp()
+    if args.fundamentals:
+        for symbol, quote in book.items():
+            writer.append('fundamentals', symbol, {
+                'revenue_growth': rng.uniform(-20, 250),
+                'eps_growth': rng.uniform(-50, 150),
+                'avg_volume_50d': quote['averageDailyVolume3Month'],
+                'industry': 'Synthetic',
+                'sector': 'Unknown',
+                'current_price': quote['regularMarketPrice'],
+                'market_cap': quote['marketCap'],
+                'pe_ratio': None,
+                'fifty_two_week_high': quote['fiftyTwoWeekHigh'],
+                'fifty_two_week_low': quote['fiftyTwoWeekLow'],
+            }, t=t)
+
+    steps = int(args.minutes * 60 / args.interval)
+    for _ in range(steps):
+        for quote in book.values():
+            quote['regularMarketPrice'] *= 1 + rng.gauss(0, 0.002)
+            quote['regularMarketChangePercent'] = (quote['regularMarketPrice'] / quote['previousClose'] - 1) * 100
+            quote['regularMarketVolume'] += int(quote['averageDailyVolume3Month'] * rng.uniform(0, 2) * args.interval / 23_400)
+        # Yahoo's screener returns the universe ranked by volume.
+        ranked = sorted(book.values(), key=lambda q: q['regularMarketVolume'], reverse=True)
+        writer.append('screener', args.symbols, [dict(q) for q in ranked], t=t)
+        t += args.interval
+    print(f"Wrote {steps:,} snapshots of {len(book)} symbols to {args.path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('info', help="summarize a tape")
+    p.add_argument('path')
+    p.add_argument('--ratio', action='store_true', help="decode every record to estimate compression")
+    p.set_defaults(func=info)
+
+    p = sub.add_parser('synth', help="write a synthetic session tape")
+    p.add_argument('path')
+    p.add_argument('--symbols', type=int, default=90)
+    p.add_argument('--minutes', type=float, default=390, help="session length (default: a full day)")
+    p.add_argument('--interval', type=float, default=60, help="seconds between snapshots")
+    p.add_argument('--no-fundamentals', dest='fundamentals', action='store_false')
+    p.add_argument('--seed', type=int, default=7)
+    p.set_defaults(func=synth)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Build the intraday volume profile behind the dashboard's relative volume.
+
+A profile holds, per symbol, the median share of a day's volume traded by
+each minute of the regular session (09:30-16:00 ET), plus a market curve
+(the median across symbols) for everything else. The dashboard loads it from
+DASHBOARD_VOLUME_PROFILE and compares today's volume with the 3-month
+average scaled to that share, so relative volume means the same thing at
+10:00 as at 15:55.
+
+Usage:
+    python tools/volume_profile.py build profile.npz                  # SECTOR_MAP symbols, last 7 days of 1m bars
+    python tools/volume_profile.py build profile.npz --watchlist "Desk Book"
+    python tools/volume_profile.py from-tape profile.npz session.tape # from recorded screener snapshots
+    python tools/volume_profile.py info profile.npz --symbol NVDA
+    DASHBOARD_VOLUME_PROFILE=profile.npz streamlit run app.py
+"""
+
+import argparse
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app import (  # noqa: E402
+    EASTERN, SECTOR_MAP, SESSION_MINUTES, WATCHLIST_PATH, TapeReader, VolumeProfile, load_watchlists,
+)
+
+GRID = np.arange(SESSION_MINUTES + 1)
+
+
+def day_curve(minutes: np.ndarray, cumulative: np.ndarray) -> np.ndarray:
+    """One day's cumulative volume, sampled at minute offsets, as a 0..1 curve on the minute grid."""
+    curve = np.interp(GRID, np.concatenate([[0], minutes]), np.concatenate([[0], cumulative]))
+    return curve / curve[-1]
+
+
+def combine(days: List[np.ndarray]) -> np.ndarray:
+    """Median of several days' curves, kept monotonic and ending at 1."""
+    curve = np.maximum.accumulate(np.median(np.vstack(days), axis=0))
+    return curve / curve[-1]
+
+
+def write_profile(path: str, curves: Dict[str, List[np.ndarray]], min_days: int):
+    symbols = sorted(s for s, days in curves.items() if len(days) >= min_days)
+    if not symbols:
+        sys.exit("No symbol has enough complete sessions for a profile")
+    matrix = np.vstack([combine(curves[s]) for s in symbols])
+    days = max(len(d) for d in curves.values())
+    VolumeProfile(symbols, matrix, combine(list(matrix)), days).save(path)
+    print(f"Wrote profiles for {len(symbols):,} symbols ({days} sessions) to {path} "
+          f"({os.path.getsize(path) / 1024:,.1f} KiB)")
+
+
+def build(args):
+    """Profiles from yfinance 1-minute bars (Yahoo serves about the last 7 sessions)."""
+    import yfinance as yf
+
+    if args.watchlist:
+        if not args.watchlists:
+            sys.exit("--watchlist needs --watchlists or DASHBOARD_WATCHLISTS")
+        symbols = load_watchlists(args.watchlists)[args.watchlist]
+    else:
+        symbols = [s for sector in SECTOR_MAP.values() for s in sector]
+    curves: Dict[str, List[np.ndarray]] = defaultdict(list)
+    for start in range(0, len(symbols), args.batch):
+        batch = symbols[start:start + args.batch]
+        bars = yf.download(batch, period=f"{args.days}d", interval='1m', group_by='ticker',
+                           prepost=False, threads=True, progress=False)
+        if bars.empty:
+            continue
+        bars.index = bars.index.tz_convert(EASTERN)
+        for symbol in batch:
+            if symbol not in bars.columns.get_level_values(0):
+                continue
+            volume = bars[symbol]['Volume'].dropna()
+            for _, day in volume.groupby(volume.index.date):
+                minutes = (day.index.hour * 60 + day.index.minute - 570).to_numpy()
+                session = (minutes >= 0) & (minutes < SESSION_MINUTES)
+                if session.sum() < args.min_bars or day[session].sum() <= 0:
+                    continue    # half day, halt or missing data
+                per_minute = np.bincount(minutes[session], weights=day.to_numpy()[session],
+                                         minlength=SESSION_MINUTES)
+                curves[symbol].append(day_curve(GRID[1:], np.cumsum(per_minute)))
+        print(f"  {min(start + args.batch, len(symbols)):,}/{len(symbols):,} symbols", file=sys.stderr)
+    write_profile(args.path, curves, args.min_days)
+
+
+def from_tape(args):
+    """Profiles from a market tape's screener snapshots (cumulative regularMarketVolume)."""
+    reader = TapeReader(args.tape)
+    sessions: Dict[object, Dict[str, List]] = defaultdict(lambda: defaultdict(list))
+    for i, kind in enumerate(reader.kinds):
+        if kind != 'screener':
+            continue
+        now = datetime.fromtimestamp(reader.times[i], EASTERN)
+        minute = (now.hour - 9) * 60 + now.minute - 30 + now.second / 60
+        if not 0 <= minute <= SESSION_MINUTES + 5:
+            continue
+        for quote in reader.read(i)['data']:
+            if quote.get('symbol') and quote.get('regularMarketVolume'):
+                sessions[now.date()][quote['symbol']].append((min(minute, SESSION_MINUTES),
+                                                              quote['regularMarketVolume']))
+    curves: Dict[str, List[np.ndarray]] = defaultdict(list)
+    for day, symbols in sessions.items():
+        for symbol, points in symbols.items():
+            minutes, cumulative = np.array(sorted(points)).T
+            # Only sessions seen from near the open through the close.
+            if minutes[0] > args.max_start or minutes[-1] < SESSION_MINUTES - args.max_gap:
+                continue
+            curves[symbol].append(day_curve(minutes, np.maximum.accumulate(cumulative)))
+    write_profile(args.path, curves, args.min_days)
+
+
+def info(args):
+    profile = VolumeProfile.load(args.path)
+    print(f"{args.path}: {len(profile.index):,} symbols, {profile.days} sessions, "
+          f"{os.path.getsize(args.path) / 1024:,.1f} KiB")
+    rows = [('market', profile.market)]
+    if args.symbol:
+        position = profile.index.get_indexer([args.symbol.upper()])[0]
+        if position < 0:
+            sys.exit(f"{args.symbol} has no profile (the market curve applies)")
+        rows.append((args.symbol.upper(), profile.curves[position]))
+    checkpoints = [30, 60, 120, 210, 300, 360, 389]
+    print(f"  {'share by':<8}" + "".join(f"{(570 + m) // 60:>5}:{(570 + m) % 60:02d}" for m in checkpoints))
+    for name, curve in rows:
+        print(f"  {name:<8}" + "".join(f"{curve[m] * 100:>7.1f}%" for m in checkpoints))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('build', help="build from yfinance minute bars")
+    p.add_argument('path')
+    p.add_argument('--watchlist', help="a watchlist name from --watchlists instead of SECTOR_MAP")
+    p.add_argument('--watchlists', default=WATCHLIST_PATH, help="watchlist file (default: DASHBOARD_WATCHLISTS)")
+    p.add_argument('--days', type=int, default=7)
+    p.add_argument('--batch', type=int, default=100, help="symbols per download")
+    p.add_argument('--min-bars', type=int, default=300, help="skip sessions with fewer minute bars")
+    p.add_argument('--min-days', type=int, default=2, help="skip symbols with fewer complete sessions")
+    p.set_defaults(func=build)
+
+    p = sub.add_parser('from-tape', help="build from a recorded market tape")
+    p.add_argument('path')
+    p.add_argument('tape')
+    p.add_argument('--max-start', type=float, default=15, help="first snapshot within N minutes of the open")
+    p.add_argument('--max-gap', type=float, default=5, help="last snapshot within N minutes of the close")
+    p.add_argument('--min-days', type=int, default=1)
+    p.set_defaults(func=from_tape)
+
+    p = sub.add_parser('info', help="summarize a profile")
+    p.add_argument('path')
+    p.add_argument('--symbol')
+    p.set_defaults(func=info)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()